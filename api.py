@@ -0,0 +1,310 @@
+"""Headless HTTP API over the planning and scheduling logic.
+
+Run with: uvicorn api:app --workers 4
+Connection settings come from the same .streamlit/secrets.toml as the Streamlit app. Every endpoint
+except /health and /ready needs `Authorization: Bearer <token>` with a token listed under
+`[api] tokens` there; with no tokens configured those endpoints refuse every request.
+"""
+import hmac
+import json
+import tempfile
+from contextlib import asynccontextmanager
+from datetime import date
+from typing import Dict, List, Literal, Optional
+
+import pandas as pd
+import streamlit as st
+from fastapi import APIRouter, Depends, FastAPI, HTTPException, Query
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import FileResponse, JSONResponse, StreamingResponse
+from fastapi.security import HTTPAuthorizationCredentials, HTTPBearer
+from pydantic import BaseModel, Field
+from starlette.background import BackgroundTask
+from starlette.concurrency import run_in_threadpool
+
+from backlog import load_backlog
+from batch_times import compute_batch_times
+from bulk_write import DEFAULT_BATCH_SIZE, bulk_insert_production_plan, bulk_upsert_plan_instance
+from cache import invalidate
+from db import close_all_pools, db_connection
+from export import EXPORT_TABLES, export_chunks, iter_csv, pq, write_parquet
+from reference_data import load_products, load_rates, load_saved_allocations
+from schedule_model import DOWNTIME_TYPES, SHIFT_DURATIONS, ScheduleModel
+from scheduler import DEFAULT_SHIFT, auto_schedule
+from validation import validate_schedule
+from warmup import is_ready, start_warmup, warmup_status
+
+
+@asynccontextmanager
+async def lifespan(app):
+    start_warmup()  # Pools and lookups warm up in the background; /ready reports when it is done
+    yield
+    close_all_pools()  # ✅ Don't leave idle connections behind on shutdown
+
+
+app = FastAPI(title="Production Planning API", lifespan=lifespan)
+_bearer = HTTPBearer(auto_error=False)
+
+
+def require_token(credentials: Optional[HTTPAuthorizationCredentials] = Depends(_bearer)):
+    """401 unless the request carries one of the `[api] tokens` from secrets.toml as a bearer token."""
+    tokens = st.secrets.get("api", {}).get("tokens", [])
+    supplied = (credentials.credentials if credentials else "").encode()
+    if not supplied or not any(hmac.compare_digest(supplied, str(token).encode()) for token in tokens):
+        raise HTTPException(status_code=401, detail="Missing or invalid API token", headers={"WWW-Authenticate": "Bearer"})
+
+
+branch_api = APIRouter(dependencies=[Depends(require_token)])  # Everything that touches a branch database
+
+
+# --- Request bodies ------------------------------------------------------
+
+ShiftCode = Literal[tuple(SHIFT_DURATIONS)]
+DowntimeType = Literal[tuple(DOWNTIME_TYPES)]
+
+class BatchRef(BaseModel):
+    product: str
+    batch_number: str
+
+
+class BatchTimesRequest(BaseModel):
+    batches: List[BatchRef]
+
+
+class Downtime(BaseModel):
+    machine: str
+    date: date
+    type: Optional[DowntimeType] = None
+    hours: float = Field(ge=0, le=24)
+
+
+class ComputeScheduleRequest(BaseModel):
+    start: date
+    end: date
+    machines: Optional[List[str]] = None  # Defaults to every machine with a backlog
+    shifts: Dict[str, ShiftCode] = {}  # machine -> shift code for the whole range
+    downtime: List[Downtime] = []
+
+
+class ScheduleDay(BaseModel):
+    machine: str
+    date: date
+    shift: ShiftCode = DEFAULT_SHIFT
+    allocations: Dict[str, int] = {}  # batch display name -> percent
+    downtime_type: Optional[DowntimeType] = None
+    downtime_hours: float = Field(0.0, ge=0, le=24)
+    version: Optional[int] = None  # plan_instance version this day was read at; None for a new cell
+
+
+class ScheduleBody(BaseModel):
+    days: List[ScheduleDay]
+    batch_size: int = Field(DEFAULT_BATCH_SIZE, gt=0)
+    overwrite: bool = False  # Save over cells changed by someone else since they were read
+
+
+class PlanRow(BaseModel):
+    product: str
+    batch_number: str
+    machine: str
+    time: float
+
+
+class PlanBody(BaseModel):
+    rows: List[PlanRow]
+    batch_size: int = Field(DEFAULT_BATCH_SIZE, gt=0)
+
+
+# --- Helpers -------------------------------------------------------------
+
+def _check_branch(branch):
+    if branch not in st.secrets["database"]["hosts"]:
+        raise HTTPException(status_code=404, detail=f"Unknown branch: {branch}")
+
+
+def _records(df):
+    # JSON-safe records: NaN -> null, dates -> ISO strings
+    return jsonable_encoder(df.astype(object).where(df.notna(), None).to_dict("records"))
+
+
+def _schedule_payload(schedule):
+    days = schedule.to_frame()
+    allocations = schedule.allocations_frame()
+    return {"days": _records(days), "allocations": _records(allocations)}
+
+
+def _body_machines(days):
+    """The machines a request's days name, as a `load_backlog()` filter."""
+    return tuple(sorted({day.machine for day in days}))
+
+
+def _schedule_from_body(days, backlog):
+    """Rebuild a ScheduleModel from request days, with run times from the branch backlog."""
+    schedule = ScheduleModel()
+    for machine, machine_batches in backlog.groupby("machine"):
+        schedule.register_batches(machine, machine_batches)
+
+    for day in days:
+        schedule.set_shift(day.machine, day.date, day.shift)
+        for batch, percent in day.allocations.items():
+            schedule.set_allocation(day.machine, day.date, batch, percent)
+        if day.downtime_hours:
+            schedule.set_downtime(day.machine, day.date, day.downtime_type, day.downtime_hours)
+    return schedule
+
+
+# --- Endpoints -----------------------------------------------------------
+
+@app.get("/health")
+async def health():
+    return {"status": "ok"}
+
+
+@app.get("/ready")
+async def ready():
+    """503 until the startup warmup has finished, so a load balancer holds traffic back meanwhile."""
+    status = warmup_status()
+    return JSONResponse(status, status_code=200 if is_ready() else 503)
+
+
+@branch_api.post("/branches/{branch}/batch-times")
+async def batch_times(branch: str, body: BatchTimesRequest):
+    """Hours each batch needs on each machine (null where there is no usable rate)."""
+    _check_branch(branch)
+    products, rates = await run_in_threadpool(lambda: (load_products(branch=branch), load_rates(branch=branch)))
+    batches = pd.DataFrame([batch.model_dump() for batch in body.batches], columns=["product", "batch_number"])
+    return _records(compute_batch_times(products, rates, batches))
+
+
+@branch_api.get("/branches/{branch}/backlog")
+async def backlog(branch: str, machine: Optional[List[str]] = Query(None), start: Optional[date] = None, end: Optional[date] = None):
+    """Unscheduled production_plan rows, streamed as newline-delimited JSON.
+
+    Filter with one or more `machine` parameters and a planned start `start`/`end` date range.
+    """
+    _check_branch(branch)
+    machines = tuple(sorted(machine)) if machine else None
+    batches = await run_in_threadpool(load_backlog, machines, start, end, branch=branch)
+
+    def rows(chunk_size=1000):
+        for start in range(0, len(batches), chunk_size):
+            for record in _records(batches.iloc[start:start + chunk_size]):
+                yield json.dumps(record) + "\n"
+
+    return StreamingResponse(rows(), media_type="application/x-ndjson")
+
+
+@branch_api.post("/branches/{branch}/schedules/compute")
+async def compute_schedule(branch: str, body: ComputeScheduleRequest):
+    """Automatic machine × date allocation of the unscheduled backlog."""
+    _check_branch(branch)
+    if body.end < body.start:
+        raise HTTPException(status_code=422, detail="end is before start")
+
+    machines = tuple(sorted(set(body.machines))) if body.machines is not None else None
+    batches = await run_in_threadpool(load_backlog, machines, branch=branch)
+    dates = list(pd.date_range(body.start, body.end).date)
+    downtime = {(d.machine, d.date): (d.type, d.hours) for d in body.downtime}
+
+    schedule = await run_in_threadpool(auto_schedule, batches, dates, body.shifts, downtime)
+    return _schedule_payload(schedule)
+
+
+@branch_api.post("/branches/{branch}/schedules/validate")
+async def validate(branch: str, body: ScheduleBody):
+    """Check a schedule for overloaded days, over- and under-allocated batches and shift/downtime conflicts."""
+    _check_branch(branch)
+    batches, saved = await run_in_threadpool(
+        lambda: (load_backlog(_body_machines(body.days), branch=branch), load_saved_allocations(_body_machines(body.days), branch=branch))
+    )
+    schedule = await run_in_threadpool(_schedule_from_body, body.days, batches)
+    violations = await run_in_threadpool(validate_schedule, schedule, saved_allocations=saved)
+    return {
+        "valid": not (violations["severity"] == "error").any(),
+        "violations": _records(violations),
+    }
+
+
+@branch_api.post("/branches/{branch}/schedules")
+async def save_schedule(branch: str, body: ScheduleBody):
+    """Upsert a schedule into plan_instance in one transaction.
+
+    If any day carries a `version`, every day is checked against it (days without one must be
+    new cells) and conflicting days are reported instead of saved; otherwise the last write wins.
+    """
+    _check_branch(branch)
+    batches = await run_in_threadpool(load_backlog, _body_machines(body.days), branch=branch)
+    schedule = await run_in_threadpool(_schedule_from_body, body.days, batches)
+    versioned = any(day.version is not None for day in body.days)
+    versions = {(day.machine, day.date): day.version for day in body.days if day.version is not None}
+
+    def save():
+        with db_connection(branch) as conn:
+            return bulk_upsert_plan_instance(
+                conn, schedule.to_rows(), batch_size=body.batch_size,
+                versions=versions if versioned else None, overwrite=body.overwrite,
+            )
+
+    result = await run_in_threadpool(save)
+    invalidate(branch, "plan_instance")
+    return {
+        "inserted": result["inserted"],
+        "updated": result["updated"],
+        "conflicts": jsonable_encoder([{"machine": m, "date": d} for m, d in result["conflicts"]]),
+        "versions": jsonable_encoder([{"machine": m, "date": d, "version": v} for (m, d), v in result["versions"].items()]),
+    }
+
+
+@branch_api.post("/branches/{branch}/plans")
+async def save_plan(branch: str, body: PlanBody):
+    """Bulk-insert production_plan rows in one transaction."""
+    _check_branch(branch)
+    rows = [(row.product, row.batch_number, row.machine, row.time) for row in body.rows]
+
+    def save():
+        with db_connection(branch) as conn:
+            return bulk_insert_production_plan(conn, rows, batch_size=body.batch_size)
+
+    counts = await run_in_threadpool(save)
+    invalidate(branch, "production_plan")
+    return counts
+
+
+@branch_api.get("/branches/{branch}/export/{table}")
+async def export_table(
+    branch: str,
+    table: str,
+    columns: Optional[str] = None,
+    start: Optional[date] = None,
+    end: Optional[date] = None,
+    format: str = "csv",
+):
+    """Stream production_plan or plan_instance rows as CSV or Parquet; `columns` is comma-separated."""
+    _check_branch(branch)
+    if table not in EXPORT_TABLES:
+        raise HTTPException(status_code=404, detail=f"Unknown export table: {table}")
+    if format not in ("csv", "parquet") or (format == "parquet" and pq is None):
+        raise HTTPException(status_code=422, detail=f"Unsupported format: {format}")
+    selected = columns.split(",") if columns else None
+    filename = f"{table}_{branch}.{format}"
+
+    if format == "parquet":
+        # Parquet needs a seekable file; it is built on disk, never in memory
+        target = tempfile.NamedTemporaryFile(suffix=".parquet")
+        try:
+            await run_in_threadpool(write_parquet, target.name, table, selected, start, end, [branch])
+        except ValueError as e:
+            target.close()
+            raise HTTPException(status_code=422, detail=str(e))
+        return FileResponse(target.name, filename=filename, background=BackgroundTask(target.close))
+
+    try:
+        names, chunks = await run_in_threadpool(export_chunks, table, selected, start, end, [branch])
+    except ValueError as e:
+        raise HTTPException(status_code=422, detail=str(e))
+    return StreamingResponse(  # Sync generator: Starlette pulls each chunk on a worker thread
+        iter_csv(names, chunks), media_type="text/csv",
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'},
+    )
+
+
+app.include_router(branch_api)  # After the routes above: include_router copies them
@@ -1,8 +1,13 @@
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeoutError
+
 import streamlit as st
 import psycopg2
+import psycopg2.errors
 import bcrypt
-from db import get_db_connection
-from db import get_main_db_connection
+from db import get_main_db_connection, release_connection
 
 # Role-based access control
 ROLE_ACCESS = {
@@ -12,6 +17,19 @@ ROLE_ACCESS = {
     "report": ["reports_dashboard", "extract_data", "change_password"],
 }
 
+USER_LOOKUP = "SELECT username, password, role, branch FROM users WHERE username = $1"
+
+# Password checks run on a small shared pool so a login burst can't starve the server of CPU
+LOGIN_WORKERS = 4
+LOGIN_QUEUE_LIMIT = 64  # Checks in flight or waiting before new attempts are turned away
+LOGIN_TIMEOUT = 10  # seconds
+
+_bcrypt_pool = ThreadPoolExecutor(max_workers=LOGIN_WORKERS, thread_name_prefix="bcrypt")
+_login_slots = threading.BoundedSemaphore(LOGIN_QUEUE_LIMIT)
+_login_timings = deque(maxlen=1000)  # (seconds, outcome) of recent attempts
+_metrics_lock = threading.Lock()
+_in_flight = 0
+
 def check_authentication():
     if "authenticated" not in st.session_state or not st.session_state["authenticated"]:
         st.warning("You must log in to access this page.")
@@ -22,6 +40,102 @@ def check_access(required_roles):
         st.error("Access Denied: You do not have permission to view this page.")
         st.stop()        
 
+def _fetch_user(username):
+    """Look a user up on a pooled main-branch connection using a per-connection prepared statement."""
+    conn = get_main_db_connection()
+    if conn is None:
+        raise ConnectionError("Main branch database is unavailable")
+
+    try:
+        with conn.cursor() as cur:
+            try:
+                cur.execute("EXECUTE auth_user_lookup (%s)", (username,))
+            except psycopg2.errors.InvalidSqlStatementName:
+                # First login on this pooled connection: prepare once, reuse for its lifetime
+                conn.rollback()
+                cur.execute(f"PREPARE auth_user_lookup (text) AS {USER_LOOKUP}")
+                cur.execute("EXECUTE auth_user_lookup (%s)", (username,))
+            return cur.fetchone()
+    finally:
+        release_connection(conn)  # ✅ Hand the connection back to the pool
+
+
+def _record_login(started, outcome):
+    with _metrics_lock:
+        _login_timings.append((time.perf_counter() - started, outcome))
+
+
+def login_metrics():
+    """Latency and outcome counts for recent login attempts."""
+    with _metrics_lock:
+        timings = list(_login_timings)
+    durations = sorted(seconds for seconds, _ in timings)
+    outcomes = {}
+    for _, outcome in timings:
+        outcomes[outcome] = outcomes.get(outcome, 0) + 1
+
+    def percentile(p):
+        return round(durations[min(int(len(durations) * p), len(durations) - 1)] * 1000, 1) if durations else None
+
+    return {
+        "attempts": len(durations),
+        "outcomes": outcomes,
+        "p50_ms": percentile(0.50),
+        "p95_ms": percentile(0.95),
+        "max_ms": round(durations[-1] * 1000, 1) if durations else None,
+        "in_flight": _in_flight,
+    }
+
+
+def verify_credentials(username, password):
+    """Check a username/password pair against the main branch.
+
+    Returns (user, error): user is {"username", "role", "branch"} on success, otherwise error
+    is the message to show. bcrypt runs on a bounded worker pool; when too many checks are
+    already queued the attempt is turned away instead of piling up.
+    """
+    global _in_flight
+    started = time.perf_counter()
+    if not _login_slots.acquire(blocking=False):
+        _record_login(started, "busy")
+        return None, "Too many logins in progress. Please try again in a moment."
+
+    with _metrics_lock:
+        _in_flight += 1
+    try:
+        try:
+            user = _fetch_user(username)
+        except Exception as e:
+            print(f"❌ Auth lookup failed: {e}")
+            _record_login(started, "error")
+            return None, "Database error. Please try again."
+
+        if not user:
+            _record_login(started, "unknown_user")
+            return None, "User not found"
+
+        stored_password = user[1].strip()  # Ensure no extra spaces
+        try:
+            check = _bcrypt_pool.submit(bcrypt.checkpw, password.encode(), stored_password.encode())
+            valid = check.result(timeout=LOGIN_TIMEOUT)
+        except FutureTimeoutError:
+            _record_login(started, "timeout")
+            return None, "Login timed out. Please try again."
+        except ValueError:  # Malformed hash in the users table
+            valid = False
+
+        if not valid:
+            _record_login(started, "bad_password")
+            return None, "Invalid username or password"
+
+        _record_login(started, "success")
+        return {"username": user[0], "role": user[2], "branch": user[3]}, None
+    finally:
+        with _metrics_lock:
+            _in_flight -= 1
+        _login_slots.release()
+
+
 def authenticate_user():
     """Handles user authentication and assigns branch based on database records."""
     
@@ -40,36 +154,17 @@ def authenticate_user():
     password = st.sidebar.text_input("Password", type="password", key="login_password")
 
     if st.sidebar.button("Login", key="login_button"):
-        conn = get_main_db_connection()
-        cur = conn.cursor()
-
-        try:
-            # Fetch user details
-            cur.execute("SELECT username, password, role, branch FROM users WHERE username = %s", (username,))
-            user = cur.fetchone()
-
-            if user:
-                stored_password = user[1].strip()  # Ensure no extra spaces
-                if bcrypt.checkpw(password.encode(), stored_password.encode()):
-                    # Store login info in session state
-                    st.session_state["authenticated"] = True
-                    st.session_state["username"] = user[0]
-                    st.session_state["role"] = user[2]
-                    st.session_state["branch"] = user[3]  # Assign branch from the users table
-                    st.sidebar.success(f"Logged in as {user[0]} ({user[2]})")
-                    st.rerun()
-                else:
-                    st.sidebar.error("Invalid username or password")
-
-            else:
-                st.sidebar.error("User not found")
-
-        except Exception as e:
-            st.sidebar.error("Database error. Please try again.")
-            st.write(f"DEBUG: Auth error → {e}")
+        user, error = verify_credentials(username, password)
 
-        finally:
-            cur.close()
-            conn.close()
+        if user:
+            # Store login info in session state
+            st.session_state["authenticated"] = True
+            st.session_state["username"] = user["username"]
+            st.session_state["role"] = user["role"]
+            st.session_state["branch"] = user["branch"]  # Assign branch from the users table
+            st.sidebar.success(f"Logged in as {user['username']} ({user['role']})")
+            st.rerun()
+        else:
+            st.sidebar.error(error)
 
     return None  # Authentication failed
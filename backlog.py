@@ -0,0 +1,61 @@
+import pandas as pd
+
+from cache import branch_cached
+from db import db_connection
+
+BACKLOG_TTL = 60  # The backlog changes more often than master data
+
+BACKLOG_COLUMNS = ["id", "product", "batch_number", "machine", "time", "progress", "display_name"]
+BACKLOG_DTYPES = {"id": "int64", "time": "float64", "progress": "float64"}
+
+# Indexes migration 005 creates; verify_indexes() reports any that are missing or unusable
+BACKLOG_INDEXES = ("production_plan_unscheduled_machine_idx", "production_plan_batch_idx")
+
+# Machine and date filters run in SQL, so only the requested machines' rows leave the database.
+# Both filters use the partial index on unscheduled rows (migration 005).
+BACKLOG_QUERY = """
+    SELECT id, product, batch_number, machine, time::FLOAT, progress::FLOAT,
+           product || ' - ' || batch_number AS display_name
+    FROM production_plan
+    WHERE schedule = FALSE
+      AND (%(machines)s::text[] IS NULL OR machine = ANY(%(machines)s::text[]))
+      AND (%(start)s::date IS NULL OR planned_start_datetime >= %(start)s::date)
+      AND (%(end)s::date IS NULL OR planned_start_datetime < %(end)s::date + 1)
+    ORDER BY machine, id
+"""
+BACKLOG_MACHINES_QUERY = "SELECT DISTINCT machine FROM production_plan WHERE schedule = FALSE AND machine IS NOT NULL ORDER BY machine"
+INDEX_STATUS_QUERY = """
+    SELECT c.relname, i.indisvalid
+    FROM pg_index i JOIN pg_class c ON c.oid = i.indexrelid
+    WHERE c.relname = ANY(%s)
+"""
+
+
+@branch_cached("production_plan", ttl=BACKLOG_TTL)
+def load_backlog(machines=None, start=None, end=None, branch=None):
+    """Unscheduled production_plan rows with a display name per batch, ordered by machine and id.
+
+    `machines` is a sorted tuple (None for every machine); `start`/`end` bound the planned start
+    date. Cached per filter, so each machine block reuses its own small read.
+    """
+    params = {"machines": list(machines) if machines is not None else None, "start": start, "end": end}
+    with db_connection(branch) as conn, conn.cursor() as cur:
+        cur.execute(BACKLOG_QUERY, params)
+        rows = cur.fetchall()
+    return pd.DataFrame(rows, columns=BACKLOG_COLUMNS).astype(BACKLOG_DTYPES)
+
+
+@branch_cached("production_plan", ttl=BACKLOG_TTL)
+def backlog_machines(branch=None):
+    """Machines that have unscheduled batches, sorted."""
+    with db_connection(branch) as conn, conn.cursor() as cur:
+        cur.execute(BACKLOG_MACHINES_QUERY)
+        return [row[0] for row in cur.fetchall()]
+
+
+def verify_indexes(branch=None):
+    """Names of BACKLOG_INDEXES that are missing or invalid (e.g. an interrupted concurrent build)."""
+    with db_connection(branch) as conn, conn.cursor() as cur:
+        cur.execute(INDEX_STATUS_QUERY, (list(BACKLOG_INDEXES),))
+        valid = {name for name, is_valid in cur.fetchall() if is_valid}
+    return [name for name in BACKLOG_INDEXES if name not in valid]
@@ -0,0 +1,69 @@
+import io
+import re
+
+import pandas as pd
+
+MAX_BATCHES = 5000  # Per request; a typo like "1000-100000" shouldn't generate a hundred thousand rows
+
+_SEPARATORS = re.compile(r"[,;\s]+")
+_LINES = re.compile(r"[\r\n]+")
+# "1001-1300", "A1001-A1300", "A1001-1300" (prefix optional on the end); zero padding is kept
+_RANGE = re.compile(r"^(?P<prefix>[^\d\-]*)(?P<start>\d+)-(?:(?P=prefix))?(?P<end>\d+)$")
+
+
+def parse_batch_spec(text):
+    """Batch numbers from a spec such as "1001-1300, 1405", in order, without repeats.
+
+    Items are separated by commas, semicolons or whitespace (spaces around a "-" are allowed), and
+    "start-end" items expand to the range. Lists of literal numbers go through parse_batch_list.
+    Raises ValueError for reversed ranges or more than MAX_BATCHES numbers.
+    """
+    text = re.sub(r"\s*-\s*", "-", text or "")
+    numbers = {}  # Ordered set
+    for item in filter(None, _SEPARATORS.split(text)):
+        match = _RANGE.match(item)
+        if match is None:
+            numbers[item] = None
+            continue
+
+        start, end = int(match["start"]), int(match["end"])
+        if end < start:
+            raise ValueError(f"Range {item} ends before it starts")
+        if len(numbers) + end - start + 1 > MAX_BATCHES:
+            raise ValueError(f"More than {MAX_BATCHES} batch numbers")
+        width = len(match["start"])
+        for number in range(start, end + 1):
+            numbers[f"{match['prefix']}{number:0{width}d}"] = None
+
+    if len(numbers) > MAX_BATCHES:
+        raise ValueError(f"More than {MAX_BATCHES} batch numbers")
+    return list(numbers)
+
+
+def parse_batch_list(values):
+    """Batch numbers from a pasted list (one per line) or a column of cells, taken literally.
+
+    "B24-30" stays one batch number: only parse_batch_spec expands ranges. Blank entries and repeats
+    are dropped; raises ValueError for more than MAX_BATCHES numbers.
+    """
+    if isinstance(values, str):
+        values = _LINES.split(values)
+    numbers = list(dict.fromkeys(value.strip() for value in values if value and value.strip()))
+    if len(numbers) > MAX_BATCHES:
+        raise ValueError(f"More than {MAX_BATCHES} batch numbers")
+    return numbers
+
+
+def batch_numbers_from_file(data, filename=""):
+    """Batch numbers from an uploaded CSV/Excel (.xlsx) file (first column) or text file (one per line)."""
+    if filename.lower().endswith(".xlsx"):
+        values = pd.read_excel(io.BytesIO(data), header=None, dtype=str).iloc[:, 0]  # Needs openpyxl
+    elif filename.lower().endswith(".csv"):
+        values = pd.read_csv(io.BytesIO(data), header=None, dtype=str).iloc[:, 0]
+    else:
+        return parse_batch_list(data.decode("utf-8-sig"))
+
+    values = values.dropna().str.strip()
+    if len(values) and not any(char.isdigit() for char in values.iloc[0]):
+        values = values.iloc[1:]  # Header row
+    return parse_batch_list(values)
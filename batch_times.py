@@ -0,0 +1,78 @@
+import numpy as np
+import pandas as pd
+
+# Machine quantity unit -> product column holding the units per box it counts in
+UNIT_COLUMNS = {"thousand units": "units_per_box", "thousand units 1ry": "primary_units_per_box"}
+KNOWN_UNITS = {"batch", *UNIT_COLUMNS}
+
+
+def product_machine_times(products, rates):
+    """Hours one batch of each product takes on each machine it has a rate for.
+
+    `products` has name, batch_size, units_per_box, primary_units_per_box;
+    `rates` has product, machine, standard_rate, qty_uom. Returns one row per
+    (product, machine) with `hours` (NaN when it can't be computed) and `issue`
+    explaining why.
+    """
+    df = rates.drop_duplicates(["product", "machine"]).merge(
+        products, how="left", left_on="product", right_on="name"
+    )
+
+    rate = pd.to_numeric(df["standard_rate"], errors="coerce").to_numpy(dtype=float)
+    batch_size = pd.to_numeric(df["batch_size"], errors="coerce").to_numpy(dtype=float)
+    units = pd.to_numeric(df["units_per_box"], errors="coerce").to_numpy(dtype=float)
+    primary_units = pd.to_numeric(df["primary_units_per_box"], errors="coerce").to_numpy(dtype=float)
+    uom = df["qty_uom"].to_numpy()
+
+    is_batch = uom == "batch"
+    is_units = uom == "thousand units"
+    is_primary = uom == "thousand units 1ry"
+    pack_size = np.select([is_units, is_primary], [units, primary_units], default=np.nan)
+
+    valid_rate = np.isfinite(rate) & (rate > 0)
+    valid_pack = np.isfinite(pack_size) & (pack_size > 0) & np.isfinite(batch_size)
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        hours = np.select(
+            [is_batch, is_units | is_primary],
+            [1 / rate, (batch_size * pack_size) / (1000 * rate)],
+            default=np.nan,
+        )
+    hours = np.where(valid_rate & (is_batch | valid_pack), np.round(hours, 2), np.nan)
+
+    issue = np.select(
+        [
+            df["name"].isna().to_numpy(),
+            ~np.isin(uom, list(KNOWN_UNITS)),
+            ~valid_rate,
+            ~is_batch & ~valid_pack,
+        ],
+        ["unknown product", "unknown unit", "missing rate", "missing pack size"],
+        default=None,
+    )
+    issue = np.where(np.isnan(hours), issue, None)  # Only explain cells that have no time
+
+    return pd.DataFrame({
+        "product": df["product"].to_numpy(),
+        "machine": df["machine"].to_numpy(),
+        "qty_uom": uom,
+        "hours": hours,
+        "issue": issue,
+    })
+
+
+def compute_batch_times(products, rates, batches):
+    """Batch × machine time matrix in one vectorized pass.
+
+    `batches` has product and batch_number columns. Returns one row per batch with
+    Product, Batch Number and one column per machine; cells are hours, NaN where the
+    product has no usable rate on that machine.
+    """
+    times = product_machine_times(products, rates)
+    matrix = times.pivot(index="product", columns="machine", values="hours")
+
+    result = matrix.reindex(batches["product"].to_numpy())  # One row per batch, broadcast from its product
+    result.columns.name = None
+    result.insert(0, "Batch Number", batches["batch_number"].to_numpy())
+    result.insert(0, "Product", batches["product"].to_numpy())
+    return result.reset_index(drop=True)
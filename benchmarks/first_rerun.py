@@ -0,0 +1,126 @@
+"""Time a page's first rerun in a fresh process, cold and after `warmup.prewarm()`.
+
+Usage:
+    python benchmarks/first_rerun.py --dsn postgresql://localhost/plan_bench --scale small
+    python benchmarks/first_rerun.py --dsn postgresql://localhost/plan_bench --page pages/what_if.py --runs 5
+
+Every run is its own Python process, so imports, connection pools and caches start empty the way
+they do after a deploy. --dsn drops and reloads the benchmark tables in that database.
+"""
+import argparse
+import json
+import statistics
+import subprocess
+import sys
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))  # Run from anywhere
+
+BENCH_BRANCH = "main"
+MODES = ("cold", "warm")
+
+
+def child(mode, page, dsn):
+    """One measurement in this (fresh) process; prints its timings as JSON.
+
+    startup_ms covers the app imports and pool setup, warmup_ms the prewarm (warm mode only), and
+    first_rerun_ms / second_rerun_ms the page's first two reruns.
+    """
+    started = time.perf_counter()
+    from streamlit.testing.v1 import AppTest
+
+    import db
+    from instrumentation import InstrumentedCursor
+
+    with db._pools_lock:  # Point the app's main-branch pool at the benchmark database instead of secrets
+        db._pools[BENCH_BRANCH] = db.BranchPool(
+            BENCH_BRANCH, minconn=0, maxconn=db.POOL_MAX_CONN, timeout=db.POOL_CHECKOUT_TIMEOUT,
+            dsn=dsn, cursor_factory=InstrumentedCursor,
+        )
+    result = {"mode": mode, "startup_ms": round((time.perf_counter() - started) * 1000, 2), "warmup_ms": None}
+
+    if mode == "warm":
+        from warmup import prewarm
+
+        warm_started = time.perf_counter()
+        status = prewarm([BENCH_BRANCH])
+        result["warmup_ms"] = round((time.perf_counter() - warm_started) * 1000, 2)
+        if status["status"] != "ready":
+            raise RuntimeError(f"Warmup did not finish cleanly: {status}")
+
+    at = AppTest.from_file(str(ROOT / page), default_timeout=300)
+    at.secrets["database"] = {"hosts": {BENCH_BRANCH: "benchmark"}, "user": "bench", "database": "bench"}
+    at.session_state["authenticated"] = True
+    at.session_state["role"] = "admin"
+    at.session_state["username"] = "bench"
+    at.session_state["branch"] = BENCH_BRANCH
+
+    for run in ("first_rerun_ms", "second_rerun_ms"):
+        rerun_started = time.perf_counter()
+        at.run()
+        result[run] = round((time.perf_counter() - rerun_started) * 1000, 2)
+        if at.exception:
+            raise RuntimeError(f"{page} raised: {at.exception[0].message}")
+    print(json.dumps(result))
+
+
+def summarize(runs):
+    """Median and max of every timing across a mode's runs."""
+    keys = [key for key in runs[0] if key.endswith("_ms") and runs[0][key] is not None]
+    return {
+        "runs": len(runs),
+        **{f"median_{key}": round(statistics.median(run[key] for run in runs), 2) for key in keys},
+        **{f"max_{key}": max(run[key] for run in runs) for key in keys},
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--dsn", required=True, help="PostgreSQL database to load and run against")
+    parser.add_argument("--page", default="pages/plan_schedule.py", help="Page script, relative to the repo root")
+    parser.add_argument("--scale", default="small")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--runs", type=int, default=3, help="Fresh processes per mode")
+    parser.add_argument("--output", help="Write results here instead of stdout")
+    parser.add_argument("--child", choices=MODES, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        child(args.child, args.page, args.dsn)
+        return
+
+    from run_benchmarks import environment
+    from synthetic_data import SCALES, generate, load_postgres
+
+    load_postgres(generate(SCALES[args.scale], seed=args.seed), args.dsn)
+    results = {}
+    for mode in MODES:
+        runs = []
+        for _ in range(args.runs):
+            output = subprocess.run(
+                [sys.executable, __file__, "--child", mode, "--page", args.page, "--dsn", args.dsn],
+                capture_output=True, text=True, check=True, cwd=ROOT,
+            ).stdout
+            runs.append(json.loads(output.strip().splitlines()[-1]))
+        results[mode] = summarize(runs)
+        print(f"✅ {mode}: first rerun {results[mode]['median_first_rerun_ms']} ms", file=sys.stderr)
+
+    report = {
+        "timestamp": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "environment": environment(),
+        "page": args.page,
+        "scale": args.scale,
+        "results": results,
+    }
+    text = json.dumps(report, indent=2, default=str)
+    if args.output:
+        Path(args.output).write_text(text)
+    else:
+        print(text)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,233 @@
+"""Time the planning hot paths on synthetic data and write the results as JSON.
+
+Usage:
+    python benchmarks/run_benchmarks.py --scale small
+    python benchmarks/run_benchmarks.py --scale medium --dsn postgresql://localhost/plan_bench --output results.json
+    python benchmarks/run_benchmarks.py --scale medium --baseline results.json   # exit 1 on regressions
+
+Without --dsn only the in-memory cases run; the database cases (save, branch listing, login)
+are reported as skipped. --dsn drops and reloads the benchmark tables in that database.
+"""
+import argparse
+import json
+import platform
+import sqlite3
+import statistics
+import subprocess
+import sys
+import time
+from dataclasses import asdict
+from datetime import datetime, timezone
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))  # Run from anywhere
+
+import pandas as pd
+
+from synthetic_data import BENCH_PASSWORD, BENCH_USER, SCALES, generate, load_postgres, resolve_scale
+
+BENCH_BRANCH = "main"  # Login and branch listing always go to the main branch
+
+
+def measure(fn, repeat, warmup=1):
+    """Run `fn` `warmup` + `repeat` times; timing stats in milliseconds over the measured runs."""
+    for _ in range(warmup):
+        fn()
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn()
+        timings.append((time.perf_counter() - started) * 1000)
+    timings.sort()
+    return {
+        "runs": repeat,
+        "min_ms": round(timings[0], 3),
+        "median_ms": round(statistics.median(timings), 3),
+        "p95_ms": round(timings[min(int(repeat * 0.95), repeat - 1)], 3),
+        "mean_ms": round(statistics.fmean(timings), 3),
+    }
+
+
+def backlog_frame(production_plan):
+    """Same shape as `reference_data.load_unscheduled_batches()`."""
+    backlog = production_plan[~production_plan["schedule"].astype(bool)].copy()
+    backlog["display_name"] = backlog["product"] + " - " + backlog["batch_number"]
+    return backlog
+
+
+def read_sqlite(path):
+    with sqlite3.connect(path) as conn:
+        tables = {
+            name: pd.read_sql(f"SELECT * FROM {name}", conn)
+            for name in ("products", "machines", "rates", "production_plan", "plan_instance")
+        }
+    tables["plan_instance"]["date"] = pd.to_datetime(tables["plan_instance"]["date"]).dt.date
+    return tables
+
+
+def compute_cases(tables):
+    """Benchmarks that need no database: name -> zero-argument callable."""
+    from batch_times import compute_batch_times
+    from schedule_model import ScheduleModel
+    from scheduler import auto_schedule
+    from validation import validate_schedule
+
+    products = tables["products"]
+    rates = tables["rates"].merge(tables["machines"], left_on="machine", right_on="name")[
+        ["product", "machine", "standard_rate", "qty_uom"]
+    ]
+    batches = tables["production_plan"][["product", "batch_number"]]
+    backlog = backlog_frame(tables["production_plan"])
+    dates = sorted(tables["plan_instance"]["date"].unique())
+    saved = tables["plan_instance"]
+    draft = auto_schedule(backlog, dates)
+
+    def allocation_edits():
+        # Replays saved cells through the same per-cell calls the editors make
+        schedule = ScheduleModel()
+        for machine, machine_batches in backlog.groupby("machine"):
+            schedule.register_batches(machine, machine_batches)
+        for machine, date, shift, batch_info in saved[["machine", "date", "shift", "batch_info"]].itertuples(index=False):
+            schedule.set_shift(machine, date, shift)
+            for batch, percent in json.loads(batch_info).items():
+                schedule.set_allocation(machine, date, batch, percent)
+        return schedule
+
+    return {
+        "batch_times": lambda: compute_batch_times(products, rates, batches),
+        "auto_schedule": lambda: auto_schedule(backlog, dates),
+        "allocation_edits": allocation_edits,
+        "utilization_frame": lambda: draft.to_frame(),
+        "save_rows": lambda: draft.to_rows(),
+        "validate_schedule": lambda: validate_schedule(draft),
+    }
+
+
+def database_cases(tables, dsn):
+    """Benchmarks against PostgreSQL through the app's own pool, branch listing and login code."""
+    import db
+    from auth import verify_credentials
+    from bulk_write import bulk_upsert_plan_instance
+    from instrumentation import InstrumentedCursor
+    from scheduler import auto_schedule
+    from summary import rebuild_summary
+
+    load_postgres(tables, dsn)
+    with db._pools_lock:  # Point the app's main-branch pool at the benchmark database instead of secrets
+        db._pools[BENCH_BRANCH] = db.BranchPool(
+            BENCH_BRANCH, minconn=1, maxconn=db.POOL_MAX_CONN, timeout=db.POOL_CHECKOUT_TIMEOUT,
+            dsn=dsn, cursor_factory=InstrumentedCursor,
+        )
+    with db.db_connection(BENCH_BRANCH) as conn:
+        rebuild_summary(conn)  # Saves adjust the summary incrementally, so it has to start out right
+
+    dates = sorted(tables["plan_instance"]["date"].unique())
+    rows = auto_schedule(backlog_frame(tables["production_plan"]), dates).to_rows()
+
+    def save():
+        with db.db_connection(BENCH_BRANCH) as conn:
+            return bulk_upsert_plan_instance(conn, rows)
+
+    def login():
+        user, error = verify_credentials(BENCH_USER, BENCH_PASSWORD)
+        if user is None:
+            raise RuntimeError(f"Benchmark login failed: {error}")
+
+    return {
+        "save_schedule": save,
+        "get_branches": lambda: db.get_branches(BENCH_BRANCH),
+        "verify_credentials": login,
+    }
+
+
+def environment():
+    try:
+        commit = subprocess.run(
+            ["git", "rev-parse", "HEAD"], capture_output=True, text=True, check=True,
+            cwd=Path(__file__).resolve().parent,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = None
+    import numpy
+    return {
+        "commit": commit,
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "pandas": pd.__version__,
+        "numpy": numpy.__version__,
+    }
+
+
+def compare(results, baseline_path, tolerance):
+    """Annotate results with the baseline median and flag cases slower by more than `tolerance`."""
+    baseline = {case["name"]: case for case in json.loads(Path(baseline_path).read_text())["results"]}
+    regressions = []
+    for case in results:
+        previous = baseline.get(case["name"], {}).get("median_ms")
+        if previous is None or "median_ms" not in case:
+            continue
+        case["baseline_median_ms"] = previous
+        case["regression"] = case["median_ms"] > previous * (1 + tolerance)
+        if case["regression"]:
+            regressions.append(case["name"])
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--scale", choices=SCALES, default="small")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--products", type=int)
+    parser.add_argument("--machines", type=int)
+    parser.add_argument("--batches", type=int)
+    parser.add_argument("--horizon-days", type=int)
+    parser.add_argument("--repeat", type=int, default=5, help="Measured runs per case")
+    parser.add_argument("--only", nargs="*", help="Run just these cases")
+    source = parser.add_mutually_exclusive_group()
+    source.add_argument("--dsn", help="PostgreSQL database to load and run the database cases against")
+    source.add_argument("--sqlite", help="Read inputs from a synthetic_data.py SQLite file instead of generating them")
+    parser.add_argument("--output", help="Write results here instead of stdout")
+    parser.add_argument("--baseline", help="Earlier results file to compare against")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="Allowed slowdown vs. baseline (0.2 = 20%%)")
+    args = parser.parse_args()
+
+    scale = resolve_scale(args)
+    tables = read_sqlite(args.sqlite) if args.sqlite else generate(scale, seed=args.seed)
+
+    cases = compute_cases(tables)
+    skipped = {}
+    if args.dsn:
+        cases.update(database_cases(tables, args.dsn))
+    else:
+        skipped = {name: "needs --dsn (PostgreSQL)" for name in ("save_schedule", "get_branches", "verify_credentials")}
+
+    results = []
+    for name, fn in cases.items():
+        if args.only and name not in args.only:
+            continue
+        results.append({"name": name, **measure(fn, args.repeat)})
+        print(f"✅ {name}: {results[-1]['median_ms']} ms", file=sys.stderr)
+    results += [{"name": name, "skipped": reason} for name, reason in skipped.items() if not args.only or name in args.only]
+
+    regressions = compare(results, args.baseline, args.tolerance) if args.baseline else []
+    report = {
+        "timestamp": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "environment": environment(),
+        "scale": asdict(scale) if not args.sqlite else {"sqlite": args.sqlite},
+        "seed": args.seed,
+        "results": results,
+        "regressions": regressions,
+    }
+    text = json.dumps(report, indent=2, default=str)
+    if args.output:
+        Path(args.output).write_text(text)
+    else:
+        print(text)
+
+    if regressions:
+        print(f"❌ Slower than baseline: {', '.join(regressions)}", file=sys.stderr)
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,218 @@
+"""Synthetic plant data for benchmarks: products, machines, rates, production_plan and plan_instance.
+
+Usage:
+    python benchmarks/synthetic_data.py --scale medium --dsn postgresql://localhost/plan_bench
+    python benchmarks/synthetic_data.py --scale small --sqlite /tmp/plan_bench.db
+
+Data is generated from a seed, so the same scale and seed always give the same tables.
+"""
+import argparse
+import json
+import sqlite3
+from dataclasses import asdict, dataclass
+from datetime import date, timedelta
+
+import bcrypt
+import numpy as np
+import pandas as pd
+
+BENCH_USER = "bench"
+BENCH_PASSWORD = "bench-password"
+SHIFTS = ["LD", "NS", "ND", "ELD"]
+UNITS = ["batch", "thousand units", "thousand units 1ry"]
+
+
+@dataclass(frozen=True)
+class Scale:
+    products: int
+    machines: int
+    batches: int
+    horizon_days: int
+    rates_per_product: int = 3
+    branches: int = 3
+    start: date = date(2025, 1, 1)
+
+
+SCALES = {
+    "small": Scale(products=50, machines=8, batches=500, horizon_days=14),
+    "medium": Scale(products=500, machines=30, batches=5000, horizon_days=31),
+    "large": Scale(products=2000, machines=80, batches=50000, horizon_days=92),
+}
+
+# Minimal DDL for the columns the app reads and writes (PostgreSQL)
+POSTGRES_SCHEMA = """
+    DROP TABLE IF EXISTS schedule_drafts, plan_summary, plan_instance, production_plan, rates, products, machines, users, branches CASCADE;
+    CREATE TABLE products (name TEXT PRIMARY KEY, batch_size NUMERIC, units_per_box NUMERIC, primary_units_per_box NUMERIC);
+    CREATE TABLE machines (name TEXT PRIMARY KEY, qty_uom TEXT);
+    CREATE TABLE rates (product TEXT, machine TEXT, standard_rate NUMERIC, PRIMARY KEY (product, machine));
+    CREATE TABLE production_plan (
+        id SERIAL PRIMARY KEY, product TEXT, batch_number TEXT, machine TEXT,
+        planned_start_datetime TIMESTAMP, planned_end_datetime TIMESTAMP, time NUMERIC,
+        progress NUMERIC DEFAULT 0, schedule BOOLEAN NOT NULL DEFAULT FALSE, updated_at TIMESTAMP
+    );
+    CREATE TABLE plan_instance (
+        machine TEXT, date DATE, shift TEXT, batch_info TEXT, utilization NUMERIC(7, 2), downtime TEXT,
+        allocated_hours NUMERIC(8, 2), downtime_type TEXT, downtime_hours NUMERIC(5, 2) NOT NULL DEFAULT 0,
+        version INTEGER NOT NULL DEFAULT 1, updated_at TIMESTAMPTZ NOT NULL DEFAULT NOW(),
+        PRIMARY KEY (machine, date)
+    );
+    CREATE TABLE plan_summary (
+        grain TEXT, period_start DATE, machine TEXT, shift TEXT, days INTEGER NOT NULL DEFAULT 0,
+        shift_hours NUMERIC(12, 2) NOT NULL DEFAULT 0, allocated_hours NUMERIC(12, 2) NOT NULL DEFAULT 0,
+        downtime_hours NUMERIC(12, 2) NOT NULL DEFAULT 0, PRIMARY KEY (grain, period_start, machine, shift)
+    );
+    CREATE TABLE schedule_drafts (
+        owner TEXT, name TEXT DEFAULT 'working', data BYTEA NOT NULL, digest TEXT NOT NULL,
+        updated_at TIMESTAMPTZ NOT NULL DEFAULT NOW(), PRIMARY KEY (owner, name)
+    );
+    CREATE INDEX production_plan_unscheduled_machine_idx ON production_plan (machine, id) WHERE schedule = FALSE;
+    CREATE INDEX production_plan_batch_idx ON production_plan (product, batch_number, machine);
+    CREATE TABLE users (username TEXT PRIMARY KEY, password TEXT, role TEXT, branch TEXT);
+    CREATE TABLE branches (branch_name TEXT PRIMARY KEY);
+"""
+
+
+def generate(scale, seed=0):
+    """Build every benchmark table as a DataFrame, keyed by table name."""
+    rng = np.random.default_rng(seed)
+
+    machines = pd.DataFrame({
+        "name": [f"M{i:03d}" for i in range(scale.machines)],
+        "qty_uom": rng.choice(UNITS, size=scale.machines),
+    })
+    products = pd.DataFrame({
+        "name": [f"P{i:05d}" for i in range(scale.products)],
+        "batch_size": rng.integers(50, 500, size=scale.products) * 100,
+        "units_per_box": rng.choice([10, 20, 30, 60], size=scale.products),
+        "primary_units_per_box": rng.choice([1, 2, 3, 6], size=scale.products),
+    })
+
+    per_product = min(scale.rates_per_product, scale.machines)
+    rate_machines = np.concatenate([
+        rng.choice(scale.machines, size=per_product, replace=False) for _ in range(scale.products)
+    ])
+    rates = pd.DataFrame({
+        "product": np.repeat(products["name"].to_numpy(), per_product),
+        "machine": machines["name"].to_numpy()[rate_machines],
+        "standard_rate": rng.uniform(0.5, 60, size=len(rate_machines)).round(2),
+    })
+
+    # Every batch runs on one of its product's machines
+    picks = rng.integers(0, len(rates), size=scale.batches)
+    production_plan = pd.DataFrame({
+        "id": np.arange(1, scale.batches + 1),
+        "product": rates["product"].to_numpy()[picks],
+        "batch_number": [str(100000 + i) for i in range(scale.batches)],
+        "machine": rates["machine"].to_numpy()[picks],
+        "time": rng.uniform(1, 30, size=scale.batches).round(2),
+        "progress": 0,
+        "schedule": False,
+    })
+
+    dates = [scale.start + timedelta(days=offset) for offset in range(scale.horizon_days)]
+    plan_instance = _plan_instance(rng, machines["name"].tolist(), dates, production_plan)
+
+    users = pd.DataFrame({
+        "username": [BENCH_USER],
+        "password": [bcrypt.hashpw(BENCH_PASSWORD.encode(), bcrypt.gensalt()).decode()],
+        "role": ["admin"],
+        "branch": ["main"],
+    })
+    branches = pd.DataFrame({"branch_name": ["main"] + [f"branch_{i}" for i in range(1, scale.branches)]})
+
+    return {
+        "machines": machines,
+        "products": products,
+        "rates": rates,
+        "production_plan": production_plan,
+        "plan_instance": plan_instance,
+        "users": users,
+        "branches": branches,
+    }
+
+
+def _plan_instance(rng, machines, dates, production_plan):
+    """Already-saved schedule cells: one shift per machine-day with up to three batches."""
+    names = (production_plan["product"] + " - " + production_plan["batch_number"]).to_numpy()
+    cells = len(machines) * len(dates)
+    shifts = rng.choice(SHIFTS, size=cells)
+    counts = rng.integers(0, 4, size=cells)
+    batch_info = [
+        json.dumps({str(name): int(rng.integers(10, 101)) for name in rng.choice(names, size=count)})
+        if count and len(names) else "{}"
+        for count in counts
+    ]
+    has_downtime = rng.random(cells) < 0.1
+    return pd.DataFrame({
+        "machine": np.repeat(machines, len(dates)),
+        "date": dates * len(machines),
+        "shift": shifts,
+        "batch_info": batch_info,
+        "allocated_hours": rng.uniform(0, 11, size=cells).round(2),
+        "utilization": rng.uniform(0, 100, size=cells).round(2),
+        "downtime_type": np.where(has_downtime, "Cleaning", None),
+        "downtime_hours": np.where(has_downtime, rng.uniform(0.5, 4, size=cells).round(2), 0.0),
+    })
+
+
+def load_postgres(tables, dsn):
+    """Recreate the benchmark tables in a PostgreSQL database and load `tables` into them."""
+    import psycopg2
+    from psycopg2.extras import execute_values
+
+    conn = psycopg2.connect(dsn)
+    try:
+        with conn:
+            with conn.cursor() as cur:
+                cur.execute(POSTGRES_SCHEMA)
+                for name, df in tables.items():
+                    columns = ", ".join(df.columns)
+                    rows = df.astype(object).where(df.notna(), None).itertuples(index=False, name=None)
+                    execute_values(cur, f"INSERT INTO {name} ({columns}) VALUES %s", list(rows), page_size=1000)
+                # Keep the serial in step with the explicit ids loaded above
+                cur.execute("SELECT setval('production_plan_id_seq', (SELECT COALESCE(MAX(id), 1) FROM production_plan))")
+    finally:
+        conn.close()
+
+
+def load_sqlite(tables, path):
+    """Write `tables` to an SQLite file (a stand-in when no PostgreSQL server is available)."""
+    with sqlite3.connect(path) as conn:
+        for name, df in tables.items():
+            df.to_sql(name, conn, if_exists="replace", index=False)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--scale", choices=SCALES, default="small")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--products", type=int, help="Override the scale's product count")
+    parser.add_argument("--machines", type=int, help="Override the scale's machine count")
+    parser.add_argument("--batches", type=int, help="Override the scale's batch count")
+    parser.add_argument("--horizon-days", type=int, help="Override the scale's plan horizon")
+    target = parser.add_mutually_exclusive_group(required=True)
+    target.add_argument("--dsn", help="PostgreSQL connection string (tables are dropped and recreated)")
+    target.add_argument("--sqlite", help="SQLite file to write instead")
+    args = parser.parse_args()
+
+    scale = resolve_scale(args)
+    tables = generate(scale, seed=args.seed)
+    if args.dsn:
+        load_postgres(tables, args.dsn)
+    else:
+        load_sqlite(tables, args.sqlite)
+    print(json.dumps({"scale": asdict(scale), "rows": {name: len(df) for name, df in tables.items()}}, default=str))
+
+
+def resolve_scale(args):
+    """Named scale with any per-dimension overrides from the command line applied."""
+    overrides = {
+        field: getattr(args, field)
+        for field in ("products", "machines", "batches", "horizon_days")
+        if getattr(args, field, None) is not None
+    }
+    return Scale(**{**asdict(SCALES[args.scale]), **overrides})
+
+
+if __name__ == "__main__":
+    main()
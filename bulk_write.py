@@ -0,0 +1,138 @@
+from psycopg2.extras import execute_values
+
+from summary import update_summary
+
+DEFAULT_BATCH_SIZE = 1000  # Rows per multi-row VALUES statement
+
+# `version` is the expected version + 1; a cell changed by someone else since it was loaded is left alone
+PLAN_INSTANCE_UPSERT = """
+    INSERT INTO plan_instance
+    (machine, date, shift, batch_info, allocated_hours, utilization, downtime_type, downtime_hours, version)
+    VALUES %s
+    ON CONFLICT (machine, date) DO UPDATE
+    SET shift = EXCLUDED.shift, batch_info = EXCLUDED.batch_info, allocated_hours = EXCLUDED.allocated_hours,
+        utilization = EXCLUDED.utilization, downtime_type = EXCLUDED.downtime_type, downtime_hours = EXCLUDED.downtime_hours,
+        version = EXCLUDED.version, updated_at = NOW()
+    WHERE plan_instance.version = EXCLUDED.version - 1
+    RETURNING machine, date, version, (xmax = 0) AS inserted
+"""
+
+# Serialises saves that touch the same machine, so two planners can't both create the same new cell
+MACHINE_LOCKS = "SELECT pg_advisory_xact_lock(hashtext('plan_instance:' || m)) FROM unnest(%s::text[]) AS m ORDER BY m"
+
+# Saved cells a save will overwrite; locked until it commits
+SAVED_CELLS_QUERY = """
+    SELECT machine, date, shift, allocated_hours, downtime_hours, version
+    FROM plan_instance
+    WHERE (machine, date) IN (SELECT * FROM unnest(%s::text[], %s::date[]))
+    FOR UPDATE
+"""
+
+# Rows already in production_plan for the same product, batch number and machine are skipped
+PRODUCTION_PLAN_INSERT = """
+    INSERT INTO production_plan
+    (product, batch_number, machine, planned_start_datetime, planned_end_datetime, time, updated_at)
+    SELECT v.product, v.batch_number, v.machine, NOW(), NOW(), v.time, NOW()
+    FROM (VALUES %s) AS v (product, batch_number, machine, time)
+    WHERE NOT EXISTS (
+        SELECT 1 FROM production_plan p
+        WHERE p.product = v.product AND p.batch_number = v.batch_number AND p.machine = v.machine
+    )
+    RETURNING product, batch_number, machine
+"""
+
+# Serialises inserts per product, so two sessions saving the same batch can't both pass the NOT EXISTS check
+PRODUCT_LOCKS = "SELECT pg_advisory_xact_lock(hashtext('production_plan:' || p)) FROM unnest(%s::text[]) AS p ORDER BY p"
+
+EXISTING_BATCHES = """
+    SELECT DISTINCT batch_number FROM production_plan
+    WHERE product = %s AND batch_number = ANY(%s)
+"""
+
+
+def _dedupe(rows, key_len):
+    # A single ON CONFLICT statement can't touch the same key twice; the last write wins
+    return list({tuple(row[:key_len]): row for row in rows}.values())
+
+
+def _lock_saved_cells(cur, rows):
+    """Lock the machines and existing cells `rows` touch; returns {(machine, date): saved row}."""
+    machines = [row[0] for row in rows]
+    cur.execute(MACHINE_LOCKS, (sorted(set(machines)),))
+    cur.execute(SAVED_CELLS_QUERY, (machines, [row[1] for row in rows]))
+    return {(row[0], row[1]): row for row in cur.fetchall()}
+
+
+def bulk_upsert_plan_instance(conn, rows, batch_size=DEFAULT_BATCH_SIZE, versions=None, overwrite=False, progress=None):
+    """Upsert `ScheduleModel.to_rows()` rows into plan_instance in one transaction.
+
+    `versions` maps (machine, date) to the version each row was based on (cells missing from
+    it are expected to be new). Cells saved by someone else since then are conflicts: they are
+    left untouched and reported unless `overwrite` is set. Without `versions` the last write wins.
+    Rows are sent as multi-row VALUES statements of `batch_size` rows each, and the plan_summary
+    aggregates are adjusted in the same transaction. `progress(fraction)` is called after each statement.
+
+    Returns {"inserted": n, "updated": m, "conflicts": [(machine, date), ...],
+    "versions": {(machine, date): new version}}.
+    """
+    rows = _dedupe(rows, key_len=2)
+    if not rows:
+        return {"inserted": 0, "updated": 0, "conflicts": [], "versions": {}}
+
+    with conn:  # ✅ Commit once at the end, roll everything back on error
+        with conn.cursor() as cur:
+            saved = _lock_saved_cells(cur, rows)
+
+            writes, conflicts = [], []
+            for row in rows:
+                key = (row[0], row[1])
+                current = saved[key][5] if key in saved else 0
+                expected = current if versions is None or overwrite else versions.get(key, 0)
+                if expected != current:
+                    conflicts.append(key)
+                    continue
+                writes.append((*row, current + 1))
+
+            update_summary(cur, [saved[(row[0], row[1])][:5] for row in writes if (row[0], row[1]) in saved], writes)
+            results = []
+            for start in range(0, len(writes), batch_size):
+                results += execute_values(cur, PLAN_INSTANCE_UPSERT, writes[start:start + batch_size], page_size=batch_size, fetch=True)
+                if progress is not None:
+                    progress(min(start + batch_size, len(writes)) / len(writes))
+
+    inserted = sum(1 for *_, was_inserted in results if was_inserted)
+    return {
+        "inserted": inserted,
+        "updated": len(results) - inserted,
+        "conflicts": conflicts,
+        "versions": {(machine, date): version for machine, date, version, _ in results},
+    }
+
+
+def existing_batch_numbers(conn, product, batch_numbers):
+    """The subset of `batch_numbers` already planned for a product, checked in one query."""
+    if not batch_numbers:
+        return set()
+    with conn.cursor() as cur:
+        cur.execute(EXISTING_BATCHES, (product, list(batch_numbers)))
+        return {row[0] for row in cur.fetchall()}
+
+
+def bulk_insert_production_plan(conn, rows, batch_size=DEFAULT_BATCH_SIZE):
+    """Insert (product, batch_number, machine, time) rows in one transaction.
+
+    Idempotent: rows whose (product, batch_number, machine) is already planned are skipped.
+    Returns {"inserted": n, "updated": 0, "skipped": m, "skipped_rows": [(product, batch_number, machine), ...]}.
+    """
+    rows = _dedupe(rows, key_len=3)
+    if not rows:
+        return {"inserted": 0, "updated": 0, "skipped": 0, "skipped_rows": []}
+
+    with conn:
+        with conn.cursor() as cur:
+            cur.execute(PRODUCT_LOCKS, (sorted({row[0] for row in rows}),))
+            results = execute_values(cur, PRODUCTION_PLAN_INSERT, rows, page_size=batch_size, fetch=True)
+
+    inserted = set(results)
+    skipped = [tuple(row[:3]) for row in rows if tuple(row[:3]) not in inserted]
+    return {"inserted": len(results), "updated": 0, "skipped": len(skipped), "skipped_rows": skipped}
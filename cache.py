@@ -0,0 +1,102 @@
+import functools
+import threading
+import time
+from collections import OrderedDict
+
+from db import current_branch
+
+DEFAULT_TTL = 600  # seconds
+DEFAULT_MAX_ENTRIES = 512
+
+_MISSING = object()
+
+
+class TTLCache:
+    """Thread-safe, size-bounded LRU cache whose entries expire after `ttl` seconds.
+
+    Every entry can carry tags (e.g. `(branch, table)`) so writers can drop exactly
+    the entries that depend on what they changed.
+    """
+
+    def __init__(self, maxsize=DEFAULT_MAX_ENTRIES, ttl=DEFAULT_TTL):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data = OrderedDict()  # key -> (expires_at, tags, value)
+        self._lock = threading.Lock()
+        self.stats = {"hits": 0, "misses": 0, "evictions": 0, "invalidations": 0}
+
+    def get(self, key, default=None):
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None or (entry[0] is not None and entry[0] < time.monotonic()):
+                if entry is not None:
+                    del self._data[key]  # Expired
+                self.stats["misses"] += 1
+                return default
+            self._data.move_to_end(key)
+            self.stats["hits"] += 1
+            return entry[2]
+
+    def set(self, key, value, ttl=_MISSING, tags=()):
+        ttl = self.ttl if ttl is _MISSING else ttl
+        expires_at = time.monotonic() + ttl if ttl is not None else None
+        with self._lock:
+            self._data[key] = (expires_at, frozenset(tags), value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)  # Least recently used
+                self.stats["evictions"] += 1
+
+    def invalidate_tags(self, *tags):
+        """Drop every entry carrying any of the given tags; returns how many were dropped."""
+        tags = set(tags)
+        with self._lock:
+            stale = [key for key, (_, entry_tags, _) in self._data.items() if entry_tags & tags]
+            for key in stale:
+                del self._data[key]
+            self.stats["invalidations"] += len(stale)
+        return len(stale)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self):
+        return len(self._data)
+
+
+# Shared by every session in this process
+shared_cache = TTLCache()
+
+
+def _copy(value):
+    # Hand out copies so callers can't mutate the cached object in place
+    return value.copy() if hasattr(value, "copy") else value
+
+
+def branch_cached(*tables, ttl=_MISSING, cache=None):
+    """Cache a loader per branch; the entry is dropped when any of `tables` is invalidated.
+
+    The wrapped function must accept a `branch` keyword argument, which defaults to the
+    session's branch.
+    """
+    def decorator(fn):
+        @functools.wraps(fn)
+        def wrapper(*args, branch=None, **kwargs):
+            store = cache or shared_cache
+            branch = branch or current_branch()
+            key = (fn.__module__, fn.__qualname__, branch, args, tuple(sorted(kwargs.items())))
+
+            value = store.get(key, _MISSING)
+            if value is _MISSING:
+                value = fn(*args, branch=branch, **kwargs)
+                store.set(key, value, ttl=ttl, tags=[(branch, table) for table in tables])
+            return _copy(value)
+
+        return wrapper
+    return decorator
+
+
+def invalidate(branch, *tables, cache=None):
+    """Drop cached reads of `tables` on a branch after the app writes to them."""
+    return (cache or shared_cache).invalidate_tags(*[(branch, table) for table in tables])
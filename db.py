@@ -1,86 +1,288 @@
+import threading
+import time
+from contextlib import contextmanager
+
 import psycopg2
-from sqlalchemy import create_engine
+from psycopg2 import pool as pg_pool
+from psycopg2 import extensions
 import streamlit as st
 
-def get_sqlalchemy_engine():
-    """Returns a SQLAlchemy engine for connecting to the correct PostgreSQL branch."""
-    
-    branch = st.session_state.get("branch", "main")  # Default to "main"
+from instrumentation import InstrumentedCursor
 
-    # Load database host from secrets based on the branch
-    db_host = st.secrets["database"]["hosts"].get(branch, st.secrets["database"]["hosts"]["main"])
-    db_user = st.secrets["database"]["user"]
-    db_password = st.secrets["branch_passwords"].get(branch, st.secrets["branch_passwords"]["main"])
-    db_name = st.secrets["database"]["database"]  # Same database name, different branches
+# Pool sizing defaults (override with `pool_min` / `pool_max` / `pool_timeout` under [database] in secrets)
+POOL_MIN_CONN = 1
+POOL_MAX_CONN = 10
+POOL_CHECKOUT_TIMEOUT = 10  # seconds to wait for a free connection before giving up
+HEALTH_CHECK_INTERVAL = 30  # seconds a connection may sit idle before it is pinged on checkout
+CONNECT_TIMEOUT = 5  # seconds to wait for an unreachable branch host (override with `connect_timeout`)
 
-    # ✅ Construct the database URL dynamically
-    db_url = f"postgresql://{db_user}:{db_password}@{db_host}/{db_name}"
+_pools = {}  # branch -> BranchPool (process-wide, shared by every session)
+_engines = {}  # branch -> SQLAlchemy engine
+_checked_out = {}  # id(conn) -> BranchPool, for connections handed out without a `with` block
+_pools_lock = threading.Lock()
+_limits = threading.local()  # Per-thread statement timeout applied by db_connection()
 
-    return create_engine(db_url, pool_pre_ping=True)
 
-def get_db_connection():
-    """Establish and return a database connection based on the user's assigned branch."""
-    try:
-        branch = st.session_state.get("branch", "main")  # Default to 'main'
-
-        db_host = st.secrets["database"]["hosts"].get(branch)
-        db_password = st.secrets["branch_passwords"].get(branch)
-        db_user = st.secrets["database"]["user"]
-        db_name = st.secrets["database"]["database"]
-
-        if not db_host or not db_password:
-            raise ValueError(f"❌ Invalid database host or missing password for branch: {branch}")
-
-        conn = psycopg2.connect(
-            dbname=db_name,
-            user=db_user,
-            password=db_password,
-            host=db_host,
-            port=5432
-        )
+def current_branch():
+    """Branch the current session is working on."""
+    return st.session_state.get("branch", "main")  # Default to 'main'
+
+
+def _db_setting(key, default):
+    return st.secrets["database"].get(key, default)
+
+
+def _connection_params(branch):
+    """Build psycopg2 connection arguments for a branch from secrets."""
+    db_host = st.secrets["database"]["hosts"].get(branch)
+    db_password = st.secrets["branch_passwords"].get(branch)
+
+    if not db_host or not db_password:
+        raise ValueError(f"❌ Invalid database host or missing password for branch: {branch}")
+
+    return {
+        "dbname": st.secrets["database"]["database"],  # Same database name, different branches
+        "user": st.secrets["database"]["user"],
+        "password": db_password,
+        "host": db_host,
+        "port": 5432,
+        "connect_timeout": _db_setting("connect_timeout", CONNECT_TIMEOUT),
+    }
+
+
+class BranchPool:
+    """Bounded, thread-safe connection pool for a single branch host."""
+
+    def __init__(self, branch, minconn, maxconn, timeout, **conn_params):
+        self.branch = branch
+        self.maxconn = maxconn
+        self.timeout = timeout
+        self._pool = pg_pool.ThreadedConnectionPool(minconn, maxconn, **conn_params)
+        self._slots = threading.BoundedSemaphore(maxconn)  # Blocks instead of raising PoolError when exhausted
+        self._lock = threading.Lock()
+        self._last_used = {}  # id(conn) -> monotonic time it was returned to the pool
+        self.stats = {
+            "checkouts": 0,
+            "in_use": 0,
+            "waits": 0,
+            "wait_time": 0.0,
+            "timeouts": 0,
+            "discarded": 0,
+        }
+
+    def _healthy(self, conn):
+        """Ping connections that have been idle for a while; closed ones are always unhealthy."""
+        if conn.closed:
+            return False
+        idle_since = self._last_used.get(id(conn))
+        if idle_since is None or time.monotonic() - idle_since < HEALTH_CHECK_INTERVAL:
+            return True
+        try:
+            with conn.cursor() as cur:
+                cur.execute("SELECT 1")
+            conn.rollback()
+            return True
+        except (psycopg2.OperationalError, psycopg2.InterfaceError):
+            return False
+
+    def getconn(self):
+        started = time.monotonic()
+        if not self._slots.acquire(blocking=False):
+            with self._lock:
+                self.stats["waits"] += 1
+            if not self._slots.acquire(timeout=self.timeout):
+                with self._lock:
+                    self.stats["timeouts"] += 1
+                raise pg_pool.PoolError(f"Connection pool for branch '{self.branch}' exhausted")
+
+        try:
+            conn = self._pool.getconn()
+            while not self._healthy(conn):
+                # The pool hands out its other idle connections before it opens a new one, so after a
+                # database restart keep going until one answers or a fresh one (never pinged) is opened
+                self._discard(conn)
+                conn = self._pool.getconn()
+        except Exception:
+            self._slots.release()
+            raise
+
+        with self._lock:
+            self.stats["checkouts"] += 1
+            self.stats["in_use"] += 1
+            self.stats["wait_time"] += time.monotonic() - started
         return conn
 
+    def _discard(self, conn):
+        self._last_used.pop(id(conn), None)
+        self._pool.putconn(conn, close=True)
+        with self._lock:
+            self.stats["discarded"] += 1
+
+    def putconn(self, conn):
+        try:
+            if conn.closed:
+                self._discard(conn)
+            else:
+                # Never hand a connection with an open or failed transaction to the next caller
+                if conn.info.transaction_status != extensions.TRANSACTION_STATUS_IDLE:
+                    conn.rollback()
+                self._last_used[id(conn)] = time.monotonic()
+                self._pool.putconn(conn)
+        except (psycopg2.OperationalError, psycopg2.InterfaceError):
+            self._discard(conn)
+        finally:
+            with self._lock:
+                self.stats["in_use"] -= 1
+            self._slots.release()
+
+    def closeall(self):
+        self._pool.closeall()
+
+
+def get_pool(branch=None):
+    """Return the process-wide pool for a branch, creating it on first use."""
+    branch = branch or current_branch()
+    pool = _pools.get(branch)
+    if pool is not None:
+        return pool
+
+    # Connect outside the lock so one slow or unreachable host doesn't hold up pools for other branches
+    pool = BranchPool(
+        branch,
+        minconn=_db_setting("pool_min", POOL_MIN_CONN),
+        maxconn=_db_setting("pool_max", POOL_MAX_CONN),
+        timeout=_db_setting("pool_timeout", POOL_CHECKOUT_TIMEOUT),
+        cursor_factory=InstrumentedCursor,  # ✅ Every query is timed for the profiling panel
+        **_connection_params(branch),
+    )
+    with _pools_lock:
+        existing = _pools.setdefault(branch, pool)
+    if existing is not pool:  # Another thread got there first
+        pool.closeall()
+    return existing
+
+
+@contextmanager
+def db_connection(branch=None):
+    """Check out a pooled connection for a branch and always return it to the pool.
+
+    The transaction is rolled back if the block raises; callers commit explicitly.
+    """
+    pool = get_pool(branch)
+    conn = pool.getconn()
+    try:
+        timeout = getattr(_limits, "statement_timeout", None)
+        if timeout:
+            with conn.cursor() as cur:  # SET LOCAL ends with the transaction: the pool gets the connection back without it
+                cur.execute("SET LOCAL statement_timeout = %s", (int(timeout * 1000),))
+        yield conn
+    except Exception:
+        if not conn.closed:
+            conn.rollback()
+        raise
+    finally:
+        pool.putconn(conn)
+
+
+@contextmanager
+def statement_timeout(seconds):
+    """Cancel any query that runs longer than `seconds` on connections this thread takes from db_connection()."""
+    previous = getattr(_limits, "statement_timeout", None)
+    _limits.statement_timeout = seconds
+    try:
+        yield
+    finally:
+        _limits.statement_timeout = previous
+
+
+def _checkout(branch):
+    pool = get_pool(branch)
+    conn = pool.getconn()
+    _checked_out[id(conn)] = pool
+    return conn
+
+
+def release_connection(conn):
+    """Return a connection obtained from `get_db_connection()` / `get_main_db_connection()`."""
+    if conn is None:
+        return
+    pool = _checked_out.pop(id(conn), None)
+    if pool is not None:  # Releasing twice is a no-op
+        pool.putconn(conn)
+
+
+def pool_stats():
+    """Snapshot of usage counters for every open branch pool."""
+    return {
+        branch: {**pool.stats, "max_size": pool.maxconn, "idle": len(pool._pool._pool)}
+        for branch, pool in list(_pools.items())
+    }
+
+
+def close_all_pools():
+    """Close every pooled connection and dispose cached engines (e.g. on shutdown)."""
+    with _pools_lock:
+        for pool in _pools.values():
+            pool.closeall()
+        _pools.clear()
+        for engine in _engines.values():
+            engine.dispose()
+        _engines.clear()
+
+
+def get_sqlalchemy_engine(branch=None):
+    """Returns a SQLAlchemy engine for connecting to the correct PostgreSQL branch."""
+
+    branch = branch or current_branch()
+    if branch not in st.secrets["database"]["hosts"]:
+        branch = "main"
+
+    engine = _engines.get(branch)
+    if engine is None:
+        with _pools_lock:
+            if branch not in _engines:
+                from sqlalchemy import create_engine  # Imported on first use: it is slow to import and rarely needed
+
+                params = _connection_params(branch)
+
+                # ✅ Construct the database URL dynamically
+                db_url = f"postgresql://{params['user']}:{params['password']}@{params['host']}/{params['dbname']}"
+                _engines[branch] = create_engine(
+                    db_url,
+                    pool_pre_ping=True,
+                    pool_size=_db_setting("pool_max", POOL_MAX_CONN),
+                )
+            engine = _engines[branch]
+    return engine
+
+
+def get_db_connection(branch=None):
+    """Check out a pooled connection for the user's assigned branch.
+
+    Hand it back with `release_connection(conn)`; prefer `db_connection()` where a `with` block fits.
+    """
+    try:
+        return _checkout(branch)
     except Exception as e:
         print(f"❌ Database connection failed: {e}")  # ✅ Log error instead of using `st.error()`
         return None  # Return None to be handled by the caller
 
-def get_branches():
-    """Fetch available branches from the database."""
-    conn = get_db_connection()
-    if not conn:
-        return ["main"]  # Fallback to 'main' if DB connection fails
 
+def get_branches(branch=None):
+    """Fetch available branches from the database."""
     try:
-        cur = conn.cursor()
-        cur.execute("SELECT branch_name FROM public.branches")  # Explicit schema
-        branches = [row[0] for row in cur.fetchall()]
-        return branches  # ✅ Return fetched branches
+        with db_connection(branch) as conn, conn.cursor() as cur:
+            cur.execute("SELECT branch_name FROM public.branches")  # Explicit schema
+            return [row[0] for row in cur.fetchall()]  # ✅ Return fetched branches
     except Exception as e:
         print(f"❌ Failed to fetch branches: {e}")  # ✅ Log error instead of `st.error()`
-        return ["main"]
-    finally:
-        if cur:
-            cur.close()
-        if conn:
-            conn.close()  # ✅ Ensure connection is always closed
-            
+        return ["main"]  # Fallback to 'main' if DB connection fails
+
+
 def get_main_db_connection():
-    """Ensures connection to the main branch for authentication tasks."""
+    """Ensures a pooled connection to the main branch for authentication tasks."""
     try:
-        db_host = st.secrets["database"]["hosts"]["main"]
-        db_password = st.secrets["branch_passwords"]["main"]
-        db_user = st.secrets["database"]["user"]
-        db_name = st.secrets["database"]["database"]
-
-        conn = psycopg2.connect(
-            dbname=db_name,
-            user=db_user,
-            password=db_password,
-            host=db_host,
-            port=5432
-        )
-        return conn
+        return _checkout("main")
     except Exception as e:
         print(f"❌ Authentication DB connection failed: {e}")
         return None
-
@@ -0,0 +1,161 @@
+import hashlib
+import json
+import threading
+import uuid
+import zlib
+
+import streamlit as st
+
+from cache import TTLCache
+from db import current_branch, db_connection
+from schedule_model import ScheduleModel
+
+DRAFT_NAME = "working"
+DRAFT_CACHE_SIZE = 64  # Drafts kept in memory per app process
+DRAFT_IDLE_SECONDS = 1800  # A draft nobody touched for this long leaves memory; it is reloaded on the next access
+DRAFT_RETENTION_DAYS = 30  # Drafts not saved for this long are deleted
+
+DRAFT_DIGEST = "SELECT digest FROM schedule_drafts WHERE owner = %s AND name = %s"
+DRAFT_SELECT = "SELECT data, digest FROM schedule_drafts WHERE owner = %s AND name = %s"
+DRAFT_UPSERT = """
+    INSERT INTO schedule_drafts (owner, name, data, digest, updated_at)
+    VALUES (%s, %s, %s, %s, NOW())
+    ON CONFLICT (owner, name) DO UPDATE
+    SET data = EXCLUDED.data, digest = EXCLUDED.digest, updated_at = NOW()
+"""
+DRAFT_DELETE = "DELETE FROM schedule_drafts WHERE owner = %s AND name = %s"
+STALE_DRAFTS_DELETE = "DELETE FROM schedule_drafts WHERE updated_at < NOW() - %s * INTERVAL '1 day'"
+
+# (branch, owner, name) -> [ScheduleModel, digest of the copy in the database, model revision it was taken at]
+_resident = TTLCache(maxsize=DRAFT_CACHE_SIZE, ttl=DRAFT_IDLE_SECONDS)
+_draft_locks = {}  # (branch, owner, name) -> RLock held while the draft is opened, written or discarded
+_draft_locks_lock = threading.Lock()
+
+
+def _draft_lock(key):
+    with _draft_locks_lock:
+        return _draft_locks.setdefault(key, threading.RLock())
+
+
+def encode(schedule):
+    """Compact serialized form of a ScheduleModel: zlib-compressed JSON."""
+    return zlib.compress(json.dumps(schedule.to_state(), separators=(",", ":")).encode(), 6)
+
+
+def decode(data):
+    return ScheduleModel.from_state(json.loads(zlib.decompress(data)))
+
+
+def _digest(data):
+    return hashlib.blake2b(data, digest_size=16).hexdigest()
+
+
+def draft_key(name=DRAFT_NAME):
+    """Where this session's draft lives: its branch, its user (or a per-session ID) and a draft name.
+
+    One draft per user is intended: every session of a username on a worker (e.g. two tabs) gets
+    the same ScheduleModel, so their edits land in one draft in the order their reruns apply them.
+    """
+    owner = st.session_state.get("username") or st.session_state.setdefault("draft_owner", f"session-{uuid.uuid4().hex}")
+    return current_branch(), owner, name
+
+
+def _fetch(branch, query, owner, name):
+    with db_connection(branch) as conn, conn.cursor() as cur:
+        cur.execute(query, (owner, name))
+        return cur.fetchone()
+
+
+def open_draft(name=DRAFT_NAME):
+    """The session's working schedule: from memory if it is current, else rehydrated from the branch
+    database (after a restart, or when another worker saved a newer copy), else a new one.
+
+    Raises if the database can't be read, rather than starting an empty draft that would
+    overwrite the stored one on the next autosave.
+    """
+    return _open(draft_key(name))
+
+
+def _open(key):
+    branch, owner, name = key
+    with _draft_lock(key):  # Sessions sharing the draft all get the same model
+        entry = _resident.get(key)
+        stored = _fetch(branch, DRAFT_DIGEST, owner, name)
+
+        # A copy that never reached the database (entry[1] is None) is newer than anything stored
+        if entry is None or (entry[1] is not None and stored is not None and stored[0] != entry[1]):
+            row = _fetch(branch, DRAFT_SELECT, owner, name) if stored is not None else None
+            if row is not None:
+                schedule = decode(bytes(row[0]))
+                entry = [schedule, row[1], schedule.revision]
+            elif entry is None:
+                entry = [ScheduleModel(), None, None]
+        _resident.set(key, entry)  # ✅ Touched: restarts its idle timer
+        return entry[0]
+
+
+def _write(branch, *statements):
+    try:
+        with db_connection(branch) as conn:
+            with conn:
+                with conn.cursor() as cur:
+                    for query, params in statements:
+                        cur.execute(query, params)
+        return True
+    except Exception as e:
+        print(f"❌ Draft write failed ({branch}): {e}")
+        return False
+
+
+def autosave_draft(schedule, name=DRAFT_NAME):
+    """Write the draft to the branch database if it changed since it was last written; returns True if it did."""
+    return _autosave(draft_key(name), schedule)
+
+
+def _autosave(key, schedule):
+    branch, owner, name = key
+    with _draft_lock(key):  # One writer per draft: the digest and revision recorded match what was written
+        entry = _resident.get(key)
+        if entry is not None and entry[0] is schedule and entry[1] is not None and entry[2] == schedule.revision:
+            return False  # ✅ Nothing changed: no need to even serialize
+        data = encode(schedule)
+        digest = _digest(data)
+        if entry is not None and entry[0] is schedule and entry[1] == digest:
+            entry[2] = schedule.revision
+            return False
+
+        written = _write(branch, (DRAFT_UPSERT, (owner, name, data, digest)))
+        _resident.set(key, [schedule, digest if written else None, schedule.revision])
+        return written
+
+
+def replace_draft(schedule, name=DRAFT_NAME):
+    """Make `schedule` the session's working draft, written through to the database straight away."""
+    autosave_draft(schedule, name)
+
+
+def mark_draft_saved(key, versions, rows):
+    """Apply a committed save (see ScheduleModel.mark_saved) to the draft at `key`, a `draft_key()`
+    taken when the save was started, and write it through.
+
+    Runs on the save's worker thread, so the draft is updated even if the session that started the
+    save has gone (e.g. the browser was refreshed).
+    """
+    with _draft_lock(key):
+        schedule = _open(key)
+        schedule.mark_saved(versions, rows)
+        _autosave(key, schedule)
+
+
+def discard_draft(name=DRAFT_NAME):
+    """Start over: the session's draft is emptied in memory and deleted from the database."""
+    key = draft_key(name)
+    branch, owner, name = key
+    with _draft_lock(key):
+        _write(branch, (DRAFT_DELETE, (owner, name)))
+        _resident.set(key, [ScheduleModel(), None, None])
+
+
+def purge_stale_drafts(branch):
+    """Delete the branch's drafts nobody saved for DRAFT_RETENTION_DAYS; run once per process by warmup."""
+    return _write(branch, (STALE_DRAFTS_DELETE, (DRAFT_RETENTION_DAYS,)))
@@ -0,0 +1,187 @@
+"""Stream production_plan / plan_instance rows to CSV or Parquet in fixed-size chunks.
+
+Usage: python export.py plan_instance --branch main --from 2024-01-01 --to 2024-12-31 --format parquet --output plan.parquet
+"""
+import argparse
+import csv
+import io
+from datetime import date, datetime
+from decimal import Decimal
+
+from psycopg2 import sql
+
+from db import db_connection
+
+try:  # Parquet output is optional
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:
+    pa = pq = None
+
+EXPORT_CHUNK_SIZE = 5000  # Rows per round trip and per Parquet row group
+
+# Exportable tables and the column their date filter applies to
+EXPORT_TABLES = {
+    "production_plan": "planned_start_datetime",
+    "plan_instance": "date",
+}
+
+COLUMNS_QUERY = """
+    SELECT column_name FROM information_schema.columns
+    WHERE table_schema = 'public' AND table_name = %s
+    ORDER BY ordinal_position
+"""
+
+
+def table_columns(table, branch=None):
+    """Columns of an exportable table, in table order."""
+    if table not in EXPORT_TABLES:
+        raise ValueError(f"Unknown export table: {table}")
+    with db_connection(branch) as conn, conn.cursor() as cur:
+        cur.execute(COLUMNS_QUERY, (table,))
+        return [row[0] for row in cur.fetchall()]
+
+
+def _export_query(table, columns, start, end):
+    date_column = sql.Identifier(EXPORT_TABLES[table])
+    conditions, params = [], []
+    if start is not None:
+        conditions.append(sql.SQL("{} >= %s::date").format(date_column))
+        params.append(start)
+    if end is not None:
+        conditions.append(sql.SQL("{} < %s::date + 1").format(date_column))
+        params.append(end)
+
+    query = sql.SQL("SELECT {columns} FROM {table}").format(
+        columns=sql.SQL(", ").join(sql.Identifier(column) for column in columns),
+        table=sql.Identifier(table),
+    )
+    if conditions:
+        query += sql.SQL(" WHERE ") + sql.SQL(" AND ").join(conditions)
+    return query + sql.SQL(" ORDER BY {}").format(date_column), params
+
+
+def export_chunks(table, columns=None, start=None, end=None, branches=None, chunk_size=EXPORT_CHUNK_SIZE):
+    """Column names, and a generator of row lists of at most `chunk_size` read through a server-side cursor.
+
+    Columns default to the whole table; `start`/`end` filter on the table's date column in SQL.
+    With several `branches`, their rows follow one another behind a leading `branch` column.
+    """
+    branches = list(branches or [None])
+    all_columns = table_columns(table, branches[0])
+    columns = list(columns or all_columns)
+    unknown = [column for column in columns if column not in all_columns]
+    if unknown:
+        raise ValueError(f"Unknown {table} columns: {', '.join(unknown)}")
+
+    query, params = _export_query(table, columns, start, end)
+    tag_branch = len(branches) > 1
+
+    def chunks():
+        for branch in branches:
+            with db_connection(branch) as conn:
+                with conn.cursor(name=f"export_{table}") as cur:  # ✅ Rows stay on the server until fetched
+                    cur.itersize = chunk_size
+                    cur.execute(query, params)
+                    while True:
+                        rows = cur.fetchmany(chunk_size)
+                        if not rows:
+                            break
+                        yield [(branch, *row) for row in rows] if tag_branch else rows
+
+    return (["branch"] if tag_branch else []) + columns, chunks()
+
+
+def _csv_text(rows):
+    buffer = io.StringIO()
+    csv.writer(buffer).writerows(rows)
+    return buffer.getvalue()
+
+
+def iter_csv(names, chunks):
+    """CSV text for `export_chunks()` output: the header, then one piece per chunk."""
+    yield _csv_text([names])
+    for rows in chunks:
+        yield _csv_text(rows)
+
+
+def write_csv(target, table, columns=None, start=None, end=None, branches=None, chunk_size=EXPORT_CHUNK_SIZE):
+    """Write CSV to a text file object; returns the number of data rows."""
+    names, chunks = export_chunks(table, columns, start, end, branches, chunk_size)
+    target.write(_csv_text([names]))
+    count = 0
+    for rows in chunks:
+        target.write(_csv_text(rows))
+        count += len(rows)
+    return count
+
+
+def _arrow_value(value):
+    return float(value) if isinstance(value, Decimal) else value
+
+
+def _arrow_type(values):
+    # First non-null value decides; PostgreSQL NUMERIC comes out as float64
+    sample = next((value for value in values if value is not None), None)
+    if isinstance(sample, bool):
+        return pa.bool_()
+    if isinstance(sample, int):
+        return pa.int64()
+    if isinstance(sample, (float, Decimal)):
+        return pa.float64()
+    if isinstance(sample, datetime):
+        return pa.timestamp("us", tz=sample.tzinfo and "UTC")
+    if isinstance(sample, date):
+        return pa.date32()
+    return pa.string()
+
+
+def write_parquet(target, table, columns=None, start=None, end=None, branches=None, chunk_size=EXPORT_CHUNK_SIZE):
+    """Write Parquet to a path or binary file object, one row group per chunk; returns the row count."""
+    if pa is None:
+        raise RuntimeError("Parquet export needs pyarrow (pip install pyarrow)")
+
+    names, chunks = export_chunks(table, columns, start, end, branches, chunk_size)
+    writer, count = None, 0
+    try:
+        for rows in chunks:
+            values = [[_arrow_value(value) for value in column] for column in zip(*rows)]
+            if writer is None:
+                # Types come from the first chunk; columns that are all-null there are exported as text
+                schema = pa.schema([(name, _arrow_type(column)) for name, column in zip(names, values)])
+                writer = pq.ParquetWriter(target, schema)
+            arrays = [
+                pa.array([str(value) if value is not None else None for value in column], type=field.type)
+                if pa.types.is_string(field.type) else pa.array(column, type=field.type)
+                for field, column in zip(schema, values)
+            ]
+            writer.write_table(pa.Table.from_arrays(arrays, schema=schema))
+            count += len(rows)
+    finally:
+        if writer is not None:
+            writer.close()
+
+    if writer is None:  # No rows: still a readable file with the selected columns
+        pq.write_table(pa.table({name: pa.array([], type=pa.string()) for name in names}), target)
+    return count
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("table", choices=EXPORT_TABLES)
+    parser.add_argument("--branch", action="append", dest="branches", help="Repeat for several branches (default: main)")
+    parser.add_argument("--columns", help="Comma-separated column names (default: all)")
+    parser.add_argument("--from", dest="start", type=date.fromisoformat)
+    parser.add_argument("--to", dest="end", type=date.fromisoformat)
+    parser.add_argument("--format", choices=["csv", "parquet"], default="csv")
+    parser.add_argument("--output", required=True)
+    args = parser.parse_args()
+
+    columns = args.columns.split(",") if args.columns else None
+    branches = args.branches or ["main"]
+    if args.format == "csv":
+        with open(args.output, "w", newline="") as target:
+            rows = write_csv(target, args.table, columns, args.start, args.end, branches)
+    else:
+        rows = write_parquet(args.output, args.table, columns, args.start, args.end, branches)
+    print(f"✅ Exported {rows} rows to {args.output}")
@@ -0,0 +1,67 @@
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+import pandas as pd
+import streamlit as st
+
+from db import statement_timeout
+
+FANOUT_WORKERS = 16  # Branch reads in flight at once, across every session
+FANOUT_TIMEOUT = 15  # seconds a branch's read may run before it is cancelled and reported as timed out
+FANOUT_POLL = 0.5  # seconds between checks for reads that have started or run over
+
+_executor = ThreadPoolExecutor(max_workers=FANOUT_WORKERS, thread_name_prefix="fanout")
+
+
+def all_branches():
+    """Every branch with a host configured in secrets."""
+    return list(st.secrets["database"]["hosts"].keys())
+
+
+def _timed_read(read, branch, started, timeout):
+    started[branch] = time.perf_counter()
+    with statement_timeout(timeout):  # ✅ A hung read gives its worker and pooled connection back
+        frame = read(branch)
+    return frame, time.perf_counter() - started[branch]
+
+
+def fan_out(read, branches=None, timeout=FANOUT_TIMEOUT):
+    """Run `read(branch) -> DataFrame` against every branch concurrently.
+
+    Returns (frame, status): `frame` is the results of the branches that answered, stacked with
+    a leading `branch` column; `status` has one row per branch (branch, ok, rows, seconds, error).
+    A branch that fails, or whose read runs longer than `timeout` from when it started, is reported
+    in `status` and left out of `frame`; time spent queued behind other sessions' reads doesn't
+    count. Its queries are cancelled with a statement timeout. The overview takes about as long as
+    the slowest branch, never the sum of them.
+    """
+    branches = list(branches or all_branches())
+    started = {}  # branch -> when its read began on a worker
+    futures = {_executor.submit(_timed_read, read, branch, started, timeout): branch for branch in branches}
+    pending, timed_out = set(futures), set()
+    while pending:
+        now = time.perf_counter()
+        overdue = {future for future in pending if futures[future] in started and now - started[futures[future]] >= timeout}
+        timed_out |= overdue
+        pending -= overdue
+        if pending:
+            running = [started[futures[future]] for future in pending if futures[future] in started]
+            next_deadline = min(running) + timeout - now if running else FANOUT_POLL
+            _, pending = wait(pending, timeout=max(min(next_deadline, FANOUT_POLL), 0.01), return_when=FIRST_COMPLETED)
+
+    frames, status = [], []
+    for future, branch in futures.items():
+        if future in timed_out:
+            status.append({"branch": branch, "ok": False, "rows": 0, "seconds": timeout, "error": f"Timed out after {timeout}s"})
+            continue
+        try:
+            frame, seconds = future.result()
+        except Exception as e:
+            print(f"❌ Fan-out read failed on {branch}: {e}")  # ✅ One bad branch doesn't sink the overview
+            status.append({"branch": branch, "ok": False, "rows": 0, "seconds": None, "error": str(e)})
+            continue
+        frames.append(frame.assign(branch=branch)[["branch", *frame.columns.drop("branch", errors="ignore")]])
+        status.append({"branch": branch, "ok": True, "rows": len(frame), "seconds": round(seconds, 3), "error": None})
+
+    merged = pd.concat(frames, ignore_index=True) if frames else pd.DataFrame(columns=["branch"])
+    return merged, pd.DataFrame(status, columns=["branch", "ok", "rows", "seconds", "error"])
@@ -0,0 +1,153 @@
+import json
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+
+import psycopg2.extensions
+import streamlit as st
+
+MAX_RECORDS = 5000  # Per log; oldest entries are dropped first
+QUERY_TEXT_LIMIT = 300  # Characters of SQL kept per record
+
+_queries = deque(maxlen=MAX_RECORDS)
+_phases = deque(maxlen=MAX_RECORDS)
+_local = threading.local()  # Page and rerun start for the script thread
+
+
+def _slow_query_ms():
+    try:
+        return st.secrets.get("profiling", {}).get("slow_query_ms")
+    except Exception:  # No secrets file (e.g. scripts)
+        return None
+
+
+def current_page():
+    return getattr(_local, "page", None) or "background"
+
+
+class InstrumentedCursor(psycopg2.extensions.cursor):
+    """Cursor that records latency and row counts of every statement it runs."""
+
+    def execute(self, query, vars=None):
+        started = time.perf_counter()
+        try:
+            return super().execute(query, vars)
+        finally:
+            _record_query(query, time.perf_counter() - started, self.rowcount)
+
+    def executemany(self, query, vars_list):
+        started = time.perf_counter()
+        try:
+            return super().executemany(query, vars_list)
+        finally:
+            _record_query(query, time.perf_counter() - started, self.rowcount)
+
+
+def _record_query(query, seconds, rows):
+    text = query.decode(errors="replace") if isinstance(query, bytes) else str(query)
+    text = " ".join(text.split())[:QUERY_TEXT_LIMIT]
+    _queries.append({
+        "ts": time.time(),
+        "page": current_page(),
+        "query": text,
+        "ms": round(seconds * 1000, 2),
+        "rows": rows,
+    })
+
+    threshold = _slow_query_ms()
+    if threshold is not None and seconds * 1000 >= threshold:
+        print(f"🐢 Slow query ({seconds * 1000:.0f} ms, page={current_page()}): {text}")
+
+
+def start_rerun(page):
+    """Mark the start of a script rerun; queries and phases on this thread are attributed to `page`."""
+    _local.page = page
+    _local.rerun_started = time.perf_counter()
+
+
+def finish_rerun():
+    """Record total rerun time (skipped when the script stopped early)."""
+    started = getattr(_local, "rerun_started", None)
+    if started is not None:
+        _record_phase("rerun", time.perf_counter() - started)
+        _local.rerun_started = None
+
+
+@contextmanager
+def phase(name):
+    """Time one section of a script rerun."""
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        _record_phase(name, time.perf_counter() - started)
+
+
+def _record_phase(name, seconds):
+    _phases.append({"ts": time.time(), "page": current_page(), "phase": name, "ms": round(seconds * 1000, 2)})
+
+
+def query_log():
+    import pandas as pd  # Only the profiling panel needs it; keeps it off the login page's import path
+
+    return pd.DataFrame(list(_queries), columns=["ts", "page", "query", "ms", "rows"])
+
+
+def phase_log():
+    import pandas as pd
+
+    return pd.DataFrame(list(_phases), columns=["ts", "page", "phase", "ms"])
+
+
+def query_summary():
+    """Per-query totals, slowest first."""
+    log = query_log()
+    if log.empty:
+        return log
+    return (
+        log.groupby(["page", "query"])
+        .agg(calls=("ms", "size"), total_ms=("ms", "sum"), mean_ms=("ms", "mean"),
+             p95_ms=("ms", lambda ms: ms.quantile(0.95)), rows=("rows", "sum"))
+        .sort_values("total_ms", ascending=False)
+        .reset_index()
+    )
+
+
+def phase_summary():
+    log = phase_log()
+    if log.empty:
+        return log
+    return (
+        log.groupby(["page", "phase"])
+        .agg(runs=("ms", "size"), mean_ms=("ms", "mean"), p95_ms=("ms", lambda ms: ms.quantile(0.95)), max_ms=("ms", "max"))
+        .sort_values("mean_ms", ascending=False)
+        .reset_index()
+    )
+
+
+def render_profiling_panel():
+    """Admin-only sidebar panel with query and rerun timings."""
+    if st.session_state.get("role") != "admin":
+        return
+
+    from auth import login_metrics  # Imported lazily: auth imports db, which imports this module
+    from db import pool_stats
+
+    with st.sidebar.expander("⏱ Profiling"):
+        st.write("**Slowest queries**")
+        st.dataframe(query_summary().head(20), hide_index=True)
+        st.write("**Rerun phases**")
+        st.dataframe(phase_summary(), hide_index=True)
+        st.write("**Connection pools**")
+        st.json(pool_stats())
+        st.write("**Logins**")
+        st.json(login_metrics())
+
+        export = {"queries": query_log().to_dict("records"), "phases": phase_log().to_dict("records")}
+        st.download_button("Export JSON", json.dumps(export, default=str), "profile.json", "application/json")
+        st.download_button("Export queries CSV", query_log().to_csv(index=False), "queries.csv", "text/csv")
+        st.download_button("Export phases CSV", phase_log().to_csv(index=False), "phases.csv", "text/csv")
+        if st.button("Clear profile"):
+            _queries.clear()
+            _phases.clear()
@@ -0,0 +1,141 @@
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+
+import streamlit as st
+
+from db import current_branch, db_connection
+
+JOB_WORKERS = 4  # Saves and scheduling runs in flight at once, across every session
+JOB_POLL_SECONDS = 1  # How often the status panel refreshes while a job is running
+JOB_RETENTION = 3600  # seconds a finished job is kept for lookups by ID
+JOB_NOTICE_SECONDS = 600  # seconds a finished job stays in the status panel
+
+_executor = ThreadPoolExecutor(max_workers=JOB_WORKERS, thread_name_prefix="jobs")
+_jobs = {}
+_jobs_lock = threading.Lock()
+
+
+@dataclass
+class Job:
+    """A piece of background work, shared between the worker running it and the pages polling it."""
+    id: str
+    name: str
+    branch: str
+    owner: str = None
+    transactional: bool = False
+    status: str = "queued"  # queued, running, done, failed
+    progress: float = 0.0
+    message: str = ""
+    result: object = None
+    error: str = None
+    submitted: float = field(default_factory=time.time)
+    started: float = None
+    finished: float = None
+
+    @property
+    def done(self):
+        return self.status in ("done", "failed")
+
+    def report(self, progress, message=None):
+        """Called by the job function: fraction done (0-1) and an optional status line."""
+        self.progress = min(max(float(progress), 0.0), 1.0)
+        if message is not None:
+            self.message = message
+
+
+def _run(job, fn, args, kwargs):
+    job.status, job.started = "running", time.time()
+    try:
+        if job.transactional:
+            with db_connection(job.branch) as conn:  # ✅ Rolls back whatever `fn` left uncommitted
+                result = fn(job, conn, *args, **kwargs)
+        else:
+            result = fn(job, *args, **kwargs)
+    except Exception as e:
+        print(f"❌ Job {job.name} ({job.id}) failed: {e}")
+        job.error, job.finished = str(e), time.time()
+        job.status = "failed"
+        return
+    job.result, job.progress, job.finished = result, 1.0, time.time()
+    job.status = "done"  # Last, so pollers never see a finished job without its result
+
+
+def _prune():
+    cutoff = time.time() - JOB_RETENTION
+    for job_id in [job_id for job_id, job in _jobs.items() if job.done and job.finished < cutoff]:
+        del _jobs[job_id]
+
+
+def submit(name, fn, *args, transactional=False, branch=None, **kwargs):
+    """Run `fn(job, *args, **kwargs)` on the worker pool and track it for this session; returns the Job.
+
+    With `transactional`, `fn(job, conn, *args, **kwargs)` gets a pooled connection for the
+    branch. `fn` owns the transaction (e.g. `with conn:` around its writes); anything it leaves
+    uncommitted, or that is open when it raises, is rolled back.
+    The job keeps running if the user navigates away or refreshes the page.
+    """
+    job = Job(id=uuid.uuid4().hex[:12], name=name, branch=branch or current_branch(),
+              owner=st.session_state.get("username"), transactional=transactional)
+    with _jobs_lock:
+        _prune()
+        _jobs[job.id] = job
+    _executor.submit(_run, job, fn, args, kwargs)
+    st.session_state.setdefault("jobs", []).append(job.id)
+    return job
+
+
+def get_job(job_id):
+    """A job by ID, or None once it has been pruned."""
+    return _jobs.get(job_id)
+
+
+def session_jobs(name=None):
+    """This session's jobs whose results haven't been picked up yet, optionally only those called `name`."""
+    jobs = [job for job in map(get_job, st.session_state.get("jobs", [])) if job is not None]
+    return [job for job in jobs if name is None or job.name == name]
+
+
+def recent_jobs(owner, limit=5):
+    """The owner's latest jobs, newest first (also those started before a page refresh)."""
+    jobs = [job for job in list(_jobs.values()) if owner is not None and job.owner == owner]
+    return sorted(jobs, key=lambda job: job.submitted, reverse=True)[:limit]
+
+
+def _job_panel(handlers):
+    finished = [job for job in session_jobs() if job.done]
+    if finished:
+        order = list(handlers)
+        finished.sort(key=lambda job: order.index(job.name) if job.name in order else -1)
+        for job in finished:
+            try:
+                if job.status == "done" and job.name in handlers:
+                    handlers[job.name](job)  # ✅ Results are applied once, on the session's own script thread
+            finally:
+                # Only this job is marked picked up: if its handler reruns the script, the rest are applied next run
+                st.session_state.jobs.remove(job.id)
+        st.rerun(scope="app")
+
+    for job in recent_jobs(st.session_state.get("username")) or session_jobs():
+        if job.done and job.finished < time.time() - JOB_NOTICE_SECONDS:
+            continue
+        if not job.done:
+            st.progress(job.progress, text=f"⏳ {job.name}: {job.message or job.status}")
+        elif job.status == "failed":
+            st.error(f"❌ {job.name} failed{' and was rolled back' if job.transactional else ''}: {job.error}")
+        else:
+            st.caption(f"✅ {job.name} finished{': ' + job.message if job.message else ''} "
+                       f"({time.strftime('%H:%M:%S', time.localtime(job.finished))})")
+
+
+def job_status(handlers=None):
+    """Status panel for background jobs; polls while any of this session's jobs is still running.
+
+    `handlers` maps a job name to a function called with the Job once it completes successfully,
+    e.g. to apply a save result to the working schedule. Jobs finishing together are handled in
+    the order of `handlers`, so put any handler that reruns the script last.
+    """
+    running = any(not job.done for job in session_jobs())
+    st.fragment(_job_panel, run_every=JOB_POLL_SECONDS if running else None)(handlers or {})
@@ -0,0 +1,74 @@
+"""Apply pending SQL migrations in migrations/ to one or more branch databases.
+
+Usage: python migrate.py [branch ...]   (defaults to every branch in secrets)
+"""
+import sys
+from pathlib import Path
+
+import streamlit as st
+
+from backlog import verify_indexes
+from db import db_connection
+
+MIGRATIONS_DIR = Path(__file__).parent / "migrations"
+NO_TRANSACTION = "-- migrate: no-transaction"  # First line of files that can't run in a transaction (CREATE INDEX CONCURRENTLY)
+
+
+def pending_migrations(conn):
+    """Migration files not yet recorded in schema_migrations, in name order."""
+    with conn.cursor() as cur:
+        cur.execute("""
+            CREATE TABLE IF NOT EXISTS schema_migrations (
+                name TEXT PRIMARY KEY,
+                applied_at TIMESTAMPTZ NOT NULL DEFAULT NOW()
+            )
+        """)
+        cur.execute("SELECT name FROM schema_migrations")
+        applied = {row[0] for row in cur.fetchall()}
+    conn.commit()
+    return [path for path in sorted(MIGRATIONS_DIR.glob("*.sql")) if path.name not in applied]
+
+
+def _apply_without_transaction(conn, sql):
+    """Run a migration statement by statement in autocommit mode; each statement must be safe to re-run."""
+    code = "\n".join(line for line in sql.splitlines() if not line.strip().startswith("--"))
+    conn.autocommit = True
+    try:
+        with conn.cursor() as cur:
+            for statement in filter(None, (statement.strip() for statement in code.split(";"))):
+                cur.execute(statement)
+    finally:
+        conn.autocommit = False
+
+
+def apply_migrations(branch):
+    """Apply each pending migration in its own transaction; returns the names applied.
+
+    Files starting with NO_TRANSACTION run one statement at a time instead and are only
+    recorded once every statement succeeded.
+    """
+    applied = []
+    with db_connection(branch) as conn:
+        for path in pending_migrations(conn):
+            sql = path.read_text()
+            if sql.startswith(NO_TRANSACTION):
+                _apply_without_transaction(conn, sql)
+                with conn:
+                    with conn.cursor() as cur:
+                        cur.execute("INSERT INTO schema_migrations (name) VALUES (%s)", (path.name,))
+            else:
+                with conn:  # ✅ A failing migration leaves nothing half-applied
+                    with conn.cursor() as cur:
+                        cur.execute(sql)
+                        cur.execute("INSERT INTO schema_migrations (name) VALUES (%s)", (path.name,))
+            applied.append(path.name)
+    return applied
+
+
+if __name__ == "__main__":
+    branches = sys.argv[1:] or list(st.secrets["database"]["hosts"].keys())
+    for branch in branches:
+        names = apply_migrations(branch)
+        print(f"✅ {branch}: {', '.join(names) if names else 'up to date'}")
+        if missing := verify_indexes(branch):
+            print(f"❌ {branch}: missing or invalid indexes: {', '.join(missing)}")
@@ -0,0 +1,28 @@
+-- Store schedule cells as plain values instead of pre-rendered HTML.
+--   shift            shift code (LD, NS, ND, ELD)
+--   batch_info       JSON object {"<product> - <batch_number>": percent, ...}
+--   allocated_hours  hours of batch work allocated to the day
+--   utilization      allocated hours as % of effective capacity (shift hours minus downtime);
+--                    values converted from the old HTML column below are % of shift hours
+--   downtime_type / downtime_hours replace the HTML `downtime` column, which is kept
+--   for old rows but no longer written.
+
+ALTER TABLE plan_instance
+    ADD COLUMN IF NOT EXISTS allocated_hours NUMERIC(8, 2),
+    ADD COLUMN IF NOT EXISTS downtime_type TEXT,
+    ADD COLUMN IF NOT EXISTS downtime_hours NUMERIC(5, 2) NOT NULL DEFAULT 0;
+
+-- Backfill from the legacy HTML strings, e.g. "<span ...>Cleaning (2.5 hrs)</span>"
+UPDATE plan_instance
+SET downtime_type = NULLIF(substring(regexp_replace(downtime, '<[^>]*>', '', 'g') FROM '^(.*?) \('), ''),
+    downtime_hours = COALESCE(substring(downtime FROM '\(([0-9.]+) hrs\)')::NUMERIC, 0)
+WHERE downtime IS NOT NULL AND downtime <> '';
+
+ALTER TABLE plan_instance ALTER COLUMN downtime DROP NOT NULL;
+
+UPDATE plan_instance SET shift = regexp_replace(shift, '<[^>]*>', '', 'g') WHERE shift LIKE '%<%';
+
+-- "Util= 12.34%" -> 12.34
+ALTER TABLE plan_instance
+    ALTER COLUMN utilization TYPE NUMERIC(7, 2)
+    USING NULLIF(substring(utilization::TEXT FROM '([0-9]+(\.[0-9]+)?)'), '')::NUMERIC;
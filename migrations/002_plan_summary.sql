@@ -0,0 +1,35 @@
+-- Pre-aggregated schedule totals for the Reports page, kept up to date on every save
+-- (summary.update_summary) so dashboards never scan plan_instance.
+--   grain         'day', 'week' (starting Monday) or 'month'
+--   period_start  first day of the period
+--   days          saved machine-days in the group; shift mix = days per shift
+--   shift_hours   sum of shift durations; utilization (computed by reference_data.load_summary, not
+--                 stored) = allocated_hours / (shift_hours - downtime_hours), the effective capacity
+
+CREATE TABLE IF NOT EXISTS plan_summary (
+    grain TEXT NOT NULL CHECK (grain IN ('day', 'week', 'month')),
+    period_start DATE NOT NULL,
+    machine TEXT NOT NULL,
+    shift TEXT NOT NULL,
+    days INTEGER NOT NULL DEFAULT 0,
+    shift_hours NUMERIC(12, 2) NOT NULL DEFAULT 0,
+    allocated_hours NUMERIC(12, 2) NOT NULL DEFAULT 0,
+    downtime_hours NUMERIC(12, 2) NOT NULL DEFAULT 0,
+    PRIMARY KEY (grain, period_start, machine, shift)
+);
+
+-- Rows saved before 001 only have utilization, which was then a % of shift hours; derive their allocated hours from it
+UPDATE plan_instance
+SET allocated_hours = ROUND(utilization * CASE shift WHEN 'LD' THEN 11 WHEN 'NS' THEN 22 WHEN 'ND' THEN 9 WHEN 'ELD' THEN 15 ELSE 0 END / 100, 2)
+WHERE allocated_hours IS NULL AND utilization IS NOT NULL;
+
+-- Backfill from existing rows (same query as summary.rebuild_summary)
+DELETE FROM plan_summary;
+INSERT INTO plan_summary (grain, period_start, machine, shift, days, shift_hours, allocated_hours, downtime_hours)
+SELECT g.grain, date_trunc(g.grain, p.date)::date, p.machine, COALESCE(p.shift, ''),
+       COUNT(*),
+       SUM(CASE p.shift WHEN 'LD' THEN 11 WHEN 'NS' THEN 22 WHEN 'ND' THEN 9 WHEN 'ELD' THEN 15 ELSE 0 END),
+       COALESCE(SUM(p.allocated_hours), 0), COALESCE(SUM(p.downtime_hours), 0)
+FROM plan_instance p
+CROSS JOIN (VALUES ('day'), ('week'), ('month')) AS g (grain)
+GROUP BY 1, 2, 3, 4;
@@ -0,0 +1,6 @@
+-- Row versions for optimistic concurrency: a save only overwrites a cell if it is still at
+-- the version the planner loaded (bulk_write.bulk_upsert_plan_instance), and bumps it by one.
+
+ALTER TABLE plan_instance
+    ADD COLUMN IF NOT EXISTS version INTEGER NOT NULL DEFAULT 1,
+    ADD COLUMN IF NOT EXISTS updated_at TIMESTAMPTZ NOT NULL DEFAULT NOW();
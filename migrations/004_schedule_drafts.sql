@@ -0,0 +1,13 @@
+-- Working schedules as they are being edited (drafts.py), so planning survives restarts and
+-- moves between app workers. One row per user and draft name.
+--   data    zlib-compressed JSON of ScheduleModel.to_state()
+--   digest  hash of data; workers compare it to tell whether their in-memory copy is current
+
+CREATE TABLE IF NOT EXISTS schedule_drafts (
+    owner TEXT NOT NULL,
+    name TEXT NOT NULL DEFAULT 'working',
+    data BYTEA NOT NULL,
+    digest TEXT NOT NULL,
+    updated_at TIMESTAMPTZ NOT NULL DEFAULT NOW(),
+    PRIMARY KEY (owner, name)
+);
@@ -0,0 +1,13 @@
+-- migrate: no-transaction
+-- Indexes behind backlog.py. Built CONCURRENTLY so production_plan stays writable meanwhile,
+-- which can't run inside a transaction: migrate.py runs this file one statement at a time.
+--   production_plan_unscheduled_machine_idx  the backlog of a few machines (partial: unscheduled rows only)
+--   production_plan_batch_idx                already-planned checks on product + batch number
+-- A build that fails leaves an INVALID index behind; `IF NOT EXISTS` then skips it, so drop it
+-- (DROP INDEX CONCURRENTLY <name>) before re-running. `python migrate.py` warns about either case.
+
+CREATE INDEX CONCURRENTLY IF NOT EXISTS production_plan_unscheduled_machine_idx
+    ON production_plan (machine, id) WHERE schedule = FALSE;
+
+CREATE INDEX CONCURRENTLY IF NOT EXISTS production_plan_batch_idx
+    ON production_plan (product, batch_number, machine);
@@ -0,0 +1,58 @@
+import streamlit as st
+from datetime import datetime, timedelta
+from auth import check_authentication, check_access
+from fanout import FANOUT_TIMEOUT, all_branches, fan_out
+from reference_data import load_plan_instance, load_unscheduled_batches, load_utilization  # Cached per branch
+from instrumentation import start_rerun, finish_rerun, phase, render_profiling_panel
+
+start_rerun("Branch Overview")
+
+check_authentication()
+check_access(["admin"])
+
+st.title("Branch Overview")
+
+branches = st.multiselect("Branches", all_branches(), default=all_branches())
+view = st.radio("Show", ["Utilization", "Backlog", "Schedule"], horizontal=True)
+
+col1, col2, col3 = st.columns(3)
+with col1:
+    start_date = st.date_input("Start Date", datetime.today())
+with col2:
+    end_date = st.date_input("End Date", datetime.today() + timedelta(days=7))
+with col3:
+    timeout = st.number_input("Query timeout per branch (s)", min_value=1, max_value=120, value=FANOUT_TIMEOUT,
+                              help="A branch's read is cancelled once it has run this long; waiting for a free worker doesn't count")
+
+READS = {
+    "Utilization": lambda branch: load_utilization(start_date, end_date, branch=branch),
+    "Backlog": lambda branch: load_unscheduled_batches(branch=branch),
+    "Schedule": lambda branch: load_plan_instance(start_date, end_date, branch=branch),
+}
+
+if branches:
+    with phase(f"fan-out {view.lower()}"):
+        frame, status = fan_out(READS[view], branches, timeout=timeout)
+
+    failed = status[~status["ok"]]
+    if not failed.empty:
+        st.warning(f"⚠️ No data from {', '.join(failed['branch'])}; showing the branches that answered.")
+
+    if view == "Backlog" and not frame.empty:
+        # One row per branch × machine: the comparison managers asked for
+        summary = frame.groupby(["branch", "machine"], as_index=False).agg(batches=("id", "size"), hours=("time", "sum"))
+        st.dataframe(summary, hide_index=True)
+        with st.expander("All unscheduled batches"):
+            st.dataframe(frame, hide_index=True)
+    else:
+        st.dataframe(frame, hide_index=True)
+
+    st.download_button("Download CSV", frame.to_csv(index=False), f"{view.lower()}_all_branches.csv", "text/csv")
+
+    with st.expander("Branch status"):
+        st.dataframe(status, hide_index=True)
+else:
+    st.info("Select at least one branch.")
+
+render_profiling_panel()
+finish_rerun()
@@ -0,0 +1,60 @@
+import tempfile
+import streamlit as st
+from datetime import datetime, timedelta
+from auth import ROLE_ACCESS, check_authentication, check_access
+from db import current_branch
+from export import EXPORT_TABLES, export_chunks, iter_csv, pq, table_columns, write_parquet
+from instrumentation import start_rerun, finish_rerun, render_profiling_panel
+
+start_rerun("Extract Data")
+
+check_authentication()
+check_access([role for role, pages in ROLE_ACCESS.items() if "extract_data" in pages])
+
+st.title("Extract Data")
+
+table = st.selectbox("Table", list(EXPORT_TABLES))
+columns = table_columns(table, current_branch())
+selected_columns = st.multiselect("Columns", columns, default=columns)
+
+col1, col2 = st.columns(2)
+with col1:
+    start_date = st.date_input("From", datetime.today() - timedelta(days=30))
+with col2:
+    end_date = st.date_input("To", datetime.today())
+
+# Admins can pull several branches into one file; everyone else exports their own branch
+if st.session_state.get("role") == "admin":
+    branches = st.multiselect("Branches", list(st.secrets["database"]["hosts"]), default=[current_branch()])
+else:
+    branches = [current_branch()]
+
+formats = ["CSV", "Parquet"] if pq is not None else ["CSV"]
+file_format = st.radio("Format", formats, horizontal=True)
+
+def build_export(table, columns, start, end, branches, file_format):
+    """Stream the export into a temporary file; the database is read chunk by chunk."""
+    target = tempfile.TemporaryFile()
+    if file_format == "CSV":
+        for piece in iter_csv(*export_chunks(table, columns, start, end, branches)):
+            target.write(piece.encode())
+    else:
+        write_parquet(target, table, columns, start, end, branches)
+    target.seek(0)
+    return target
+
+if selected_columns and branches:
+    extension = "csv" if file_format == "CSV" else "parquet"
+    args = (table, selected_columns, start_date, end_date, branches, file_format)
+    st.download_button(
+        "Download",
+        data=lambda: build_export(*args),  # Runs only when clicked, off the script thread
+        file_name=f"{table}_{start_date}_{end_date}.{extension}",
+        mime="text/csv" if file_format == "CSV" else "application/vnd.apache.parquet",
+        on_click="ignore",
+    )
+else:
+    st.info("Select at least one column and branch.")
+
+render_profiling_panel()
+finish_rerun()
@@ -1,64 +1,183 @@
 import streamlit as st
 import pandas as pd
 from datetime import datetime, timedelta
-from db import get_db_connection  # Import database connection function
+from cache import invalidate
+from bulk_write import bulk_upsert_plan_instance
+from backlog import backlog_machines, load_backlog  # Cached per branch and filter
+from reference_data import load_machines, load_plan_instance, load_saved_allocations, prefetch_plan_instance  # Cached per branch
+from schedule_model import SHIFT_DURATIONS, DOWNTIME_TYPES, MAX_DOWNTIME_HOURS
+from schedule_render import render_consolidated_html
+from scheduler import auto_schedule
+from schedule_grid import allocation_grid, apply_grid_edits, date_labels, downtime_grid, shift_grid
+from instrumentation import start_rerun, finish_rerun, phase, render_profiling_panel
+from jobs import job_status, recent_jobs, session_jobs, submit
+from validation import validate_schedule
+from drafts import autosave_draft, discard_draft, draft_key, mark_draft_saved, open_draft, replace_draft
 import streamlit.errors # explicit import of streamlit errors.
 
-# Shift durations in hours
-SHIFT_DURATIONS = {"LD": 11, "NS": 22, "ND": 9, "ELD": 15}
-
-# Load Machines
-def load_machines():
-    conn = get_db_connection()
-    query = "SELECT name FROM machines ORDER BY name"
-    machines = pd.read_sql(query, conn)
-    conn.close()
-    return machines["name"].tolist()
-
-# Load Unscheduled Batches
-def load_unscheduled_batches():
-    conn = get_db_connection()
-    query = "SELECT id, product, batch_number, machine, time, progress FROM production_plan WHERE schedule = FALSE"
-    batches = pd.read_sql(query, conn)
-    conn.close()
-    batches["display_name"] = batches["product"] + " - " + batches["batch_number"]
-    return batches
+start_rerun("Plan Scheduler")
 
 # UI
 st.title("Machine Scheduling")
 
+# A scenario promoted on the What-if page becomes the working draft, over its own dates
+promoted = st.session_state.pop("promoted_draft", None)
+if promoted is not None:
+    st.session_state.start_date, st.session_state.end_date = promoted["start"], promoted["end"]
+
 # Select Date Range
+if "start_date" not in st.session_state:
+    st.session_state.start_date = datetime.today().date()
+    st.session_state.end_date = st.session_state.start_date + timedelta(days=7)
+
+def page_range(days):
+    """Move the date range by `days` and load what is saved there (usually prefetched already)."""
+    st.session_state.start_date += timedelta(days=days)
+    st.session_state.end_date += timedelta(days=days)
+    st.session_state.load_saved = True
+
 col1, col2 = st.columns(2)
 with col1:
-    start_date = st.date_input("Start Date", datetime.today())
+    start_date = st.date_input("Start Date", key="start_date")
 with col2:
-    end_date = st.date_input("End Date", datetime.today() + timedelta(days=7))
+    end_date = st.date_input("End Date", key="end_date")
+
+span = max((end_date - start_date).days + 1, 1)
+nav1, nav2 = st.columns(2)
+with nav1:
+    st.button("◀ Previous", on_click=page_range, args=(-span,), use_container_width=True)
+with nav2:
+    st.button("Next ▶", on_click=page_range, args=(span,), use_container_width=True)
 
 date_range = pd.date_range(start=start_date, end=end_date)
+range_dates = [date.date() for date in date_range]
 
 # Initialize session state variables
 if "machines_scheduled" not in st.session_state:
     st.session_state.machines_scheduled = []
-    st.session_state.schedule_data = {}
-    st.session_state.downtime_data = {}
-    st.session_state.progress_remaining = {}
-    st.session_state.total_allocated = {}
-    st.session_state.selected_batches = {}
 
-# Define defaults to prevent NameError
-selected_machine = st.session_state.get("selected_machine", None)
-date = st.session_state.get("selected_date", None)
-
-# Ensure selected_batches and downtimes exist in session state
-if "selected_batches" not in st.session_state:
-    st.session_state.selected_batches = {}
-
-if "downtimes" not in st.session_state:
-    st.session_state.downtimes = {}
+try:
+    schedule = open_draft()  # Machine × date × batch allocations, kept in the branch database between sessions
+except Exception as e:
+    print(f"❌ Failed to open draft: {e}")
+    st.error("❌ Could not open your draft schedule.")
+    st.stop()
+
+WIDGET_KEY_PREFIXES = ("machine_", "shift_", "alloc_batches_", "num_input_", "dt_type_", "dt_hours_", "grid_")
+
+def load_draft(draft):
+    """Make a ScheduleModel the working schedule and point the editors at its machines."""
+    for key in [key for key in st.session_state if str(key).startswith(WIDGET_KEY_PREFIXES)]:
+        del st.session_state[key]  # Widgets re-read their defaults from the draft
+
+    replace_draft(draft)
+    machines = draft.machines()
+    st.session_state.machines_scheduled = [f"machine_{i + 1}" for i in range(max(len(machines) - 1, 0))]
+    for i, machine in enumerate(machines):
+        st.session_state[f"machine_{i}"] = machine
+    st.rerun()
+
+if promoted is not None:
+    load_draft(promoted["draft"])
+
+# A draft resumed after a restart or on another worker: point the editors at its machines once
+if not st.session_state.get("draft_resumed"):
+    st.session_state.draft_resumed = True
+    if schedule.days:
+        st.session_state.load_message = f"Resumed your draft ({len(schedule.days)} cell(s), {len(schedule.dirty_cells())} unsaved)."
+        load_draft(schedule)
+
+def saved_cells(saved):
+    return saved[["machine", "date", "shift", "batch_info", "downtime_type", "downtime_hours", "version"]].itertuples(index=False, name=None)
+
+def load_saved_range(machines):
+    """Hydrate the working schedule with plan_instance rows for the range; unsaved edits are kept."""
+    machines = tuple(sorted(machines)) or None  # Same cache key the prefetcher uses
+    with phase("load saved schedule"):
+        saved = load_plan_instance(start_date, end_date, machines)
+        saved_machines = sorted(saved["machine"].unique())
+        backlog = load_backlog(tuple(saved_machines))
+        for machine in saved_machines:  # Also those whose backlog is now empty
+            schedule.register_batches(machine, backlog[backlog["machine"] == machine])
+        loaded = schedule.load_saved(saved_cells(saved))
+
+    prefetch_plan_instance(start_date, end_date, machines)  # ✅ Next/previous pages come from the cache
+    st.session_state.load_message = f"Loaded {loaded} saved cell(s) for {start_date} to {end_date}."
+    load_draft(schedule)
+
+SAVE_JOB = "Save schedule"
+DRAFT_JOB = "Auto-schedule"
+
+def run_save(job, conn, rows, versions, overwrite, draft):
+    """Background save of `to_rows()` rows on a worker thread; bulk_upsert_plan_instance commits it in one transaction.
+
+    The new versions are recorded in the draft at `draft` (its draft_key) here, not by the page,
+    so they are kept even if the browser is refreshed while the save runs.
+    """
+    job.report(0, f"Saving {len(rows)} cell(s)")
+    result = bulk_upsert_plan_instance(conn, rows, versions=versions, overwrite=overwrite, progress=job.report)
+    job.message = f"{result['inserted']} new, {result['updated']} updated, {len(result['conflicts'])} conflict(s)"
+    invalidate(job.branch, "plan_instance")
+    try:
+        mark_draft_saved(draft, result["versions"], rows)
+    except Exception as e:
+        print(f"❌ Saved, but could not update the draft: {e}")  # The save itself has committed
+    return {**result, "rows": rows}
+
+def apply_save(job):
+    """Once a save has committed: surface conflicts (run_save has already marked the cells clean)."""
+    st.session_state.save_conflicts = job.result["conflicts"]
+
+def save_schedule(rows, overwrite=False):
+    """Write changed cells in the background; cells someone else saved in the meantime come back as conflicts."""
+    submit(SAVE_JOB, run_save, rows, dict(schedule.versions), overwrite, draft_key(), transactional=True)
+    st.rerun()  # Start polling the job
+
+def run_auto_schedule(job, backlog, dates, shifts, downtime):
+    job.report(0, f"Scheduling {len(backlog)} batch(es)")
+    draft = auto_schedule(backlog, dates, shifts=shifts, downtime=downtime)
+    job.message = f"{len(backlog)} batch(es) over {len(draft.machines())} machine(s)"
+    return draft
+
+# Progress of saves and scheduling runs; their results are applied here when they finish.
+# Saves first: loading a draft reruns the page.
+job_status({SAVE_JOB: apply_save, DRAFT_JOB: lambda job: load_draft(job.result)})
+saving = bool(session_jobs(SAVE_JOB)) or any(  # Also a save still running from before a page refresh
+    job.name == SAVE_JOB and not job.done for job in recent_jobs(st.session_state.get("username")))
+
+# Existing schedules from plan_instance
+with st.expander("📥 Saved schedule", expanded=not schedule.days):
+    load_machine_names = st.multiselect("Machines (leave empty for all)", load_machines(), key="load_machine_names")
+    auto_load = st.checkbox("Load automatically when paging", value=True, key="auto_load")
+    if message := st.session_state.pop("load_message", None):
+        st.success(message)
+    if st.button("Load saved schedule") or (st.session_state.pop("load_saved", False) and auto_load):
+        load_saved_range(load_machine_names)
+    if st.button("🗑 Discard draft", help="Drop every unsaved change and start from an empty schedule"):
+        discard_draft()
+        load_draft(open_draft())
+
+# Automatic scheduling from the unscheduled backlog
+with st.expander("⚙️ Auto-schedule draft"):
+    machines_with_backlog = backlog_machines()
+    auto_machines = st.multiselect("Machines", machines_with_backlog, default=machines_with_backlog, key="auto_machines")
+    st.caption("Uses the shifts and downtime already entered; other days run the LD shift.")
+
+    if st.button("Generate draft", disabled=not auto_machines or saving or bool(session_jobs(DRAFT_JOB)),
+                 help="Wait for the running save to finish" if saving else None):
+        submit(
+            DRAFT_JOB,
+            run_auto_schedule,
+            load_backlog(tuple(sorted(auto_machines))).copy(),
+            range_dates,
+            shifts={key: day.shift for key, day in schedule.days.items() if day.shift},
+            downtime={key: (day.downtime_type, day.downtime_hours) for key, day in schedule.days.items() if day.downtime_hours},
+        )
+        st.rerun()  # The draft is loaded when the job finishes
 
 # Track already selected batches
 def schedule_machine(machine_id):
-    machines = load_machines()
+    machines = sorted(set(load_machines()) | set(schedule.machines()))  # Saved cells may name retired machines
 
     # Include a blank option at the start of the list
     selected_machine = st.selectbox(f"Select Machine {machine_id + 1}", [""] + machines, index=0, key=f"machine_{machine_id}")
@@ -68,184 +187,202 @@ def schedule_machine(machine_id):
         return  # Exit if no machine is selected
 
     # Load unscheduled batches for selected machine
-    batches = load_unscheduled_batches()
-    
-    if batches.empty:
-        st.warning("No unscheduled batches available in the database.")
-        return
+    machine_batches = load_backlog((selected_machine,))
+    schedule.register_batches(selected_machine, machine_batches)  # Even when empty: drops batches that left the backlog
 
-    machine_batches = batches[batches["machine"] == selected_machine]
-
-    # Initialize session state for the selected machine
-    if selected_machine not in st.session_state.progress_remaining:
-        st.session_state.progress_remaining[selected_machine] = {batch: progress for batch, progress in zip(machine_batches["display_name"], machine_batches["progress"])}
-        st.session_state.total_allocated[selected_machine] = {batch: 0 for batch in machine_batches["display_name"]}
+    if machine_batches.empty:
+        st.warning(f"No unscheduled batches for {selected_machine}.")
+        return
 
     st.write(f"### Schedule for {selected_machine}")
-    schedule_df = pd.DataFrame(index=["Shift", "Batch", "% of Batch", "Utilization", "Downtime"], columns=date_range.strftime("%Y-%m-%d"))
 
     for date in date_range:
-        with st.expander(f"{date.strftime('%Y-%m-%d')} - {selected_machine}"):
-            shift = st.selectbox(f"Shift ({date.strftime('%Y-%m-%d')})", list(SHIFT_DURATIONS.keys()), key=f"shift_{date}_{machine_id}")
-
-            # Initialize selected_batches for the date if not already present
-            if (selected_machine, date) not in st.session_state.selected_batches:
-                st.session_state.selected_batches[(selected_machine, date)] = {}
-
-            selected_batches_for_date = st.session_state.selected_batches[(selected_machine, date)]
-            already_selected = {batch: percent for batch, percent in selected_batches_for_date.items()}
-            machine_batches_filtered = machine_batches[~machine_batches["display_name"].isin(already_selected)]
-
-            # Compute allowed batches
-            allowed_batches = {}
-            for batch in st.session_state.progress_remaining[selected_machine]:
-                if st.session_state.total_allocated[selected_machine][batch] < 100:
-                    allowed_batches[batch] = 100 - st.session_state.total_allocated[selected_machine][batch]
+        day_date = date.date()
+        label = date.strftime('%Y-%m-%d')
+        with st.expander(f"{label} - {selected_machine}"):
+            # Read only: viewing a day must not create it or mark it changed
+            existing_day = schedule.get_day(selected_machine, day_date)
+            current_shift = existing_day.shift if existing_day else None
+            shift_options = [None] + list(SHIFT_DURATIONS.keys())
+            shift = st.selectbox(f"Shift ({label})", shift_options, index=shift_options.index(current_shift),
+                                 format_func=lambda code: code or "Not set", key=f"shift_{date}_{machine_id}")
+            if shift is not None and shift != current_shift:
+                schedule.set_shift(selected_machine, day_date, shift)
+
+            already_selected = dict(existing_day.allocations) if existing_day else {}
+
+            # Allowed batches: anything not fully allocated, plus what this day already runs
+            allowed_batches = list(already_selected) + [batch for batch in schedule.open_batches(selected_machine) if batch not in already_selected]
 
             if not allowed_batches:
                 st.warning("No batches are available for selection based on progress remaining.")
                 continue
 
-            # Set default selections for the multiselect
-            default_batches = list(selected_batches_for_date.keys())
-            valid_defaults = [batch for batch in default_batches if batch in allowed_batches]  # Ensure valid defaults
-
             batch_selection = st.multiselect(
-                f"Batch ({date.strftime('%Y-%m-%d')})",
-                list(allowed_batches.keys()),
-                default=valid_defaults,  # Set previously selected batches if valid
-                key=f"batch_{date}_{machine_id}"
+                f"Batch ({label})",
+                allowed_batches,
+                default=list(already_selected.keys()),  # Set previously selected batches
+                key=f"alloc_batches_{date}_{machine_id}"
             )
 
-            percent_selection = {}
             for batch in batch_selection:
-                # Recalculate available_percentage for each batch selection
-                available_percentage = 100 - st.session_state.total_allocated[selected_machine][batch]
-
+                # Available percentage excludes other days' allocations of this batch
                 current_selection = already_selected.get(batch, 0)
-                current_selection = min(current_selection, available_percentage) # ensure current selection is within available percentage
-
-                # Debugging: Print values before number_input
-                st.write(f"Batch: {batch}, Available Percentage: {available_percentage}, Current Selection: {current_selection}, total allocated {st.session_state.total_allocated[selected_machine][batch]}")
+                total_allocated = schedule.batch(selected_machine, batch).total_allocated
+                available_percentage = 100 - total_allocated + current_selection
 
-                percent = st.number_input(f"% of {batch} (Available: {available_percentage}%) ({date.strftime('%Y-%m-%d')})",
+                percent = st.number_input(f"% of {batch} (Available: {available_percentage}%) ({label})",
                                                 0, available_percentage, step=10, value=current_selection, key = f"num_input_{batch}_{date}_{machine_id}")
 
                 add_button = st.button(f"Add {batch}", key=f"add_{batch}_{date}_{machine_id}")
-                update_button = st.button(f"Update {batch}", key=f"update_{batch}_{date}_{machine_id}", disabled=batch not in st.session_state.selected_batches[(selected_machine, date)])
-                delete_button = st.button(f"Delete {batch}", key=f"delete_{batch}_{date}_{machine_id}", disabled=batch not in st.session_state.selected_batches[(selected_machine, date)])
+                update_button = st.button(f"Update {batch}", key=f"update_{batch}_{date}_{machine_id}", disabled=batch not in already_selected)
+                delete_button = st.button(f"Delete {batch}", key=f"delete_{batch}_{date}_{machine_id}", disabled=batch not in already_selected)
 
-                if add_button:
-                    st.session_state.selected_batches[(selected_machine, date)][batch] = percent
-                    st.session_state.total_allocated[selected_machine][batch] += percent
-                    st.session_state.progress_remaining[selected_machine][batch] -= percent
-
-                if update_button:
-                    old_percent = st.session_state.selected_batches[(selected_machine, date)][batch]
-                    st.session_state.total_allocated[selected_machine][batch] += (percent - old_percent)
-                    st.session_state.progress_remaining[selected_machine][batch] -= (percent - old_percent)
-                    st.session_state.selected_batches[(selected_machine, date)][batch] = percent
+                if add_button or update_button:
+                    schedule.set_allocation(selected_machine, day_date, batch, percent)
 
                 if delete_button:
-                    old_percent = st.session_state.selected_batches[(selected_machine, date)][batch]
-                    del st.session_state.selected_batches[(selected_machine, date)][batch]
-                    st.session_state.total_allocated[selected_machine][batch] -= old_percent
-                    st.session_state.progress_remaining[selected_machine][batch] += old_percent
-
-                # Check if all batches are removed for this date
-                if not st.session_state.selected_batches[(selected_machine, date)]:
-                    # Clear the schedule_df for this date
-                    schedule_df.loc["Shift", date.strftime("%Y-%m-%d")] = ""
-                    schedule_df.loc["Batch", date.strftime("%Y-%m-%d")] = ""
-                    schedule_df.loc["Utilization", date.strftime("%Y-%m-%d")] = ""
-                    schedule_df.loc["Downtime", date.strftime("%Y-%m-%d")] = ""
-
-            # Update total_allocated and progress_remaining for removed batches
+                    schedule.remove_allocation(selected_machine, day_date, batch)
+
+            # Drop allocations for batches removed from the multiselect
             for batch in already_selected:
                 if batch not in batch_selection:
-                    st.session_state.total_allocated[selected_machine][batch] = max(0, st.session_state.total_allocated[selected_machine][batch] - already_selected[batch])
-                    st.session_state.progress_remaining[selected_machine][batch] += already_selected[batch]
+                    schedule.remove_allocation(selected_machine, day_date, batch)
 
-            st.session_state.selected_batches[(selected_machine, date)].update(st.session_state.selected_batches[(selected_machine, date)])  # Store selected batches and their percentages
-
-            # Total utilization calculation
-            total_utilization = sum((machine_batches.loc[machine_batches["display_name"] == batch, "time"].values[0] * percent / 100)
-                                        for batch, percent in st.session_state.selected_batches[(selected_machine, date)].items())
-            utilization_percentage = (total_utilization / SHIFT_DURATIONS[shift]) * 100 if SHIFT_DURATIONS[shift] > 0 else 0
-
-            formatted_batches = "<br>".join([f"{batch} - <span style='color:green;'>{st.session_state.selected_batches[(selected_machine, date)].get(batch, 0)}%</span>" for batch in st.session_state.selected_batches[(selected_machine, date)]])
-            schedule_df.loc["Shift", date.strftime("%Y-%m-%d")] = f"<b style='color:red;'>{shift}</b>"
-            schedule_df.loc["Batch", date.strftime("%Y-%m-%d")] = formatted_batches
-            schedule_df.loc["Utilization", date.strftime("%Y-%m-%d")] = f"Util= {utilization_percentage:.2f}%"
+            utilization_percentage = schedule.utilization(selected_machine, day_date)
+            st.caption(f"Utilization: {utilization_percentage:.2f}%")
 
             # Downtime Selection
-            if st.button(f"+DT ({date.strftime('%Y-%m-%d')}) - {selected_machine}", key=f"dt_button_{date}_{machine_id}"):
-                if (selected_machine, date) not in st.session_state.downtime_data:
-                    st.session_state.downtime_data[(selected_machine, date)] = {"type": None, "hours": 0}
-
-            if (selected_machine, date) in st.session_state.downtime_data:
-                dt_type = st.selectbox("Select Downtime Type", ["Cleaning", "Preventive Maintenance", "Calibration"], key=f"dt_type_{date}_{machine_id}")
-                dt_hours = st.number_input("Downtime Hours", min_value=0.0, step=0.5, key=f"dt_hours_{date}_{machine_id}")
-                if dt_hours >24:
-                    dt_hours=24;
+            day = schedule.get_day(selected_machine, day_date)
+            if st.button(f"+DT ({label}) - {selected_machine}", key=f"dt_button_{date}_{machine_id}"):
+                if day is None or day.downtime_type is None:
+                    schedule.set_downtime(selected_machine, day_date, DOWNTIME_TYPES[0], 0)
+                    day = schedule.get_day(selected_machine, day_date)
+
+            if day is not None and day.downtime_type is not None:
+                # A type saved outside the app is offered as is, so viewing the day doesn't change it
+                dt_types = DOWNTIME_TYPES if day.downtime_type in DOWNTIME_TYPES else DOWNTIME_TYPES + [day.downtime_type]
+                dt_type = st.selectbox("Select Downtime Type", dt_types, index=dt_types.index(day.downtime_type), key=f"dt_type_{date}_{machine_id}")
+                dt_hours = st.number_input("Downtime Hours", min_value=0.0, step=0.5, value=day.downtime_hours, key=f"dt_hours_{date}_{machine_id}")
+                if dt_hours > MAX_DOWNTIME_HOURS:
                     st.warning("Max downtime is 24 Hours")
-                st.session_state.downtime_data[(selected_machine, date)] = {"type": dt_type, "hours": dt_hours}
-                schedule_df.loc["Downtime", date.strftime("%Y-%m-%d")] = f"<span style='color:purple;'>{dt_type} ({dt_hours} hrs)</span>"
-
-    # Check if all dates are cleared for this machine
-    if all(all(schedule_df.loc[row, date] == "" for row in ["Shift", "Batch", "Utilization", "Downtime"]) for date in date_range.strftime("%Y-%m-%d")):
-        # Remove the machine from st.session_state.schedule_data
-        if selected_machine in st.session_state.schedule_data:
-            del st.session_state.schedule_data[selected_machine]
-
-    st.session_state.schedule_data[selected_machine] = schedule_df
-
-# Initial Scheduling
-for i in range(len(st.session_state.machines_scheduled) + 1):
-    schedule_machine(i)
-
-if st.button("Add Another Machine"):
-    st.session_state.machines_scheduled.append(f"machine_{len(st.session_state.machines_scheduled) + 1}")
+                schedule.set_downtime(selected_machine, day_date, dt_type, dt_hours)  # Clamped to 24 hours
+
+def on_grid_edit(kind, frame, key, dates):
+    """Apply only the cells changed in a grid editor, then rebuild the editors from the schedule."""
+    edited_rows = st.session_state[key]["edited_rows"]
+    st.session_state.grid_warnings = apply_grid_edits(open_draft(), kind, frame, edited_rows, dates)
+    st.session_state.grid_version += 1
+
+def grid_editor(kind, frame, column_config):
+    key = f"grid_{kind}_{st.session_state.grid_version}"
+    st.data_editor(
+        frame,
+        key=key,
+        hide_index=True,
+        disabled=["Machine", "Batch", "Total %"],
+        column_config=column_config,
+        on_change=on_grid_edit,
+        args=(kind, frame, key, range_dates),
+        use_container_width=True,
+    )
+
+edit_mode = st.radio("Editing mode", ["Grid", "Per day"], horizontal=True, key="edit_mode")
+
+with phase("schedule editors"):
+    if edit_mode == "Grid":
+        # One editor per view instead of widgets per machine × day × batch
+        if "grid_version" not in st.session_state:
+            st.session_state.grid_version = 0
+
+        grid_machines = st.multiselect(
+            "Machines", sorted(set(load_machines()) | set(schedule.machines())), default=schedule.machines(), key="grid_machines"
+        )
+        backlog = load_backlog(tuple(sorted(grid_machines)))
+        for machine in grid_machines:  # Also those whose backlog is now empty
+            schedule.register_batches(machine, backlog[backlog["machine"] == machine])
+
+        for warning in st.session_state.pop("grid_warnings", []):
+            st.warning(warning)
+
+        labels = date_labels(range_dates)
+        shifts_tab, allocations_tab, downtime_tab = st.tabs(["Shifts", "Allocations (%)", "Downtime (hrs)"])
+        with shifts_tab:
+            grid_editor("shift", shift_grid(schedule, grid_machines, range_dates),
+                        {label: st.column_config.SelectboxColumn(label, options=list(SHIFT_DURATIONS)) for label in labels})
+        with allocations_tab:
+            grid_editor("allocation", allocation_grid(schedule, grid_machines, range_dates),
+                        {label: st.column_config.NumberColumn(label, min_value=0, max_value=100, step=10) for label in labels})
+        with downtime_tab:
+            grid_editor("downtime", downtime_grid(schedule, grid_machines, range_dates),
+                        {label: st.column_config.NumberColumn(label, min_value=0.0, max_value=MAX_DOWNTIME_HOURS, step=0.5) for label in labels})
+
+    else:
+        # Initial Scheduling
+        for i in range(len(st.session_state.machines_scheduled) + 1):
+            schedule_machine(i)
+
+        if st.button("Add Another Machine"):
+            st.session_state.machines_scheduled.append(f"machine_{len(st.session_state.machines_scheduled) + 1}")
+
+scheduled_machines = schedule.machines()
 
 # Display All Scheduled Machines in a Single Table
-if st.session_state.schedule_data:
+if scheduled_machines:
     st.write("### Consolidated Schedule")
-    consolidated_df = pd.DataFrame(columns=["Machine"] + date_range.strftime("%Y-%m-%d").tolist())
-
-    for machine, df in st.session_state.schedule_data.items():
-        row = {"Machine": machine}  # Initialize row for the machine
-        for date in date_range.strftime("%Y-%m-%d"):
-            batch_data = df.loc["Batch", date] if "Batch" in df.index else ""
-            downtime_data = df.loc["Downtime", date] if "Downtime" in df.index else ""
-            shift_data = df.loc["Shift", date] if "Shift" in df.index else ""
-            util_data = df.loc["Utilization", date] if "Utilization" in df.index else ""
-
-            row[date] = f"{shift_data}<br>{batch_data}<br>{util_data}<br>{downtime_data}"  # Add date data to the row
-        consolidated_df = pd.concat([consolidated_df, pd.DataFrame([row])], ignore_index=True)
-
-    st.markdown(consolidated_df.to_html(escape=False, index=False), unsafe_allow_html=True)
-
-
-# Save Button
-if st.button("Save Schedule"):
-    conn = get_db_connection()
-    cursor = conn.cursor()
-
-    for machine, df in st.session_state.schedule_data.items():
-        for date in date_range.strftime("%Y-%m-%d"):
-            shift = df.loc["Shift", date]
-            batch_info = df.loc["Batch", date] if 'Batch' in df.index else ''
-            utilization = df.loc["Utilization", date] if 'Utilization' in df.index else ''
-            downtime = df.loc["Downtime", date] if "Downtime" in df.index else ""
-
-            query = """
-                INSERT INTO plan_instance (machine, date, shift, batch_info, utilization, downtime)
-                VALUES (%s, %s, %s, %s, %s, %s)
-                ON CONFLICT (machine, date) DO UPDATE
-                SET shift = EXCLUDED.shift, batch_info = EXCLUDED.batch_info, utilization = EXCLUDED.utilization, downtime = EXCLUDED.downtime
-                """
-            cursor.execute(query, (machine, date, shift, batch_info, utilization, downtime))
-
-    conn.commit()
-    conn.close()
-    st.success("Schedule saved successfully!")
+    with phase("render consolidated"):
+        st.markdown(render_consolidated_html(schedule, scheduled_machines, range_dates), unsafe_allow_html=True)
+
+
+# Checks over the whole working schedule, every rerun and before every save
+if schedule.days:
+    with phase("validate"):
+        violations = validate_schedule(schedule, saved_allocations=load_saved_allocations(tuple(sorted(schedule.machines()))))
+    errors = violations[violations["severity"] == "error"]
+    with st.expander(f"🔎 Checks: {len(errors)} error(s), {len(violations) - len(errors)} warning(s)", expanded=not errors.empty):
+        if violations.empty:
+            st.success("✅ No problems found.")
+        else:
+            st.dataframe(violations, hide_index=True, use_container_width=True)
+        allow_errors = st.checkbox("Save even with errors", key="allow_errors", disabled=errors.empty)
+    blocked = not errors.empty and not allow_errors
+else:
+    blocked = False
+
+# Save Button: only cells edited since the last load or save are sent, in the background
+changed = schedule.dirty_cells(dates=range_dates)
+if st.button("Save Schedule", disabled=not changed or saving or blocked,
+             help="Fix the errors under Checks first" if blocked else f"{len(changed)} changed cell(s)"):
+    save_schedule(schedule.to_rows(dates=range_dates, changed_only=True))
+
+conflicts = st.session_state.get("save_conflicts", [])
+if conflicts:
+    st.warning(
+        f"⚠️ {len(conflicts)} cell(s) were changed by someone else since you loaded them and were not saved: "
+        + ", ".join(f"{machine} {date}" for machine, date in conflicts[:20])
+        + (" ..." if len(conflicts) > 20 else "")
+    )
+    col1, col2 = st.columns(2)
+    with col1:
+        if st.button("Overwrite their changes", disabled=saving):
+            conflict_cells = set(conflicts)
+            rows = [row for row in schedule.to_rows(changed_only=True) if (row[0], row[1]) in conflict_cells]
+            st.session_state.save_conflicts = []
+            save_schedule(rows, overwrite=True)
+    with col2:
+        if st.button("Keep their changes"):
+            schedule.discard_changes(conflicts)  # Not re-sent on the next save
+            conflict_cells = set(conflicts)
+            saved = load_plan_instance(
+                min(date for _, date in conflicts), max(date for _, date in conflicts),
+                tuple(sorted({machine for machine, _ in conflicts})),
+            )
+            schedule.load_saved(cell for cell in saved_cells(saved) if (cell[0], cell[1]) in conflict_cells)
+            st.session_state.save_conflicts = []
+            load_draft(schedule)  # Editors show their values
+
+with phase("autosave draft"):
+    autosave_draft(schedule)  # Only written when something changed
+
+render_profiling_panel()
+finish_rerun()
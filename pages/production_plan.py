@@ -1,8 +1,16 @@
 import streamlit as st
 import pandas as pd
 import psycopg2
-from db import get_db_connection, get_branches
+from db import db_connection
+from cache import invalidate
+from reference_data import load_branches, load_products, load_machine_rates
+from bulk_write import bulk_insert_production_plan, existing_batch_numbers
+from batch_numbers import batch_numbers_from_file, parse_batch_list, parse_batch_spec
+from batch_times import compute_batch_times, product_machine_times
 from auth import check_authentication
+from instrumentation import start_rerun, finish_rerun, phase, render_profiling_panel
+
+start_rerun("Production Plan")
 
 # Ensure user is authenticated
 check_authentication()
@@ -11,7 +19,7 @@ st.title("Production Plan")
 
 # Ensure branches are loaded
 if "branches" not in st.session_state:
-    st.session_state["branches"] = get_branches()
+    st.session_state["branches"] = load_branches()
 
 # Ensure session state has a valid branch
 if "branch" not in st.session_state or st.session_state["branch"] not in st.session_state["branches"]:
@@ -32,24 +40,31 @@ if selected_branch != st.session_state["branch"]:
 
 st.sidebar.success(f"Working on branch: {st.session_state['branch']}")
 
-# Connect to the selected branch
-conn = get_db_connection()
-if not conn:
+# Outcome of the last save (the page reruns straight after saving)
+if counts := st.session_state.pop("plan_save_result", None):
+    if counts.get("empty"):
+        st.warning("⚠️ No valid batches to save. All records had missing time values.")
+    else:
+        st.success(f"✅ {counts['inserted']} records saved successfully!")
+    if counts["skipped"]:
+        skipped = ", ".join(f"{product} {batch} on {machine}" for product, batch, machine in counts["skipped_rows"])
+        st.info(f"{counts['skipped']} record(s) were already planned and were skipped: {skipped}")
+
+# Fetch Products (cached per branch, shared across sessions)
+try:
+    with phase("load products"):
+        products = load_products()
+except Exception as e:
+    print(f"❌ Failed to load products: {e}")
     st.error("❌ Database connection failed.")
     st.stop()
 
-cur = conn.cursor()
-
-# Fetch Products
-cur.execute("SELECT name, batch_size, units_per_box, primary_units_per_box FROM products")
-products = cur.fetchall()
-
-if not products:
+if products.empty:
     st.error("❌ No products found.")
     st.stop()
 
 # Create product dictionary
-product_dict = {p[0]: {"batch_size": p[1], "units_per_box": p[2], "primary_units_per_box": p[3]} for p in products}
+product_dict = products.set_index("name")[["batch_size", "units_per_box", "primary_units_per_box"]].to_dict("index")
 
 # Select Product
 selected_product = st.selectbox("Select a Product:", list(product_dict.keys()))
@@ -57,96 +72,118 @@ st.session_state["selected_product"] = selected_product
 
 # Fetch product details
 batch_size = product_dict[selected_product]["batch_size"]
-units_per_box = product_dict[selected_product]["units_per_box"]
-primary_units_per_box = product_dict[selected_product]["primary_units_per_box"]
 
 st.write(f"**Batch Size:** {batch_size} boxes")
 
 # Fetch Machines & Rates
-cur.execute("""
-    SELECT r.machine, r.standard_rate, m.qty_uom 
-    FROM rates r 
-    JOIN machines m ON r.machine = m.name
-    WHERE r.product = %s
-""", (selected_product,))
-machine_rates = cur.fetchall()
-
-if not machine_rates:
+with phase("load machine rates"):
+    machine_rates = load_machine_rates(selected_product)
+
+if machine_rates.empty:
     st.error("❌ No machines found with rates for this product.")
     st.stop()
 
+product_rates = machine_rates.assign(product=selected_product)
+
 # Store machine data
-machine_data = {m[0]: {"rate": m[1], "qty_uom": m[2]} for m in machine_rates}
+machine_data = {m.machine: {"rate": m.standard_rate, "qty_uom": m.qty_uom} for m in machine_rates.itertuples()}
+
+# Flag machines where a batch time can't be computed
+machine_times = product_machine_times(products, product_rates)
+for row in machine_times[machine_times["issue"].notna()].itertuples():
+    st.warning(f"⚠️ No time on {row.machine}: {row.issue} ({row.qty_uom})")
 
 # Batch Storage (Use a Temporary List)
 if "batch_entries" not in st.session_state:
     st.session_state["batch_entries"] = []
 
-# Number of Batches (Min set to 0)
-num_batches = st.number_input("Enter number of batches:", min_value=0, step=1, key="num_batches")
-
-# Generate Batch Numbers with Auto-Increment
-batch_data = []
-starting_batch_number = None
-
-for i in range(num_batches):
-    batch_key = f"batch_{i}"
-
-    if i == 0:
-        batch_number = st.text_input(f"Batch Number {i+1}:", key=batch_key)
-        if batch_number.isnumeric():
-            starting_batch_number = int(batch_number)
-    else:
-        if starting_batch_number is not None:
-            batch_number = st.text_input(f"Batch Number {i+1}:", value=str(starting_batch_number + i), key=batch_key)
-        else:
+entry_mode = st.radio("Batch entry", ["Bulk", "One by one"], horizontal=True, key="entry_mode")
+batch_numbers = []
+
+if entry_mode == "Bulk":
+    # One text box or file for a whole campaign instead of a widget per batch
+    with st.form("bulk_batches"):
+        spec = st.text_area("Batch numbers", placeholder="1001-1300, 1405", help="Ranges (start-end) and single numbers")
+        pasted = st.text_area("...or paste a list", placeholder="One batch number per line, taken as is (e.g. B24-30)")
+        upload = st.file_uploader("...or upload a list (CSV, Excel or text; first column)", type=["csv", "xlsx", "txt"])
+        generate = st.form_submit_button("Generate batches")
+
+    if generate:
+        try:
+            numbers = parse_batch_spec(spec)
+            listed = parse_batch_list(pasted)
+            if upload is not None:
+                listed += batch_numbers_from_file(upload.getvalue(), upload.name)
+            numbers = parse_batch_list(numbers + listed)  # Literal from here on: no repeats, at most MAX_BATCHES
+        except ValueError as e:
+            st.error(f"❌ {e}")
+            numbers = []
+
+        # One query for every number instead of one per batch
+        with phase("check existing batches"), db_connection() as conn:
+            existing = existing_batch_numbers(conn, selected_product, numbers)
+        pending = {row["Batch Number"] for row in st.session_state["batch_entries"] if row["Product"] == selected_product}
+        skipped = [n for n in numbers if n in existing or n in pending]
+        if skipped:
+            st.warning(f"⚠️ Skipped {len(skipped)} batch(es) already planned or added: {', '.join(skipped[:20])}{' ...' if len(skipped) > 20 else ''}")
+        st.session_state["bulk_batch_numbers"] = (selected_product, [n for n in numbers if n not in existing and n not in pending])
+
+    # Generated numbers survive reruns until they are added or the product changes
+    bulk_product, bulk_numbers = st.session_state.get("bulk_batch_numbers", (None, []))
+    if bulk_product == selected_product and bulk_numbers:
+        batch_numbers = bulk_numbers
+        st.info(f"{len(batch_numbers)} batch(es) ready: {batch_numbers[0]} … {batch_numbers[-1]}")
+else:
+    # Number of Batches (Min set to 0)
+    num_batches = st.number_input("Enter number of batches:", min_value=0, step=1, key="num_batches")
+
+    # Generate Batch Numbers with Auto-Increment
+    starting_batch_number = None
+
+    for i in range(num_batches):
+        batch_key = f"batch_{i}"
+
+        if i == 0:
             batch_number = st.text_input(f"Batch Number {i+1}:", key=batch_key)
-
-    if batch_number:
-        # Calculate Time for Each Machine
-        time_per_machine = {}
-        for machine, data in machine_data.items():
-            rate = data["rate"] or 1
-            qty_uom = data["qty_uom"]
-
-            if qty_uom == "batch":
-                time_per_machine[machine] = round(1 / rate, 2) if rate else None
-            elif qty_uom == "thousand units":
-                time_per_machine[machine] = round((batch_size * units_per_box) / (1000 * rate), 2) if rate and units_per_box else None
-            elif qty_uom == "thousand units 1ry":
-                time_per_machine[machine] = round((batch_size * primary_units_per_box) / (1000 * rate), 2) if rate and primary_units_per_box else None
+            if batch_number.isnumeric():
+                starting_batch_number = int(batch_number)
+        else:
+            if starting_batch_number is not None:
+                batch_number = st.text_input(f"Batch Number {i+1}:", value=str(starting_batch_number + i), key=batch_key)
             else:
-                time_per_machine[machine] = None
+                batch_number = st.text_input(f"Batch Number {i+1}:", key=batch_key)
 
-        batch_data.append({"Product": selected_product, "Batch Number": batch_number, **time_per_machine})
+        if batch_number:
+            batch_numbers.append(batch_number)
+
+# Calculate Time for Each Machine (all batches at once)
+batch_data = []
+if batch_numbers:
+    with phase("batch times"):
+        batch_times = compute_batch_times(
+            products,
+            product_rates,
+            pd.DataFrame({"product": selected_product, "batch_number": batch_numbers}),
+        )
+    batch_data = batch_times.astype(object).where(batch_times.notna(), None).to_dict("records")  # NaN -> None
 
 # Append batch data only when the user confirms
 if st.button("➕ Add Batches"):
     st.session_state["batch_entries"].extend(batch_data)
+    st.session_state.pop("bulk_batch_numbers", None)
     st.rerun()
 
-# Display All Added Batches with Delete Option
+# Display All Added Batches with Delete Option (one picker instead of a button per batch)
 if st.session_state["batch_entries"]:
     st.write("### All Added Batches")
 
-    batch_df = pd.DataFrame(st.session_state["batch_entries"])
-
-    updated_batches = st.session_state["batch_entries"].copy()  # Keep a copy to update after deletion
-
-    for index, row in batch_df.iterrows():
-        col1, col2, col3 = st.columns([3, 3, 1])  # Layout: Batch Number | Product | Delete Button
-        
-        with col1:
-            st.write(f"**Batch Number:** {row['Batch Number']}")
-        
-        with col2:
-            st.write(f"**Product:** {row['Product']}")
-
-        with col3:
-            if st.button("🗑", key=f"delete_{index}"):  # Unique key for each batch
-                updated_batches.pop(index)  # Remove the batch
-                st.session_state["batch_entries"] = updated_batches  # Save updated batch list
-                st.rerun()  # Refresh UI after deletion
+    labels = [f"{row['Product']} - {row['Batch Number']}" for row in st.session_state["batch_entries"]]
+    st.write(f"**{len(labels)} batch(es) added**")
+    to_remove = st.multiselect("Batches to remove", range(len(labels)), format_func=labels.__getitem__)
+    if st.button("🗑 Remove selected", disabled=not to_remove):
+        removed = set(to_remove)
+        st.session_state["batch_entries"] = [row for i, row in enumerate(st.session_state["batch_entries"]) if i not in removed]
+        st.rerun()  # Refresh UI after deletion
 
 # Move Editable DataFrame to Bottom (Always Visible)
 if st.session_state["batch_entries"]:
@@ -167,16 +204,16 @@ if st.session_state["batch_entries"] and st.button("✅ Approve & Save Plan"):
 
     if valid_batches:
         # Insert only valid batches into the database
-        cur.executemany("""
-            INSERT INTO production_plan 
-            (product, batch_number, machine, planned_start_datetime, planned_end_datetime, time, updated_at)
-            VALUES (%s, %s, %s, NOW(), NOW(), %s, NOW())
-        """, valid_batches)
-
-        conn.commit()
-        st.success(f"✅ {len(valid_batches)} records saved successfully!")
+        with phase("save plan"), db_connection() as conn:
+            counts = bulk_insert_production_plan(conn, valid_batches)  # One transaction, multi-row statements
+
+        invalidate(st.session_state["branch"], "production_plan")  # ✅ Backlog readers see the new batches
+        st.session_state["plan_save_result"] = counts  # Shown after the rerun below
     else:
-        st.warning("⚠️ No valid batches to save. All records had missing time values.")
+        st.session_state["plan_save_result"] = {"inserted": 0, "skipped": 0, "skipped_rows": [], "empty": True}
 
     st.session_state["batch_entries"] = []
     st.rerun()
+
+render_profiling_panel()
+finish_rerun()
@@ -0,0 +1,74 @@
+import streamlit as st
+from datetime import datetime, timedelta
+from auth import ROLE_ACCESS, check_authentication, check_access
+from db import db_connection, current_branch
+from cache import invalidate
+from reference_data import load_summary  # Cached per branch; reads plan_summary, never plan_instance
+from summary import rebuild_summary
+from instrumentation import start_rerun, finish_rerun, phase, render_profiling_panel
+
+start_rerun("Reports")
+
+check_authentication()
+check_access([role for role, pages in ROLE_ACCESS.items() if "reports_dashboard" in pages])
+
+st.title("Reports")
+
+GRAIN_LABELS = {"Daily": "day", "Weekly": "week", "Monthly": "month"}
+
+col1, col2, col3 = st.columns(3)
+with col1:
+    grain_label = st.selectbox("Period", list(GRAIN_LABELS), index=2)
+with col2:
+    start_date = st.date_input("From", datetime.today() - timedelta(days=365))
+with col3:
+    end_date = st.date_input("To", datetime.today())
+grain = GRAIN_LABELS[grain_label]
+
+with phase("load summary"):
+    summary = load_summary(grain, start_date, end_date, branch=current_branch())
+
+if summary.empty:
+    st.info("No saved schedules in this period.")
+else:
+    machines = sorted(summary["machine"].unique())
+    selected = st.multiselect("Machines", machines, default=machines)
+    summary = summary[summary["machine"].isin(selected)]
+
+    # Ratio of sums, so long periods aren't skewed by short shifts
+    by_machine = summary.groupby(["period_start", "machine"], as_index=False)[
+        ["days", "shift_hours", "allocated_hours", "downtime_hours"]
+    ].sum()
+    capacity = (by_machine["shift_hours"] - by_machine["downtime_hours"]).clip(lower=0)  # Effective capacity
+    by_machine["utilization"] = (by_machine["allocated_hours"] / capacity.where(capacity > 0) * 100).round(2)
+
+    st.subheader("Utilization (%)")
+    utilization = by_machine.pivot(index="period_start", columns="machine", values="utilization")
+    st.line_chart(utilization)
+    table = by_machine.assign(period=by_machine["period_start"].astype(str)).pivot(
+        index="machine", columns="period", values="utilization"
+    )
+    st.dataframe(table, use_container_width=True)
+
+    st.subheader("Allocated vs. downtime hours")
+    hours = by_machine.groupby("period_start")[["allocated_hours", "downtime_hours"]].sum()
+    st.bar_chart(hours)
+
+    st.subheader("Shift mix (machine-days per shift)")
+    shift_mix = summary.pivot_table(index="machine", columns="shift", values="days", aggfunc="sum", fill_value=0)
+    st.dataframe(shift_mix, use_container_width=True)
+
+    st.download_button("Download CSV", by_machine.to_csv(index=False), f"utilization_{grain}.csv", "text/csv")
+
+# Totals are kept up to date on every save; a rebuild is only needed after direct edits to plan_instance
+if st.session_state.get("role") == "admin":
+    with st.expander("🛠 Maintenance"):
+        if st.button("Rebuild summaries from plan_instance"):
+            with phase("rebuild summary"):
+                with db_connection() as conn:
+                    rebuild_summary(conn)
+            invalidate(current_branch(), "plan_instance")
+            st.rerun()
+
+render_profiling_panel()
+finish_rerun()
@@ -0,0 +1,91 @@
+import streamlit as st
+import pandas as pd
+from datetime import datetime, timedelta
+from auth import check_authentication
+from backlog import backlog_machines, load_backlog  # Cached per branch and filter
+from schedule_model import SHIFT_DURATIONS
+from scheduler import DEFAULT_SHIFT
+from simulation import DAY_SETS, run_scenarios, scenarios_from_rules
+from instrumentation import start_rerun, finish_rerun, phase, render_profiling_panel
+
+start_rerun("What-if Scenarios")
+
+check_authentication()
+
+st.title("What-if Scenarios")
+st.caption("Run the unscheduled backlog against other shift patterns and downtime, side by side.")
+
+machines = backlog_machines()
+if not machines:
+    st.info("The unscheduled backlog is empty.")
+    finish_rerun()
+    st.stop()
+
+col1, col2, col3 = st.columns(3)
+with col1:
+    start_date = st.date_input("Start Date", datetime.today())
+with col2:
+    horizon = st.number_input("Horizon (days)", min_value=1, max_value=366, value=91)
+with col3:
+    shifts = list(SHIFT_DURATIONS)
+    default_shift = st.selectbox("Baseline shift", shifts, index=shifts.index(DEFAULT_SHIFT))
+selected = st.multiselect("Machines", machines, default=machines)
+
+st.write("### Scenarios")
+st.caption("Each row changes the baseline for one scenario; rows with the same name add up. The weekend is Friday and Saturday.")
+if "what_if_rules" not in st.session_state:
+    st.session_state.what_if_rules = pd.DataFrame([
+        {"scenario": "NS all week", "machine": "All", "days": "All", "shift": "NS", "downtime_hours": 0.0},
+        {"scenario": "ELD weekend", "machine": "All", "days": "Weekend", "shift": "ELD", "downtime_hours": 0.0},
+    ])
+rules = st.data_editor(
+    st.session_state.what_if_rules,
+    num_rows="dynamic",
+    hide_index=True,
+    use_container_width=True,
+    key="what_if_editor",
+    column_config={
+        "scenario": st.column_config.TextColumn("Scenario", required=True),
+        "machine": st.column_config.SelectboxColumn("Machine", options=["All", *machines], default="All"),
+        "days": st.column_config.SelectboxColumn("Days", options=list(DAY_SETS), default="All"),
+        "shift": st.column_config.SelectboxColumn("Shift", options=shifts),
+        "downtime_hours": st.column_config.NumberColumn("Downtime (hrs/day)", min_value=0.0, max_value=24.0, step=0.5, default=0.0),
+    },
+)
+
+if st.button("▶ Run scenarios", disabled=not selected):
+    dates = [start_date + timedelta(days=offset) for offset in range(horizon)]
+    scenarios = scenarios_from_rules(rules, selected, dates, default_shift)
+    with phase("run scenarios"), st.spinner(f"Running {len(scenarios)} scenario(s)..."):
+        comparison, per_machine = run_scenarios(scenarios, load_backlog(tuple(sorted(selected))), dates)
+    st.session_state.what_if = {
+        "scenarios": {scenario.name: scenario for scenario in scenarios},
+        "machines": selected,
+        "dates": dates,
+        "comparison": comparison,
+        "per_machine": per_machine,
+    }
+
+results = st.session_state.get("what_if")
+if results:
+    st.write("### Comparison")
+    st.caption("Best first: earliest completion, then the least work left over, then the fewest idle hours.")
+    st.dataframe(results["comparison"], hide_index=True, use_container_width=True)
+
+    st.write("### Utilization by machine (%)")
+    st.dataframe(
+        results["per_machine"].pivot(index="machine", columns="scenario", values="utilization")[results["comparison"]["scenario"]],
+        use_container_width=True,
+    )
+
+    # Re-run the chosen scenario here; the planner takes it as its working draft
+    names = list(results["comparison"]["scenario"])
+    chosen = st.selectbox("Scenario to use", names)
+    if st.button("⬆ Promote to working draft"):
+        dates = results["dates"]
+        draft = results["scenarios"][chosen].draft(load_backlog(tuple(sorted(results["machines"]))), dates)
+        st.session_state.promoted_draft = {"draft": draft, "start": dates[0], "end": dates[-1]}
+        st.switch_page("pages/plan_schedule.py")
+
+render_profiling_panel()
+finish_rerun()
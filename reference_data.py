@@ -0,0 +1,184 @@
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+
+import pandas as pd
+
+from backlog import BACKLOG_TTL, load_backlog
+from cache import branch_cached
+from db import current_branch, db_connection
+
+_prefetch_pool = ThreadPoolExecutor(max_workers=2, thread_name_prefix="prefetch")
+
+
+@branch_cached("branches")
+def _load_branches(branch=None):
+    with db_connection(branch) as conn, conn.cursor() as cur:
+        cur.execute("SELECT branch_name FROM public.branches")  # Explicit schema
+        return [row[0] for row in cur.fetchall()]
+
+
+def load_branches(branch=None):
+    """Branch names from the branches table; ["main"] (not cached) if it can't be read."""
+    try:
+        return _load_branches(branch=branch)
+    except Exception as e:
+        print(f"❌ Failed to fetch branches: {e}")  # ✅ The app still opens on the main branch
+        return ["main"]
+
+
+@branch_cached("machines")
+def load_machines(branch=None):
+    """Machine names on a branch, sorted."""
+    with db_connection(branch) as conn:
+        machines = pd.read_sql("SELECT name FROM machines ORDER BY name", conn)
+    return machines["name"].tolist()
+
+
+@branch_cached("products")
+def load_products(branch=None):
+    """Products with the pack sizes needed to turn rates into batch times."""
+    with db_connection(branch) as conn:
+        return pd.read_sql("SELECT name, batch_size, units_per_box, primary_units_per_box FROM products", conn)
+
+
+@branch_cached("rates", "machines")
+def load_machine_rates(product, branch=None):
+    """Standard rate and quantity unit of every machine that can run a product."""
+    query = """
+        SELECT r.machine, r.standard_rate, m.qty_uom
+        FROM rates r
+        JOIN machines m ON r.machine = m.name
+        WHERE r.product = %s
+    """
+    with db_connection(branch) as conn:
+        return pd.read_sql(query, conn, params=(product,))
+
+
+def load_unscheduled_batches(branch=None):
+    """Every unscheduled production_plan row on a branch, with a display name per batch.
+
+    Pages that work on a few machines should call `backlog.load_backlog(machines)` instead.
+    """
+    return load_backlog(branch=branch)
+
+
+@branch_cached("rates", "machines")
+def load_rates(branch=None):
+    """Every product's standard rate and quantity unit per machine."""
+    query = """
+        SELECT r.product, r.machine, r.standard_rate, m.qty_uom
+        FROM rates r
+        JOIN machines m ON r.machine = m.name
+    """
+    with db_connection(branch) as conn:
+        return pd.read_sql(query, conn)
+
+
+PLAN_INSTANCE_COLUMNS = [
+    "machine", "date", "shift", "batch_info", "allocated_hours", "utilization", "downtime_type", "downtime_hours", "version",
+]
+RANGE_CHUNK_SIZE = 2000  # Rows per round trip when reading long horizons
+
+
+@branch_cached("plan_instance", ttl=BACKLOG_TTL)
+def load_plan_instance(start, end, machines=None, branch=None):
+    """Saved schedule cells between two dates (inclusive), optionally for a sorted tuple of machines.
+
+    Read through a server-side cursor in chunks: the driver never buffers the whole result, and
+    each chunk becomes a small frame straight away, so only one chunk is held as Python tuples.
+    """
+    query = """
+        SELECT machine, date, shift, batch_info, allocated_hours::FLOAT, utilization::FLOAT,
+               downtime_type, downtime_hours::FLOAT, version
+        FROM plan_instance
+        WHERE date BETWEEN %s AND %s AND (%s::text[] IS NULL OR machine = ANY(%s::text[]))
+        ORDER BY machine, date
+    """
+    machines = list(machines) if machines is not None else None
+    frames = []
+    with db_connection(branch) as conn:
+        with conn.cursor(name="plan_instance_range") as cur:  # ✅ Server-side: rows arrive chunk by chunk
+            cur.itersize = RANGE_CHUNK_SIZE
+            cur.execute(query, (start, end, machines, machines))
+            while True:
+                rows = cur.fetchmany(RANGE_CHUNK_SIZE)
+                if not rows:
+                    break
+                frames.append(pd.DataFrame(rows, columns=PLAN_INSTANCE_COLUMNS))
+    if not frames:
+        return pd.DataFrame(columns=PLAN_INSTANCE_COLUMNS)
+    return pd.concat(frames, ignore_index=True) if len(frames) > 1 else frames[0]
+
+
+@branch_cached("plan_instance", "production_plan", ttl=BACKLOG_TTL)
+def load_saved_allocations(machines=None, branch=None):
+    """Saved allocations (machine, date, batch, percent) of batches still in the unscheduled backlog.
+
+    `machines` is a sorted tuple (None for every machine); pass the schedule's machines so only
+    their rows are read. The batch key is split back into product and batch number, so the
+    backlog lookup can use production_plan_batch_idx.
+    """
+    query = """
+        SELECT p.machine, p.date, a.key AS batch, a.value::FLOAT AS percent
+        FROM plan_instance p
+        CROSS JOIN LATERAL jsonb_each_text(p.batch_info::jsonb) AS a
+        CROSS JOIN LATERAL regexp_match(a.key, '^(.*) - (.*)$') AS k (parts)
+        WHERE (%(machines)s::text[] IS NULL OR p.machine = ANY(%(machines)s::text[]))
+          AND p.batch_info LIKE '{%%' AND p.batch_info <> '{}'
+          AND EXISTS (
+              SELECT 1 FROM production_plan b
+              WHERE b.product = k.parts[1] AND b.batch_number = k.parts[2]
+                AND b.machine = p.machine AND b.schedule = FALSE
+          )
+    """
+    with db_connection(branch) as conn:
+        return pd.read_sql(query, conn, params={"machines": list(machines) if machines is not None else None})
+
+
+def prefetch_plan_instance(start, end, machines=None, branch=None):
+    """Warm the cache with the windows just before and after [start, end] in the background."""
+    branch = branch or current_branch()  # Resolved here: session state isn't visible on the worker thread
+    span = end - start + timedelta(days=1)
+    for offset in (span, -span):
+        _prefetch_pool.submit(_prefetch, start + offset, end + offset, machines, branch)
+
+
+def _prefetch(start, end, machines, branch):
+    try:
+        load_plan_instance(start, end, machines, branch=branch)
+    except Exception as e:
+        print(f"❌ Schedule prefetch failed ({branch} {start}..{end}): {e}")
+
+
+@branch_cached("plan_instance", ttl=BACKLOG_TTL)
+def load_utilization(start, end, branch=None):
+    """Per-machine scheduled days, hours and average utilization between two dates, aggregated in the database."""
+    query = """
+        SELECT machine,
+               COUNT(*) AS days,
+               COALESCE(SUM(allocated_hours), 0)::FLOAT AS allocated_hours,
+               COALESCE(SUM(downtime_hours), 0)::FLOAT AS downtime_hours,
+               ROUND(AVG(utilization), 2)::FLOAT AS avg_utilization
+        FROM plan_instance
+        WHERE date BETWEEN %s AND %s
+        GROUP BY machine
+        ORDER BY machine
+    """
+    with db_connection(branch) as conn:
+        return pd.read_sql(query, conn, params=(start, end))
+
+
+@branch_cached("plan_instance")
+def load_summary(grain, start, end, branch=None):
+    """plan_summary rows of one grain whose period overlaps two dates, with utilization per row."""
+    query = """
+        SELECT period_start, machine, shift, days, shift_hours::FLOAT, allocated_hours::FLOAT, downtime_hours::FLOAT
+        FROM plan_summary
+        WHERE grain = %s AND period_start BETWEEN date_trunc(%s, %s::date)::date AND %s
+        ORDER BY period_start, machine, shift
+    """
+    with db_connection(branch) as conn:
+        summary = pd.read_sql(query, conn, params=(grain, grain, start, end))
+    capacity = (summary["shift_hours"] - summary["downtime_hours"]).clip(lower=0)
+    summary["utilization"] = (summary["allocated_hours"] / capacity.where(capacity > 0) * 100).round(2)
+    return summary
@@ -0,0 +1,86 @@
+import pandas as pd
+
+from schedule_model import DOWNTIME_TYPES, SHIFT_DURATIONS, DayPlan
+
+
+def date_labels(dates):
+    return [date.strftime("%Y-%m-%d") for date in dates]
+
+
+def shift_grid(schedule, machines, dates):
+    """Machine × date shift codes (blank where no shift is set)."""
+    rows = []
+    for machine in machines:
+        row = {"Machine": machine}
+        for date, label in zip(dates, date_labels(dates)):
+            day = schedule.get_day(machine, date)
+            row[label] = day.shift if day is not None else None
+        rows.append(row)
+    return pd.DataFrame(rows, columns=["Machine"] + date_labels(dates))
+
+
+def downtime_grid(schedule, machines, dates):
+    """Machine × date downtime hours."""
+    rows = []
+    for machine in machines:
+        row = {"Machine": machine}
+        for date, label in zip(dates, date_labels(dates)):
+            day = schedule.get_day(machine, date)
+            row[label] = day.downtime_hours if day is not None else 0.0
+        rows.append(row)
+    return pd.DataFrame(rows, columns=["Machine"] + date_labels(dates))
+
+
+def allocation_grid(schedule, machines, dates):
+    """(machine, batch) × date percentages for every batch that is open or allocated in range."""
+    labels = date_labels(dates)
+    rows = []
+    for machine in machines:
+        days = [schedule.get_day(machine, date) or DayPlan() for date in dates]
+        in_range = {batch for day in days for batch in day.allocations}
+        for batch in schedule.batches(machine):
+            record = schedule.batch(machine, batch)
+            if record.total_allocated >= 100 and batch not in in_range:
+                continue  # Fully placed outside this range; nothing to edit here
+            row = {"Machine": machine, "Batch": batch, "Total %": record.total_allocated}
+            row.update({label: day.allocations.get(batch, 0) for label, day in zip(labels, days)})
+            rows.append(row)
+    return pd.DataFrame(rows, columns=["Machine", "Batch", "Total %"] + date_labels(dates))
+
+
+def apply_grid_edits(schedule, kind, frame, edited_rows, dates):
+    """Apply a data_editor `edited_rows` delta ({row: {column: value}}) to the schedule.
+
+    Only the edited cells are touched. Returns warnings for values that had to be adjusted.
+    """
+    by_label = dict(zip(date_labels(dates), dates))
+    warnings = []
+
+    for row_position, changes in edited_rows.items():
+        row = frame.iloc[int(row_position)]
+        machine = row["Machine"]
+        for label, value in changes.items():
+            date = by_label.get(label)
+            if date is None:
+                continue  # Read-only columns
+
+            if kind == "shift":
+                if value in SHIFT_DURATIONS:
+                    schedule.set_shift(machine, date, value)
+            elif kind == "downtime":
+                hours = float(value or 0)
+                if hours > 0:
+                    day = schedule.day(machine, date)
+                    schedule.set_downtime(machine, date, day.downtime_type or DOWNTIME_TYPES[0], hours)
+                else:
+                    schedule.clear_downtime(machine, date)
+            elif kind == "allocation":
+                batch = row["Batch"]
+                current = schedule.day(machine, date).allocations.get(batch, 0)
+                available = 100 - schedule.total_allocated(machine, batch) + current
+                percent = max(int(value or 0), 0)
+                if percent > available:
+                    warnings.append(f"{batch} on {machine} {label}: only {available}% left, capped.")
+                    percent = available
+                schedule.set_allocation(machine, date, batch, percent)
+    return warnings
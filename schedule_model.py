@@ -0,0 +1,406 @@
+import datetime
+import hashlib
+import json
+
+import pandas as pd
+
+# Shift durations in hours
+SHIFT_DURATIONS = {"LD": 11, "NS": 22, "ND": 9, "ELD": 15}
+DOWNTIME_TYPES = ["Cleaning", "Preventive Maintenance", "Calibration"]
+MAX_DOWNTIME_HOURS = 24
+
+
+def day_capacity(shift, downtime_hours=0.0):
+    """Hours a machine can run on a day: shift hours minus downtime, never negative."""
+    return max(SHIFT_DURATIONS.get(shift, 0) - (downtime_hours or 0.0), 0.0)
+
+
+class BatchRecord:
+    """One unscheduled production_plan row, with running allocation totals."""
+
+    __slots__ = ("id", "machine", "name", "hours", "progress", "total_allocated", "days")
+
+    def __init__(self, machine, name, hours=0.0, progress=0, id=None):
+        self.id = id
+        self.machine = machine
+        self.name = name  # "<product> - <batch_number>"
+        self.hours = hours  # hours to run 100% of the batch on this machine
+        self.progress = progress
+        self.total_allocated = 0  # % allocated across all days
+        self.days = set()  # dates the batch is allocated on
+
+    @property
+    def available(self):
+        return 100 - self.total_allocated
+
+    @property
+    def progress_remaining(self):
+        return self.progress - self.total_allocated
+
+
+class DayPlan:
+    """What one machine runs on one date."""
+
+    __slots__ = ("shift", "allocations", "allocated_hours", "downtime_type", "downtime_hours")
+
+    def __init__(self, shift=None):
+        self.shift = shift
+        self.allocations = {}  # batch display name -> % of the batch run that day
+        self.allocated_hours = 0.0  # kept in step with allocations
+        self.downtime_type = None
+        self.downtime_hours = 0.0
+
+    def is_empty(self):
+        return not self.allocations and not self.downtime_hours
+
+
+class ScheduleModel:
+    """Machine × date × batch allocations for one planning session.
+
+    Holds plain values only (shift codes, percentages, hours); HTML is produced
+    by schedule_render at display time.
+    """
+
+    def __init__(self):
+        self.days = {}  # (machine, datetime.date) -> DayPlan
+        self.batch_index = {}  # machine -> {display name: BatchRecord}
+        self._open = {}  # machine -> {display name: BatchRecord} with less than 100% allocated
+        self.versions = {}  # (machine, date) -> plan_instance version the cell was loaded or last saved at
+        self._dirty = set()  # (machine, date) cells edited since they were loaded or saved
+        self.revision = 0  # Bumped on every change, so autosave can skip drafts that didn't change
+
+    # --- Backlog ---------------------------------------------------------
+
+    def register_batches(self, machine, batches):
+        """Index a machine's backlog (id, display_name, time, progress) by display name.
+
+        Re-registering updates run times and re-derives only the days those batches are on; batches
+        that have left the backlog are dropped unless they are still allocated somewhere. Pass the
+        machine's whole backlog (an empty frame if it has none).
+        """
+        ids = batches["id"] if "id" in batches else [None] * len(batches)
+        for batch_id, batch, hours, progress in zip(ids, batches["display_name"], batches["time"], batches["progress"]):
+            hours = float(hours) if pd.notna(hours) else 0.0
+            record = self._record(machine, batch)
+            if record.id != batch_id or (record.progress != progress and not (pd.isna(record.progress) and pd.isna(progress))):
+                record.id, record.progress = batch_id, progress
+                self.revision += 1
+            if record.hours != hours:
+                old_hours, record.hours = record.hours, hours
+                for date in record.days:
+                    day = self.days[(machine, date)]
+                    day.allocated_hours += (hours - old_hours) * day.allocations[batch] / 100
+                    self._dirty.add((machine, date))  # Saved hours are stale
+                self.revision += 1
+
+        listed = set(batches["display_name"])
+        records = self.batch_index.get(machine, {})
+        for batch in [batch for batch, record in records.items() if batch not in listed and not record.days]:
+            del records[batch]
+            self._open.get(machine, {}).pop(batch, None)
+            self.revision += 1
+
+    def _record(self, machine, batch):
+        records = self.batch_index.setdefault(machine, {})
+        record = records.get(batch)
+        if record is None:
+            record = records[batch] = BatchRecord(machine, batch)
+            self.revision += 1
+            self._open.setdefault(machine, {})[batch] = record
+        return record
+
+    def batch(self, machine, batch):
+        """BatchRecord for a display name, or None."""
+        return self.batch_index.get(machine, {}).get(batch)
+
+    def batches(self, machine):
+        return list(self.batch_index.get(machine, {}))
+
+    def open_batches(self, machine):
+        """Batches on a machine that still have something left to allocate."""
+        return list(self._open.get(machine, {}))
+
+    # --- Edits -----------------------------------------------------------
+
+    def day(self, machine, date):
+        """DayPlan for a machine and date, created on first access."""
+        key = (machine, date)
+        if key not in self.days:
+            self.days[key] = DayPlan()
+            self.revision += 1
+        return self.days[key]
+
+    def get_day(self, machine, date):
+        return self.days.get((machine, date))
+
+    def set_shift(self, machine, date, shift):
+        if shift not in SHIFT_DURATIONS:
+            raise ValueError(f"Unknown shift: {shift}")
+        day = self.day(machine, date)
+        if day.shift != shift:
+            day.shift = shift
+            self._dirty.add((machine, date))
+            self.revision += 1
+
+    def set_allocation(self, machine, date, batch, percent):
+        """Allocate `percent` of a batch to a day; 0 removes the allocation."""
+        self._apply(machine, date, batch, max(percent, 0))
+
+    def remove_allocation(self, machine, date, batch):
+        if (machine, date) in self.days:
+            self._apply(machine, date, batch, 0)
+
+    def _apply(self, machine, date, batch, percent):
+        # Every allocation change goes through here so day and batch totals stay in step
+        day = self.day(machine, date)
+        record = self._record(machine, batch)
+        delta = percent - day.allocations.get(batch, 0)
+        if delta == 0:
+            return
+
+        if percent:
+            day.allocations[batch] = percent
+            record.days.add(date)
+        else:
+            del day.allocations[batch]
+            record.days.discard(date)
+        day.allocated_hours = day.allocated_hours + record.hours * delta / 100 if day.allocations else 0.0  # No float drift on empty days
+        record.total_allocated += delta
+        self._dirty.add((machine, date))
+        self.revision += 1
+
+        open_batches = self._open.setdefault(machine, {})
+        if record.total_allocated < 100:
+            open_batches[batch] = record
+        else:
+            open_batches.pop(batch, None)
+
+    def set_downtime(self, machine, date, downtime_type, hours):
+        day = self.day(machine, date)
+        hours = float(min(hours, MAX_DOWNTIME_HOURS))
+        if (day.downtime_type, day.downtime_hours) != (downtime_type, hours):
+            day.downtime_type = downtime_type
+            day.downtime_hours = hours
+            self._dirty.add((machine, date))
+            self.revision += 1
+
+    def clear_downtime(self, machine, date):
+        day = self.get_day(machine, date)
+        if day is not None and (day.downtime_type is not None or day.downtime_hours):
+            day.downtime_type = None
+            day.downtime_hours = 0.0
+            self._dirty.add((machine, date))
+            self.revision += 1
+
+    def drop_machine(self, machine):
+        for key in [key for key in self.days if key[0] == machine]:
+            for batch in list(self.days[key].allocations):
+                self._apply(machine, key[1], batch, 0)
+            del self.days[key]
+            self._dirty.discard(key)  # Never saved from here on; existing plan_instance rows are kept
+            self.revision += 1
+
+    # --- Change tracking -------------------------------------------------
+
+    def is_dirty(self, machine, date):
+        return (machine, date) in self._dirty
+
+    def dirty_cells(self, machines=None, dates=None):
+        """(machine, date) cells edited since they were loaded or saved, in order."""
+        return sorted(key for key, _ in self._select(machines, dates) if key in self._dirty)
+
+    def mark_saved(self, versions, rows=None):
+        """Record the plan_instance versions of cells that were just written and mark them clean.
+
+        With `rows` (the `to_rows()` output that was saved), cells edited again since then stay dirty.
+        """
+        current = {(row[0], row[1]): row for row in self.to_rows(changed_only=True)} if rows is not None else {}
+        sent = {(row[0], row[1]): row for row in rows or []}
+        for key, version in versions.items():
+            self.versions[key] = version
+            if rows is None or current.get(key) == sent.get(key):
+                self._dirty.discard(key)
+        self.revision += 1
+
+    def load_saved(self, cells, replace_dirty=False):
+        """Hydrate cells from plan_instance rows (machine, date, shift, batch_info, downtime_type,
+        downtime_hours, version); they come in clean, at their saved version.
+
+        Cells with unsaved edits are left alone unless `replace_dirty`. Returns the number loaded.
+        Register the machines' backlogs first so allocations get their run times.
+        """
+        loaded = 0
+        for machine, date, shift, batch_info, downtime_type, downtime_hours, version in cells:
+            key = (machine, date)
+            if key in self._dirty and not replace_dirty:
+                continue
+            try:
+                allocations = json.loads(batch_info) if batch_info else {}
+            except (TypeError, ValueError):  # Rows saved as HTML before migration 001
+                allocations = {}
+
+            day = self.day(machine, date)
+            for batch in [batch for batch in day.allocations if batch not in allocations]:
+                self._apply(machine, date, batch, 0)
+            for batch, percent in allocations.items():
+                self._apply(machine, date, batch, int(percent))
+            day.shift = shift if shift in SHIFT_DURATIONS else None
+            day.downtime_type = downtime_type if downtime_hours else None
+            day.downtime_hours = float(downtime_hours or 0.0)
+
+            self.versions[key] = version
+            self._dirty.discard(key)
+            loaded += 1
+        self.revision += 1
+        return loaded
+
+    def discard_changes(self, cells):
+        """Stop tracking edits to `cells` (e.g. after choosing to keep someone else's saved version)."""
+        self._dirty.difference_update(cells)
+        self.revision += 1
+
+    # --- Derived values --------------------------------------------------
+
+    def machines(self):
+        return sorted({machine for machine, _ in self.days})
+
+    def total_allocated(self, machine, batch):
+        """% of a batch allocated across every day on a machine."""
+        record = self.batch(machine, batch)
+        return record.total_allocated if record is not None else 0
+
+    def allocated_hours(self, machine, date):
+        day = self.get_day(machine, date)
+        return day.allocated_hours if day is not None else 0.0
+
+    def capacity(self, machine, date):
+        """Hours the machine can run that day: shift hours minus downtime."""
+        day = self.get_day(machine, date)
+        return day_capacity(day.shift, day.downtime_hours) if day is not None else 0.0
+
+    def utilization(self, machine, date):
+        """Allocated hours as a % of the day's effective capacity (shift hours minus downtime)."""
+        capacity = self.capacity(machine, date)
+        return self.allocated_hours(machine, date) / capacity * 100 if capacity > 0 else 0.0
+
+    # --- Tabular views ---------------------------------------------------
+
+    def to_frame(self, machines=None, dates=None):
+        """One row per (machine, date) with numeric columns, sorted by machine and date."""
+        records = [
+            {
+                "machine": machine,
+                "date": date,
+                "shift": day.shift,
+                "shift_hours": SHIFT_DURATIONS.get(day.shift, 0),
+                "capacity_hours": day_capacity(day.shift, day.downtime_hours),
+                "allocated_hours": self.allocated_hours(machine, date),
+                "utilization": self.utilization(machine, date),
+                "downtime_type": day.downtime_type,
+                "downtime_hours": day.downtime_hours,
+            }
+            for (machine, date), day in self._select(machines, dates)
+        ]
+        columns = ["machine", "date", "shift", "shift_hours", "capacity_hours", "allocated_hours", "utilization", "downtime_type", "downtime_hours"]
+        return pd.DataFrame(records, columns=columns).sort_values(["machine", "date"], ignore_index=True)
+
+    def allocations_frame(self, machines=None, dates=None):
+        """One row per (machine, date, batch) allocation."""
+        records = [
+            (machine, date, batch, percent, self.batch_index[machine][batch].hours * percent / 100)
+            for (machine, date), day in self._select(machines, dates)
+            for batch, percent in day.allocations.items()
+        ]
+        return pd.DataFrame(records, columns=["machine", "date", "batch", "percent", "hours"])
+
+    def to_rows(self, machines=None, dates=None, changed_only=False):
+        """plan_instance rows: (machine, date, shift, batch_info, allocated_hours, utilization, downtime_type, downtime_hours).
+
+        With `changed_only`, just the cells edited since they were loaded or saved.
+        """
+        return [
+            (
+                machine,
+                date,
+                day.shift,
+                json.dumps(day.allocations),
+                round(self.allocated_hours(machine, date), 2),
+                round(self.utilization(machine, date), 2),
+                day.downtime_type,
+                day.downtime_hours,
+            )
+            for (machine, date), day in self._select(machines, dates)
+            if not changed_only or (machine, date) in self._dirty
+        ]
+
+    def content_hash(self, machines=None, dates=None):
+        """Stable digest of everything that shows up in a rendered view of these cells."""
+        digest = hashlib.blake2b(digest_size=16)
+        for (machine, date), day in sorted(self._select(machines, dates), key=lambda item: item[0]):
+            digest.update(repr((
+                machine, date, day.shift, sorted(day.allocations.items()),
+                round(day.allocated_hours, 4), day.downtime_type, day.downtime_hours,
+            )).encode())
+        return digest.hexdigest()
+
+    # --- Persistence -----------------------------------------------------
+
+    def to_state(self):
+        """Plain JSON-safe snapshot of everything in the model (see drafts.py)."""
+        return {
+            "batches": {
+                machine: [
+                    [name, float(record.hours), _plain(record.progress), _plain(record.id)]
+                    for name, record in records.items()
+                ]
+                for machine, records in self.batch_index.items()
+            },
+            "days": [
+                [machine, date.isoformat(), day.shift, day.allocations, day.downtime_type, day.downtime_hours]
+                for (machine, date), day in self.days.items()
+            ],
+            "versions": [[machine, date.isoformat(), version] for (machine, date), version in self.versions.items()],
+            "dirty": [[machine, date.isoformat()] for machine, date in self._dirty],
+        }
+
+    @classmethod
+    def from_state(cls, state):
+        """Rebuild a model from `to_state()` output; totals are re-derived, not stored."""
+        schedule = cls()
+        for machine, records in state["batches"].items():
+            for name, hours, progress, batch_id in records:
+                record = schedule._record(machine, name)
+                record.hours, record.progress, record.id = hours, progress, batch_id
+        for machine, date, shift, allocations, downtime_type, downtime_hours in state["days"]:
+            date = datetime.date.fromisoformat(date)
+            day = schedule.day(machine, date)
+            day.shift, day.downtime_type, day.downtime_hours = shift, downtime_type, downtime_hours
+            for batch, percent in allocations.items():
+                schedule._apply(machine, date, batch, percent)
+        schedule.versions = {(machine, datetime.date.fromisoformat(date)): version for machine, date, version in state["versions"]}
+        schedule._dirty = {(machine, datetime.date.fromisoformat(date)) for machine, date in state["dirty"]}
+        return schedule
+
+    def _select(self, machines=None, dates=None):
+        if machines is not None and dates is not None:
+            # Direct lookups: cost follows the requested cells, not the size of the model
+            dates = list(dict.fromkeys(dates))
+            for machine in dict.fromkeys(machines):
+                for date in dates:
+                    day = self.days.get((machine, date))
+                    if day is not None:
+                        yield (machine, date), day
+            return
+
+        machines = set(machines) if machines is not None else None
+        dates = set(dates) if dates is not None else None
+        for (machine, date), day in self.days.items():
+            if (machines is None or machine in machines) and (dates is None or date in dates):
+                yield (machine, date), day
+
+
+def _plain(value):
+    # numpy / Decimal scalars from DataFrames -> JSON numbers
+    if value is None or isinstance(value, (int, float)):
+        return value
+    return value.item() if hasattr(value, "item") else float(value)
@@ -0,0 +1,73 @@
+from html import escape
+
+import numpy as np
+import pandas as pd
+
+from cache import TTLCache
+
+# Rendered consolidated tables by content hash; identical schedules share an entry
+_html_cache = TTLCache(maxsize=64, ttl=None)
+
+
+def _cells(schedule, machines, dates):
+    """(machine, date) -> cell HTML, built column-wise over the whole schedule at once."""
+    days = schedule.to_frame(machines, dates)
+    if days.empty:
+        return pd.Series(dtype=object)
+
+    allocations = schedule.allocations_frame(machines, dates)
+    if allocations.empty:  # Shifts or downtime only
+        batches = pd.Series(dtype=object)
+    else:
+        allocations["html"] = (
+            allocations["batch"].map(escape) + " - <span style='color:green;'>"
+            + allocations["percent"].astype(str) + "%</span><br>"
+        )
+        # String sum runs in the groupby kernel; drop the trailing separator afterwards
+        batches = allocations.groupby(["machine", "date"], sort=False)["html"].sum().str[:-len("<br>")]
+
+    days = days.set_index(["machine", "date"])
+    shift = np.where(days["shift"].notna(), "<b style='color:red;'>" + days["shift"].fillna("") + "</b>", "")
+    utilization = np.char.mod("Util= %.2f%%", days["utilization"].to_numpy(dtype=float))
+    has_downtime = days["downtime_hours"].to_numpy(dtype=float) > 0
+    downtime = np.where(
+        has_downtime,
+        "<span style='color:purple;'>" + days["downtime_type"].fillna("").map(escape)
+        + " (" + days["downtime_hours"].astype(str) + " hrs)</span>",
+        "",
+    )
+
+    batch_html = batches.reindex(days.index, fill_value="").to_numpy(dtype=str)
+    html = np.char.add(np.char.add(np.char.add(shift.astype(str), "<br>"), batch_html), "<br>")
+    html = np.char.add(np.char.add(np.char.add(html, utilization), "<br>"), downtime.astype(str))
+    return pd.Series(html, index=days.index, dtype=object)
+
+
+def render_consolidated_html(schedule, machines, dates):
+    """Machine × date HTML table for a ScheduleModel, memoized on the schedule's content."""
+    machines, dates = list(machines), list(dates)
+    key = (schedule.content_hash(machines, dates), tuple(machines), tuple(dates))
+    html = _html_cache.get(key)
+    if html is not None:
+        return html
+
+    labels = [date.strftime("%Y-%m-%d") for date in dates]
+    cells = _cells(schedule, machines, dates)
+    if cells.empty:
+        table = np.full((len(machines), len(dates)), "", dtype=object)
+    else:
+        table = cells.unstack("date").reindex(index=machines, columns=dates).fillna("").to_numpy(dtype=object)
+
+    html = _table_html(["Machine"] + labels, [[escape(machine)] + list(row) for machine, row in zip(machines, table)])
+    _html_cache.set(key, html)
+    return html
+
+
+def _table_html(header, rows):
+    # Same markup as DataFrame.to_html(escape=False, index=False), without its per-cell formatting pass
+    head = "".join(f"<th>{escape(label)}</th>" for label in header)
+    body = "".join("<tr><td>" + "</td><td>".join(row) + "</td></tr>" for row in rows)
+    return (
+        '<table border="1" class="dataframe"><thead><tr style="text-align: right;">'
+        f"{head}</tr></thead><tbody>{body}</tbody></table>"
+    )
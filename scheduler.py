@@ -0,0 +1,50 @@
+import math
+
+from schedule_model import ScheduleModel, day_capacity
+
+DEFAULT_SHIFT = "LD"
+
+
+def auto_schedule(batches, dates, shifts=None, downtime=None, default_shift=DEFAULT_SHIFT):
+    """Fill machines from the unscheduled backlog, earliest batch first.
+
+    `batches` is `load_unscheduled_batches()` output (id, display_name, machine, time, progress).
+    `shifts` maps (machine, date) or machine -> shift code; `downtime` maps (machine, date) ->
+    (type, hours). Batches are split across days in whole percents, never beyond 100%, and a
+    day never gets more work than its shift capacity. Returns a ScheduleModel draft.
+    """
+    shifts = shifts or {}
+    downtime = downtime or {}
+    dates = sorted(dates)
+    schedule = ScheduleModel()
+
+    for machine, machine_batches in batches.sort_values("id").groupby("machine", sort=True):
+        schedule.register_batches(machine, machine_batches)
+        queue = [
+            [name, float(hours)]
+            for name, hours in zip(machine_batches["display_name"], machine_batches["time"])
+            if hours and hours > 0  # Batches without a run time can't be placed
+        ]
+        position, remaining = 0, 100  # Current batch and the % of it still to place
+
+        for date in dates:
+            shift = shifts.get((machine, date), shifts.get(machine, default_shift))
+            schedule.set_shift(machine, date, shift)
+            dt_type, dt_hours = downtime.get((machine, date), (None, 0.0))
+            if dt_hours:
+                schedule.set_downtime(machine, date, dt_type, dt_hours)
+
+            capacity = day_capacity(shift, dt_hours)
+            while position < len(queue) and capacity > 0:
+                name, hours = queue[position]
+                percent = min(remaining, math.floor(capacity / hours * 100))
+                if percent <= 0:
+                    break  # Less than 1% of the next batch fits; move to the next day
+
+                schedule.set_allocation(machine, date, name, percent)
+                capacity -= hours * percent / 100
+                remaining -= percent
+                if remaining == 0:
+                    position, remaining = position + 1, 100
+
+    return schedule
@@ -0,0 +1,137 @@
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field
+
+import pandas as pd
+
+from scheduler import DEFAULT_SHIFT, auto_schedule
+
+SIMULATION_WORKERS = max((os.cpu_count() or 2) - 1, 1)  # Leave a core for the app itself
+WEEKEND_DAYS = (4, 5)  # Friday and Saturday (date.weekday())
+DAY_SETS = {
+    "All": None,
+    "Weekdays": tuple(day for day in range(7) if day not in WEEKEND_DAYS),
+    "Weekend": WEEKEND_DAYS,
+}
+COMPARISON_COLUMNS = [
+    "scenario", "completion_date", "batches_done", "batches_left", "remaining_hours",
+    "capacity_hours", "allocated_hours", "idle_hours", "utilization",
+]
+BACKLOG_COLUMNS = ["id", "display_name", "machine", "time", "progress"]
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+@dataclass
+class Scenario:
+    """A shift-pattern / downtime variant to run the backlog against."""
+    name: str
+    shifts: dict = field(default_factory=dict)  # (machine, date) or machine -> shift code
+    downtime: dict = field(default_factory=dict)  # (machine, date) -> (type, hours)
+    default_shift: str = DEFAULT_SHIFT
+
+    def draft(self, backlog, dates):
+        """The ScheduleModel auto_schedule builds for this scenario."""
+        return auto_schedule(backlog, dates, shifts=self.shifts, downtime=self.downtime, default_shift=self.default_shift)
+
+
+def _cell(value):
+    """A rule cell as a string, or None when it is blank (the editor gives None, NaN or "")."""
+    return value.strip() or None if isinstance(value, str) else None
+
+
+def scenarios_from_rules(rules, machines, dates, default_shift=DEFAULT_SHIFT):
+    """A baseline plus one Scenario per name in `rules` (scenario, machine, days, shift, downtime_hours).
+
+    `machine` is a machine name or "All", `days` a DAY_SETS key; blank machine and days cells mean
+    "All", a blank shift keeps the baseline shift. A scenario's rules apply in order.
+    """
+    scenarios = {"Baseline": Scenario("Baseline", default_shift=default_shift)}
+    for rule in rules.itertuples(index=False):
+        name = _cell(rule.scenario)
+        if name is None:
+            continue
+        scenario = scenarios.setdefault(name, Scenario(name, default_shift=default_shift))
+        weekdays = DAY_SETS.get(_cell(rule.days) or "All")
+        machine, shift = _cell(rule.machine), _cell(rule.shift)
+        targets = machines if machine in (None, "All") else [machine]
+        hours = float(rule.downtime_hours) if pd.notna(rule.downtime_hours) else 0.0
+        for date in dates:
+            if weekdays is not None and date.weekday() not in weekdays:
+                continue
+            for target in targets:
+                if shift:
+                    scenario.shifts[(target, date)] = shift
+                if hours > 0:
+                    scenario.downtime[(target, date)] = ("Preventive Maintenance", hours)
+    return list(scenarios.values())
+
+
+def evaluate(scenario, backlog, dates):
+    """Schedule the backlog under one scenario; returns (comparison row, per-machine frame)."""
+    draft = scenario.draft(backlog, dates)
+    days = draft.to_frame()
+    allocations = draft.allocations_frame()
+
+    machines = days.groupby("machine", as_index=False)[["capacity_hours", "allocated_hours"]].sum()
+    last_day = allocations.groupby("machine")["date"].max().rename("last_allocated")
+    machines = machines.merge(last_day, left_on="machine", right_index=True, how="left")
+    machines["idle_hours"] = (machines["capacity_hours"] - machines["allocated_hours"]).clip(lower=0)
+    machines["utilization"] = machines["allocated_hours"] / machines["capacity_hours"].where(machines["capacity_hours"] > 0) * 100
+
+    # Batches that can be placed at all, and how much of each the horizon took
+    placeable = backlog[backlog["time"].fillna(0) > 0][["machine", "display_name", "time"]]
+    allocated = allocations.groupby(["machine", "batch"], as_index=False)["percent"].sum()
+    placeable = placeable.merge(allocated, left_on=["machine", "display_name"], right_on=["machine", "batch"], how="left")
+    left = placeable["percent"].fillna(0) < 100
+    remaining_hours = (placeable["time"] * (100 - placeable["percent"].fillna(0)).clip(lower=0) / 100).sum()
+
+    capacity, used = machines["capacity_hours"].sum(), machines["allocated_hours"].sum()
+    row = {
+        "scenario": scenario.name,
+        "completion_date": allocations["date"].max() if not left.any() and not allocations.empty else None,
+        "batches_done": int((~left).sum()),
+        "batches_left": int(left.sum()),
+        "remaining_hours": round(float(remaining_hours), 2),
+        "capacity_hours": round(float(capacity), 2),
+        "allocated_hours": round(float(used), 2),
+        "idle_hours": round(float(machines["idle_hours"].sum()), 2),
+        "utilization": round(float(used / capacity * 100), 2) if capacity else 0.0,
+    }
+    return row, machines.round(2).assign(scenario=scenario.name)
+
+
+def _get_pool():
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            # Spawned, not forked: the app process has server and pool threads that mustn't be copied
+            _pool = ProcessPoolExecutor(max_workers=SIMULATION_WORKERS, mp_context=multiprocessing.get_context("spawn"))
+        return _pool
+
+
+def run_scenarios(scenarios, backlog, dates, parallel=True):
+    """Evaluate scenarios in parallel worker processes; returns (comparison, per-machine frame).
+
+    `comparison` has one row per scenario (COMPARISON_COLUMNS), best first: the earliest
+    completion, then the least work left over, then the fewest idle hours.
+    """
+    backlog = backlog[BACKLOG_COLUMNS]
+    dates = sorted(dates)
+    if not parallel or SIMULATION_WORKERS == 1 or len(scenarios) <= 1:
+        results = [evaluate(scenario, backlog, dates) for scenario in scenarios]
+    else:
+        pool = _get_pool()
+        futures = [pool.submit(evaluate, scenario, backlog, dates) for scenario in scenarios]
+        results = [future.result() for future in futures]
+
+    comparison = pd.DataFrame([row for row, _ in results], columns=COMPARISON_COLUMNS)
+    comparison = comparison.sort_values(
+        ["completion_date", "remaining_hours", "idle_hours"], na_position="last", ignore_index=True,
+        key=lambda column: pd.to_datetime(column) if column.name == "completion_date" else column,
+    )
+    machines = pd.concat([frame for _, frame in results], ignore_index=True) if results else pd.DataFrame()
+    return comparison, machines
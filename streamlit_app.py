@@ -1,15 +1,23 @@
 import streamlit as st
 from auth import authenticate_user
-from db import get_branches
+from instrumentation import start_rerun, finish_rerun, phase, render_profiling_panel
+from warmup import render_readiness, start_warmup
+
+start_rerun("Home")
+start_warmup()  # ✅ Once per process: pools, lookups and planning code warm up while the user logs in
 
 # Authenticate the user
-user_info = authenticate_user()
+with phase("authenticate"):
+    user_info = authenticate_user()
 
 if user_info:
     st.sidebar.header("Branch Selection")
     
     # Get available branches from the database
-    branches = get_branches()
+    with phase("load branches"):
+        from reference_data import load_branches  # Imported after login: pulls in pandas, which the login form doesn't need
+
+        branches = load_branches()
     
     # Allow only admin to select branches
     if user_info["role"] == "admin":
@@ -17,6 +25,9 @@ if user_info:
         st.session_state["branch"] = selected_branch  # Store selected branch
         st.sidebar.success(f"Working on branch: {selected_branch}")
 
+    render_readiness()
+    render_profiling_panel()
+
     # Main Navigation
     st.title("Production Planning App")
 
@@ -29,6 +40,7 @@ if user_info:
         "Go to:", 
         ["Production Plan", "Plan Scheduler", "Reports", "Logout"]
     )
+    finish_rerun()  # Every choice below reruns the script
 
     # Set session state instead of query params
     if page == "Production Plan":
@@ -46,3 +58,6 @@ if user_info:
     elif page == "Logout":
         st.session_state.clear()  # Reset session
         st.rerun()
+
+else:
+    finish_rerun()  # Login form shown
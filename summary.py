@@ -0,0 +1,117 @@
+import pandas as pd
+from psycopg2.extras import execute_values
+
+from schedule_model import SHIFT_DURATIONS
+
+GRAINS = ("day", "week", "month")
+SUMMARY_COLUMNS = ["grain", "period_start", "machine", "shift", "days", "shift_hours", "allocated_hours", "downtime_hours"]
+_MEASURES = ["days", "shift_hours", "allocated_hours", "downtime_hours"]
+
+SUMMARY_DELTA_UPSERT = """
+    INSERT INTO plan_summary (grain, period_start, machine, shift, days, shift_hours, allocated_hours, downtime_hours)
+    VALUES %s
+    ON CONFLICT (grain, period_start, machine, shift) DO UPDATE
+    SET days = plan_summary.days + EXCLUDED.days,
+        shift_hours = plan_summary.shift_hours + EXCLUDED.shift_hours,
+        allocated_hours = plan_summary.allocated_hours + EXCLUDED.allocated_hours,
+        downtime_hours = plan_summary.downtime_hours + EXCLUDED.downtime_hours
+    RETURNING grain, period_start, machine, shift, days
+"""
+
+EMPTY_GROUPS_DELETE = """
+    DELETE FROM plan_summary s
+    USING (VALUES %s) AS gone (grain, period_start, machine, shift)
+    WHERE s.grain = gone.grain AND s.period_start = gone.period_start::date
+      AND s.machine = gone.machine AND s.shift = gone.shift AND s.days <= 0
+"""
+
+
+def _shift_hours_sql():
+    cases = " ".join(f"WHEN '{shift}' THEN {hours}" for shift, hours in SHIFT_DURATIONS.items())
+    return f"CASE shift {cases} ELSE 0 END"
+
+
+REBUILD_SUMMARY = f"""
+    DELETE FROM plan_summary;
+    INSERT INTO plan_summary (grain, period_start, machine, shift, days, shift_hours, allocated_hours, downtime_hours)
+    SELECT g.grain, date_trunc(g.grain, p.date)::date, p.machine, COALESCE(p.shift, ''),
+           COUNT(*), SUM({_shift_hours_sql()}), COALESCE(SUM(p.allocated_hours), 0), COALESCE(SUM(p.downtime_hours), 0)
+    FROM plan_instance p
+    CROSS JOIN (VALUES ('day'), ('week'), ('month')) AS g (grain)
+    GROUP BY 1, 2, 3, 4;
+"""
+
+
+def period_starts(dates, grain):
+    """First day of the day/week (Monday)/month period each date falls in."""
+    dates = pd.to_datetime(pd.Series(dates))
+    if grain == "week":
+        dates = dates - pd.to_timedelta(dates.dt.weekday, unit="D")
+    elif grain == "month":
+        dates = dates.dt.to_period("M").dt.start_time
+    elif grain != "day":
+        raise ValueError(f"Unknown grain: {grain}")
+    return dates.dt.date
+
+
+def _cells_frame(cells):
+    frame = pd.DataFrame(cells, columns=["machine", "date", "shift", "allocated_hours", "downtime_hours"])
+    frame["shift"] = frame["shift"].fillna("")
+    frame["days"] = 1
+    frame["shift_hours"] = frame["shift"].map(SHIFT_DURATIONS).fillna(0).astype(float)
+    frame["allocated_hours"] = pd.to_numeric(frame["allocated_hours"], errors="coerce").fillna(0).astype(float)
+    frame["downtime_hours"] = pd.to_numeric(frame["downtime_hours"], errors="coerce").fillna(0).astype(float)
+    return frame
+
+
+def summary_deltas(old_cells, new_cells):
+    """Changes to apply to plan_summary when `old_cells` are replaced by `new_cells`.
+
+    Cells are (machine, date, shift, allocated_hours, downtime_hours). Returns plan_summary
+    rows whose measures are signed differences, one per touched (grain, period, machine, shift).
+    """
+    old = _cells_frame(old_cells)
+    old[_MEASURES] = -old[_MEASURES]
+    cells = pd.concat([old, _cells_frame(new_cells)], ignore_index=True)
+    if cells.empty:
+        return []
+
+    deltas = []
+    for grain in GRAINS:
+        grouped = (
+            cells.assign(grain=grain, period_start=period_starts(cells["date"], grain))
+            .groupby(["grain", "period_start", "machine", "shift"], as_index=False)[_MEASURES].sum()
+        )
+        deltas.append(grouped)
+    deltas = pd.concat(deltas, ignore_index=True)
+    deltas["shift_hours"] = deltas["shift_hours"].round(2)
+    deltas["allocated_hours"] = deltas["allocated_hours"].round(2)
+    deltas["downtime_hours"] = deltas["downtime_hours"].round(2)
+
+    changed = deltas[_MEASURES].ne(0).any(axis=1)  # Re-saving an unchanged cell is a no-op
+    deltas = deltas[changed].astype({"days": int})
+    return list(deltas[SUMMARY_COLUMNS].itertuples(index=False, name=None))
+
+
+def update_summary(cur, old_cells, rows):
+    """Fold plan_instance rows that are about to be upserted into plan_summary.
+
+    `old_cells` are the (machine, date, shift, allocated_hours, downtime_hours) values the rows
+    replace, read with the rows locked in the saving transaction, so the summary commits or
+    rolls back together with plan_instance.
+    """
+    new_cells = [(row[0], row[1], row[2], row[4], row[7]) for row in rows]
+    deltas = summary_deltas(old_cells, new_cells)
+    if not deltas:
+        return
+    results = execute_values(cur, SUMMARY_DELTA_UPSERT, deltas, page_size=1000, fetch=True)
+    emptied = [(grain, period, machine, shift) for grain, period, machine, shift, days in results if days <= 0]
+    if emptied:
+        execute_values(cur, EMPTY_GROUPS_DELETE, emptied, page_size=1000)
+
+
+def rebuild_summary(conn):
+    """Recompute plan_summary from every plan_instance row (after bulk imports or manual fixes)."""
+    with conn:
+        with conn.cursor() as cur:
+            cur.execute(REBUILD_SUMMARY)
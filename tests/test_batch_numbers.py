@@ -0,0 +1,37 @@
+import io
+
+import pandas as pd
+import pytest
+
+from batch_numbers import MAX_BATCHES, batch_numbers_from_file, parse_batch_list, parse_batch_spec
+
+
+def test_spec_expands_ranges_and_keeps_zero_padding():
+    assert parse_batch_spec("0098 - 0101, 1405") == ["0098", "0099", "0100", "0101", "1405"]
+    assert parse_batch_spec("A1001-1003") == ["A1001", "A1002", "A1003"]
+
+
+def test_spec_rejects_reversed_and_oversized_ranges():
+    with pytest.raises(ValueError, match="ends before it starts"):
+        parse_batch_spec("300-100")
+    with pytest.raises(ValueError, match=str(MAX_BATCHES)):
+        parse_batch_spec(f"1-{MAX_BATCHES + 1}")
+
+
+def test_pasted_list_keeps_hyphenated_numbers_literally():
+    assert parse_batch_list("24-100\nB24-30\r\n\n2024-001\nB24-30 ") == ["24-100", "B24-30", "2024-001"]
+
+
+@pytest.mark.parametrize("filename, data", [
+    ("batches.csv", b"Batch number\nB24-30\n2024-001\n"),
+    ("batches.txt", b"B24-30\n2024-001\n"),
+])
+def test_files_are_read_literally_without_their_header(filename, data):
+    assert batch_numbers_from_file(data, filename) == ["B24-30", "2024-001"]
+
+
+def test_excel_first_column_without_its_header():
+    pytest.importorskip("openpyxl")
+    buffer = io.BytesIO()
+    pd.DataFrame({"Batch": ["B24-30", "2024-001"], "Note": ["x", "y"]}).to_excel(buffer, index=False)
+    assert batch_numbers_from_file(buffer.getvalue(), "batches.xlsx") == ["B24-30", "2024-001"]
@@ -0,0 +1,30 @@
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pandas as pd
+
+import fanout
+
+
+def _sleeper(seconds):
+    def read(branch):
+        time.sleep(seconds[branch])
+        return pd.DataFrame({"value": [branch]})
+    return read
+
+
+def test_time_queued_behind_other_reads_does_not_count(monkeypatch):
+    monkeypatch.setattr(fanout, "_executor", ThreadPoolExecutor(max_workers=1))
+
+    frame, status = fanout.fan_out(_sleeper({"a": 0.6, "b": 0.6}), ["a", "b"], timeout=1)
+
+    assert status["ok"].all()
+    assert sorted(frame["branch"]) == ["a", "b"]
+
+
+def test_a_read_running_past_the_timeout_is_reported_and_left_out():
+    frame, status = fanout.fan_out(_sleeper({"fast": 0.0, "hung": 2.0}), ["fast", "hung"], timeout=0.5)
+
+    assert list(frame["branch"]) == ["fast"]
+    hung = status.set_index("branch").loc["hung"]
+    assert not hung["ok"] and hung["error"] == "Timed out after 0.5s"
@@ -0,0 +1,39 @@
+from datetime import date
+
+import pandas as pd
+
+from schedule_model import ScheduleModel
+
+DAY = date(2026, 1, 1)
+
+
+def _backlog(*names):
+    return pd.DataFrame({
+        "id": range(1, len(names) + 1), "display_name": list(names), "time": [10.0] * len(names), "progress": [0.0] * len(names),
+    })
+
+
+def test_reregistering_drops_batches_that_left_the_backlog_unless_allocated():
+    schedule = ScheduleModel()
+    schedule.register_batches("M1", _backlog("P - 1", "P - 2", "P - 3"))
+    schedule.set_shift("M1", DAY, "LD")
+    schedule.set_allocation("M1", DAY, "P - 1", 50)
+
+    schedule.register_batches("M1", _backlog("P - 3"))
+
+    assert schedule.batches("M1") == ["P - 1", "P - 3"]  # P - 1 is still allocated on DAY
+    assert schedule.open_batches("M1") == ["P - 1", "P - 3"]
+
+    schedule.register_batches("M1", _backlog())
+
+    assert schedule.batches("M1") == ["P - 1"]
+
+
+def test_reregistering_an_unchanged_backlog_leaves_the_revision_alone():
+    schedule = ScheduleModel()
+    schedule.register_batches("M1", _backlog("P - 1", "P - 2"))
+    revision = schedule.revision
+
+    schedule.register_batches("M1", _backlog("P - 1", "P - 2"))
+
+    assert schedule.revision == revision
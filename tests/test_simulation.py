@@ -0,0 +1,38 @@
+from datetime import date
+
+import pandas as pd
+
+from simulation import run_scenarios, scenarios_from_rules
+
+MACHINES = ["A", "B"]
+DATES = [date(2026, 1, 1), date(2026, 1, 2)]
+
+
+def _rules(**columns):
+    """A one-rule frame the way the editor hands it over: blank text cells are NaN in a str column."""
+    return pd.DataFrame({name: pd.array([value], dtype="str" if name != "downtime_hours" else "float")
+                         for name, value in columns.items()})
+
+
+def test_downtime_only_rule_keeps_the_baseline_shift():
+    rules = _rules(scenario="PM", machine=None, days=None, shift=None, downtime_hours=3.0)
+
+    baseline, pm = scenarios_from_rules(rules, MACHINES, DATES)
+
+    assert baseline.name == "Baseline"
+    assert pm.shifts == {}
+    assert pm.downtime == {
+        (machine, day): ("Preventive Maintenance", 3.0) for machine in MACHINES for day in DATES
+    }
+    backlog = pd.DataFrame({
+        "id": [1], "product": ["P"], "batch_number": ["1"], "machine": ["A"], "time": [5.0], "progress": [0.0],
+    })
+    backlog["display_name"] = backlog["product"] + " - " + backlog["batch_number"]
+    comparison, _ = run_scenarios([baseline, pm], backlog, DATES, parallel=False)
+    assert set(comparison["scenario"]) == {"Baseline", "PM"}
+
+
+def test_blank_scenario_rows_are_skipped():
+    rules = _rules(scenario=" ", machine="A", days="All", shift=None, downtime_hours=None)
+
+    assert [scenario.name for scenario in scenarios_from_rules(rules, MACHINES, DATES)] == ["Baseline"]
@@ -0,0 +1,77 @@
+import pandas as pd
+
+VIOLATION_COLUMNS = ["check", "severity", "machine", "date", "batch", "value", "limit", "message"]
+TOLERANCE = 0.01  # Rounding slack, in hours and percent
+
+# check -> (severity, message)
+CHECKS = {
+    "overloaded_day": ("error", "Allocated hours exceed the shift hours left after downtime"),
+    "work_without_shift": ("error", "Batches or downtime on a day without a shift"),
+    "downtime_exceeds_shift": ("error", "Downtime is longer than the shift"),
+    "downtime_without_type": ("warning", "Downtime hours without a downtime type"),
+    "no_run_time": ("error", "Batch has no run time on this machine"),
+    "over_allocated_batch": ("error", "Batch allocated beyond 100%, saved schedules included"),
+    "under_allocated_batch": ("warning", "Batch only partly allocated, saved schedules included"),
+}
+
+
+def _flag(check, frame, mask, value, limit):
+    """Violation rows for the rows of `frame` where `mask` holds."""
+    severity, message = CHECKS[check]
+    rows = frame[mask]
+    return pd.DataFrame({
+        "check": check,
+        "severity": severity,
+        "machine": rows["machine"],
+        "date": rows["date"] if "date" in rows else None,
+        "batch": rows["batch"] if "batch" in rows else None,
+        "value": value[mask].round(2),
+        "limit": limit[mask].round(2) if isinstance(limit, pd.Series) else limit,
+        "message": message,
+    }, columns=VIOLATION_COLUMNS)
+
+
+def check_frames(days, allocations, batch_totals):
+    """Run every check over `ScheduleModel.to_frame()` days, `allocations_frame()` rows and
+    per-batch totals (machine, batch, percent); returns the violations table."""
+    has_shift = days["shift"].notna()
+    has_work = (days["allocated_hours"] > 0) | (days["downtime_hours"] > 0)
+    in_view = batch_totals.merge(allocations[["machine", "batch"]].drop_duplicates(), on=["machine", "batch"])
+
+    checks = [
+        _flag("overloaded_day", days, has_shift & (days["allocated_hours"] > days["capacity_hours"] + TOLERANCE),
+              days["allocated_hours"], days["capacity_hours"]),
+        _flag("work_without_shift", days, ~has_shift & has_work, days["allocated_hours"], 0.0),
+        _flag("downtime_exceeds_shift", days, has_shift & (days["downtime_hours"] > days["shift_hours"]),
+              days["downtime_hours"], days["shift_hours"]),
+        _flag("downtime_without_type", days, (days["downtime_hours"] > 0) & days["downtime_type"].isna(),
+              days["downtime_hours"], 0.0),
+        _flag("no_run_time", allocations, allocations["hours"] <= 0, allocations["percent"], 0.0),
+        _flag("over_allocated_batch", in_view, in_view["percent"] > 100 + TOLERANCE, in_view["percent"], 100.0),
+        _flag("under_allocated_batch", in_view, in_view["percent"] < 100 - TOLERANCE, in_view["percent"], 100.0),
+    ]
+    violations = [frame for frame in checks if not frame.empty]
+    violations = pd.concat(violations, ignore_index=True) if violations else pd.DataFrame(columns=VIOLATION_COLUMNS)
+    order = violations["severity"].map({"error": 0, "warning": 1})
+    return violations.iloc[order.argsort(kind="stable")].reset_index(drop=True)
+
+
+def validate_schedule(schedule, machines=None, dates=None, saved_allocations=None):
+    """Check a ScheduleModel's machine × date cells in one pass; returns one row per violation, errors first.
+
+    `saved_allocations` (`load_saved_allocations()` output) adds what is saved for the same batches
+    on cells this schedule doesn't hold, so a batch over-allocated across sessions is caught too.
+    """
+    days = schedule.to_frame(machines, dates)
+    allocations = schedule.allocations_frame(machines, dates)
+    every_allocation = allocations if machines is None and dates is None else schedule.allocations_frame()
+    parts = [every_allocation[["machine", "batch", "percent"]]]
+
+    if saved_allocations is not None and not saved_allocations.empty:
+        held = pd.MultiIndex.from_tuples(list(schedule.days), names=["machine", "date"]) if schedule.days else None
+        cells = pd.MultiIndex.from_frame(saved_allocations[["machine", "date"]])
+        outside = saved_allocations[~cells.isin(held)] if held is not None else saved_allocations
+        parts.append(outside[["machine", "batch", "percent"]])
+
+    batch_totals = pd.concat(parts, ignore_index=True).groupby(["machine", "batch"], as_index=False)["percent"].sum()
+    return check_frames(days, allocations, batch_totals)
@@ -0,0 +1,135 @@
+"""Prewarm a fresh app process: branch connection pools, the shared lookups and the planning code.
+
+Without it the first session after a deploy or an idle scale-down pays for all of it on its first
+rerun. Heavy modules (pandas, the planner) are imported here, on the warmup thread, not on the
+login page's import path.
+"""
+import threading
+import time
+from datetime import date, timedelta
+
+import streamlit as st
+
+from db import get_pool
+
+WARMUP_BRANCH = "main"  # The branch list and login live here
+
+_state = {"status": "cold", "started": None, "seconds": None, "branches": [], "steps": [], "planning_ms": None}
+_state_lock = threading.Lock()
+
+
+def _update(**changes):
+    with _state_lock:
+        _state.update(changes)
+
+
+def _warm_branch(branch):
+    """Open a branch's pool, load its lookups into the shared cache and purge stale drafts; returns per-step timings."""
+    import pandas as pd
+
+    from drafts import purge_stale_drafts
+    from reference_data import load_machines, load_products, load_rates
+
+    steps = []
+    for step, load in (
+        ("pool", lambda: get_pool(branch)),
+        ("products", lambda: load_products(branch=branch)),
+        ("machines", lambda: load_machines(branch=branch)),
+        ("rates", lambda: load_rates(branch=branch)),
+        ("stale drafts", lambda: purge_stale_drafts(branch)),
+    ):
+        started = time.perf_counter()
+        load()
+        steps.append({"step": step, "ms": round((time.perf_counter() - started) * 1000, 2)})
+    return pd.DataFrame(steps)
+
+
+def _warm_planning():
+    """Auto-schedule, validate, grid and render a two-machine schedule once: imports and first calls."""
+    import pandas as pd
+
+    from schedule_grid import allocation_grid, shift_grid
+    from schedule_render import render_consolidated_html
+    from scheduler import auto_schedule
+    from validation import validate_schedule
+
+    backlog = pd.DataFrame({
+        "id": [1, 2, 3],
+        "product": ["warmup"] * 3,
+        "batch_number": ["1", "2", "3"],
+        "machine": ["A", "A", "B"],
+        "time": [6.0, 14.0, 9.0],
+        "progress": [0.0, 0.0, 0.0],
+    })
+    backlog["display_name"] = backlog["product"] + " - " + backlog["batch_number"]
+    dates = [date.today() + timedelta(days=offset) for offset in range(3)]
+
+    schedule = auto_schedule(backlog, dates)
+    validate_schedule(schedule)
+    schedule.to_rows()
+    shift_grid(schedule, ["A", "B"], dates)
+    allocation_grid(schedule, ["A", "B"], dates)
+    render_consolidated_html(schedule, ["A", "B"], dates)
+
+
+def prewarm(branches=None):
+    """Warm every branch concurrently, then the planning code; returns the final status.
+
+    A branch that can't be reached is recorded in the status, not raised: the app still serves
+    the others.
+    """
+    from fanout import all_branches, fan_out
+    from reference_data import load_branches
+
+    started = time.perf_counter()
+    _update(status="warming", started=time.time())
+    try:
+        branches = list(branches or all_branches())
+        load_branches(branch=WARMUP_BRANCH if WARMUP_BRANCH in branches else branches[0])
+        steps, status = fan_out(_warm_branch, branches)
+        planning_started = time.perf_counter()
+        _warm_planning()
+        _update(
+            branches=status.to_dict("records"),
+            steps=steps.to_dict("records"),
+            planning_ms=round((time.perf_counter() - planning_started) * 1000, 2),
+            status="ready" if status["ok"].all() else "degraded",
+        )
+    except Exception as e:
+        print(f"❌ Warmup failed: {e}")  # ✅ Sessions still work, they just start cold
+        _update(status="failed")
+    _update(seconds=round(time.perf_counter() - started, 3))
+    return warmup_status()
+
+
+@st.cache_resource(show_spinner=False)
+def start_warmup():
+    """Start prewarming once per process, in the background; later calls return the same thread."""
+    thread = threading.Thread(target=prewarm, name="warmup", daemon=True)
+    thread.start()
+    return thread
+
+
+def warmup_status():
+    """Copy of the warmup state: status is cold, warming, ready, degraded (a branch failed) or failed."""
+    with _state_lock:
+        return {**_state, "branches": list(_state["branches"]), "steps": list(_state["steps"])}
+
+
+def is_ready():
+    """True once warmup has finished, whether or not every branch answered."""
+    return warmup_status()["status"] in ("ready", "degraded", "failed")
+
+
+def render_readiness():
+    """Sidebar indicator of the process's warmup state."""
+    state = warmup_status()
+    if state["status"] == "ready":
+        st.sidebar.caption(f"🟢 Ready (warmed up in {state['seconds']}s)")
+    elif state["status"] == "degraded":
+        failed = [branch["branch"] for branch in state["branches"] if not branch["ok"]]
+        st.sidebar.caption(f"🟠 Ready; unreachable at startup: {', '.join(failed)}")
+    elif state["status"] == "failed":
+        st.sidebar.caption("🟠 Ready; warmup failed, first loads may be slow")
+    else:
+        st.sidebar.caption("⏳ Warming up; the first loads may be slow")